@@ -20,8 +20,12 @@ project_root = Path(__file__).parent
 import sys
 sys.path.insert(0, str(project_root))
 
-from models.database import DatabaseManager
+from models.database import get_db_manager
+from models.backup import BackupScheduler
 from utils.encryption import EncryptionManager
+from utils.config import config_manager
+from utils import offload
+from utils.offload import OffloadPool, OffloadProxy
 from config import *
 
 # Configure logging
@@ -37,14 +41,31 @@ app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
 socketio = SocketIO(app, cors_allowed_origins="*")
 CORS(app)
 
-# Initialize database and encryption
-db_manager = DatabaseManager()
+# Blocking work runs in OS threads so one slow call never stalls the event loop;
+# password hashing has its own pool so a login burst cannot starve database calls
+db_pool = OffloadPool("db", DB_WORKERS)
+crypto_pool = OffloadPool("crypto", CRYPTO_WORKERS)
+offload.configure(socketio.async_mode)
+
+# Initialize database and encryption. Under eventlet/gevent database calls go through the
+# db pool; with threaded workers each request already has its own OS thread
+db_manager = get_db_manager()
+if offload.cooperative():
+    db_manager = OffloadProxy(db_manager, db_pool)
 encryption = EncryptionManager()
 
 # Ensure instance directory exists
 instance_dir = Path("instance")
 instance_dir.mkdir(exist_ok=True)
 
+def hash_password(password: str) -> str:
+    """bcrypt hash of a password, computed in the crypto pool"""
+    return crypto_pool.run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def check_password(password: str, password_hash: str) -> bool:
+    """Verify a password against its bcrypt hash in the crypto pool"""
+    return crypto_pool.run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
 def create_admin_user():
     """Create admin user if it doesn't exist"""
     if not ADMIN_ENABLED:
@@ -55,11 +76,10 @@ def create_admin_user():
         admin_user = db_manager.get_user_by_username(ADMIN_USERNAME)
         if not admin_user:
             # Create admin user
-            password_hash = bcrypt.hashpw(ADMIN_PASSWORD.encode('utf-8'), bcrypt.gensalt())
             admin_data = {
                 'username': ADMIN_USERNAME,
                 'email': ADMIN_EMAIL,
-                'password_hash': password_hash.decode('utf-8'),
+                'password_hash': hash_password(ADMIN_PASSWORD),
                 'is_admin': True
             }
             db_manager.add_user(admin_data)
@@ -150,14 +170,11 @@ def register():
         if db_manager.get_user_by_email(email):
             return jsonify({'error': 'Email already exists'}), 409
             
-        # Hash password
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        
         # Create user
         user_data = {
             'username': username,
             'email': email,
-            'password_hash': password_hash.decode('utf-8'),
+            'password_hash': hash_password(password),
             'is_admin': False
         }
         
@@ -198,7 +215,7 @@ def login():
             return jsonify({'error': 'Invalid credentials'}), 401
             
         # Verify password
-        if not bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
+        if not check_password(password, user['password_hash']):
             return jsonify({'error': 'Invalid credentials'}), 401
             
         # Generate token
@@ -228,36 +245,90 @@ def verify():
         'user': request.user
     }), 200
 
+def page_args():
+    """Keyset paging parameters shared by the list endpoints"""
+    return {
+        'cursor': request.args.get('cursor') or None,
+        'limit': request.args.get('limit', 100, type=int),
+        'q': request.args.get('q') or None
+    }
+
 @app.route('/api/connections', methods=['GET'])
 @require_auth
 def get_connections():
-    """Get user's connections"""
+    """Get user's connections (without passwords and keys)
+
+    Without query parameters the whole list is returned; with ?cursor=&limit=&q=
+    (and optionally host=, group=, tag=) one page {'items', 'next_cursor'}.
+    """
     try:
-        connections = db_manager.get_all_connections()
-        return jsonify(connections), 200
+        if not request.args:
+            return jsonify(db_manager.list_connections()), 200
+        page = db_manager.query_connections(
+            host=request.args.get('host') or None,
+            group_id=request.args.get('group', type=int),
+            tag=request.args.get('tag') or None,
+            **page_args()
+        )
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting connections: {e}")
         return jsonify({'error': 'Failed to get connections'}), 500
 
+@app.route('/api/connections/search', methods=['GET'])
+@require_auth
+def search_connections():
+    """Full-text search over connection names, hosts, usernames, notes and tags"""
+    try:
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        connections = db_manager.search_connections(request.args.get('q', ''), limit)
+        return jsonify(connections), 200
+    except Exception as e:
+        logger.error(f"Error searching connections: {e}")
+        return jsonify({'error': 'Failed to search connections'}), 500
+
 @app.route('/api/connections', methods=['POST'])
 @require_auth
 def create_connection():
     """Create a new connection"""
     try:
-        data = request.get_json()
-        connection_id = db_manager.add_connection(data)
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not all([data.get('name'), data.get('host'), data.get('username')]):
+            return jsonify({'error': 'Name, host and username are required'}), 400
+        if not str(data.get('port') or 22).isdigit():
+            return jsonify({'error': 'Port must be a number'}), 400
+        
+        connection_id = db_manager.add_connections_bulk([data])[0]
         return jsonify({'id': connection_id, 'message': 'Connection created'}), 201
     except Exception as e:
         logger.error(f"Error creating connection: {e}")
         return jsonify({'error': 'Failed to create connection'}), 500
 
+@app.route('/api/connections/<int:connection_id>', methods=['GET'])
+@require_auth
+def get_connection(connection_id):
+    """Get one connection for editing; the password and key path are never sent back"""
+    try:
+        connection = db_manager.get_connection(connection_id)
+        if not connection:
+            return jsonify({'error': 'Connection not found'}), 404
+        # Secrets are write-only over the API; clients only learn whether one is set
+        connection['has_password'] = bool(connection.pop('password', None))
+        connection['has_key'] = bool(connection.pop('key_path', None))
+        return jsonify(connection), 200
+    except Exception as e:
+        logger.error(f"Error getting connection: {e}")
+        return jsonify({'error': 'Failed to get connection'}), 500
+
 @app.route('/api/connections/<int:connection_id>', methods=['PUT'])
 @require_auth
 def update_connection(connection_id):
     """Update a connection"""
     try:
         data = request.get_json()
-        db_manager.update_connection(connection_id, data)
+        db_manager.update_connection(connection_id, **data)
         return jsonify({'message': 'Connection updated'}), 200
     except Exception as e:
         logger.error(f"Error updating connection: {e}")
@@ -277,21 +348,37 @@ def delete_connection(connection_id):
 @app.route('/api/commands', methods=['GET'])
 @require_auth
 def get_commands():
-    """Get command snippets"""
+    """Get command snippets; paged like /api/connections, with an optional category="""
     try:
-        commands = db_manager.get_all_commands()
-        return jsonify(commands), 200
+        if not request.args:
+            return jsonify(db_manager.get_all_commands()), 200
+        page = db_manager.query_commands(category=request.args.get('category') or None, **page_args())
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting commands: {e}")
         return jsonify({'error': 'Failed to get commands'}), 500
 
+@app.route('/api/commands/search', methods=['GET'])
+@require_auth
+def search_commands():
+    """Full-text search over snippet names, commands, categories and descriptions"""
+    try:
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        commands = db_manager.search_commands(request.args.get('q', ''), limit)
+        return jsonify(commands), 200
+    except Exception as e:
+        logger.error(f"Error searching commands: {e}")
+        return jsonify({'error': 'Failed to search commands'}), 500
+
 @app.route('/api/commands', methods=['POST'])
 @require_auth
 def create_command():
     """Create a new command snippet"""
     try:
         data = request.get_json()
-        command_id = db_manager.add_command(data)
+        command_id = db_manager.add_commands_bulk([data])[0]
         return jsonify({'id': command_id, 'message': 'Command created'}), 201
     except Exception as e:
         logger.error(f"Error creating command: {e}")
@@ -334,18 +421,25 @@ def get_users():
 @app.route('/api/admin/stats', methods=['GET'])
 @require_admin
 def admin_stats():
-    """Get admin statistics"""
+    """Get admin statistics
+
+    Totals come from trigger-maintained counters; ?breakdown=1 adds per-user
+    and per-group counts.
+    """
     try:
-        connections = db_manager.get_all_connections()
-        commands = db_manager.get_all_commands()
-        groups = db_manager.get_all_groups()
+        counts = db_manager.get_table_counts()
         
         stats = {
-            'connections_count': len(connections),
-            'commands_count': len(commands),
-            'groups_count': len(groups),
-            'total_users': 1  # Would need to implement user counting
+            'connections_count': counts.get('connections', 0),
+            'commands_count': counts.get('commands', 0),
+            'groups_count': counts.get('groups', 0),
+            'total_users': counts.get('users', 0),
+            'audit_entries': counts.get('command_audit', 0),
+            'ssh_sessions': db_manager.get_ssh_session_stats()
         }
+        if request.args.get('breakdown', type=int):
+            stats['users'] = db_manager.get_user_stats()
+            stats['groups'] = db_manager.get_group_stats()
         
         return jsonify(stats), 200
     except Exception as e:
@@ -372,6 +466,10 @@ if __name__ == '__main__':
     # Create admin user on startup
     create_admin_user()
     
+    # Scheduled online backups; skipped while the desktop app keeps them current
+    if config_manager.get('backup.enabled', True):
+        BackupScheduler(db_manager.db_path).start()
+    
     # Start the application
     logger.info(f"Starting web server on {WEB_HOST}:{WEB_PORT}")
     socketio.run(
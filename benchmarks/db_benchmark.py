@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Database benchmark: connection per query vs the pooled DatabaseManager
+
+Runs the queries behind the connection and command lists (load and refresh)
+against a temporary database, once opening a fresh sqlite3 connection per
+query like the old data layer did and once through the pooled connection.
+
+Usage: python benchmarks/db_benchmark.py [--rows 500] [--repeat 200]
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.database import DatabaseManager
+
+LIST_QUERIES = (
+    'SELECT * FROM connections ORDER BY name',
+    'SELECT * FROM commands ORDER BY name',
+)
+
+
+def seed(db: DatabaseManager, rows: int):
+    """Fill the lists with rows connections and commands, timing the bulk inserts"""
+    started = time.perf_counter()
+    db.add_connections_bulk([
+        {'name': f"server-{i:05d}", 'host': f"10.0.{i // 256}.{i % 256}", 'port': 22, 'username': "admin",
+         'password': f"secret-{i}", 'description': f"Benchmark host {i}"}
+        for i in range(rows)
+    ])
+    db.add_commands_bulk([
+        {'name': f"command-{i:05d}", 'command': f"systemctl status service-{i}", 'category': "Benchmark",
+         'description': f"Benchmark command {i}"}
+        for i in range(rows)
+    ])
+    print(f"{'bulk insert of the rows':<40} {(time.perf_counter() - started) * 1000:8.3f} ms")
+
+
+def per_query_connect(db_path: str, repeat: int) -> float:
+    """Old pattern: connect, query, close for every call"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in LIST_QUERIES:
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute(query)
+            cursor.fetchall()
+            conn.close()
+    return time.perf_counter() - started
+
+
+def pooled(db: DatabaseManager, repeat: int) -> float:
+    """New pattern: the calling thread's pooled connection and its statement cache"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in LIST_QUERIES:
+            cursor = db._connect().cursor()
+            cursor.execute(query)
+            cursor.fetchall()
+    return time.perf_counter() - started
+
+
+def timed(label: str, repeat: int, func, *args):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed / repeat * 1000:8.3f} ms/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--rows', type=int, default=500, help="connections and commands to create")
+    parser.add_argument('--repeat', type=int, default=200, help="list refreshes to time")
+    args = parser.parse_args()
+    # Seeding would log every row
+    logging.getLogger('models.database').setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "benchmark.db")
+        db = DatabaseManager(db_path)
+        print(f"{args.rows} connections and commands, {args.repeat} refreshes\n")
+        seed(db, args.rows)
+        
+        old = per_query_connect(db_path, args.repeat)
+        new = pooled(db, args.repeat)
+        calls = args.repeat * len(LIST_QUERIES)
+        print(f"{'list query, connection per query':<40} {old / calls * 1000:8.3f} ms/call")
+        print(f"{'list query, pooled connection':<40} {new / calls * 1000:8.3f} ms/call")
+        print(f"{'overhead removed per query':<40} {(old - new) / calls * 1000:8.3f} ms/call\n")
+        
+        # Full refreshes as the managers run them (includes row mapping and decryption)
+        db.cache.enabled = False
+        timed("get_all_connections", args.repeat, db.get_all_connections)
+        timed("list_connections (no decryption)", args.repeat, db.list_connections)
+        timed("get_all_commands", args.repeat, db.get_all_commands)
+        timed("get_connection", args.repeat * 10, db.get_connection, args.rows // 2)
+        
+        # Repeated reads between writes come from the query cache
+        db.cache.enabled = True
+        timed("list_connections (cached)", args.repeat, db.list_connections)
+        timed("get_all_commands (cached)", args.repeat, db.get_all_commands)
+        
+        # What every extra DatabaseManager() used to cost before it was shared
+        timed("DatabaseManager() construction", 20, lambda: DatabaseManager(db_path).close())
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
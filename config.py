@@ -34,6 +34,10 @@ ENCRYPTION_KEY_FILE = BASE_DIR / "instance" / ".encryption_key"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = BASE_DIR / "ssh_client.log"
 
+# Web server worker threads for blocking work: bcrypt always, SQLite calls only under eventlet/gevent
+DB_WORKERS = int(os.getenv("DB_WORKERS", "8"))
+CRYPTO_WORKERS = int(os.getenv("CRYPTO_WORKERS", str(os.cpu_count() or 2)))
+
 # SSH settings
 SSH_TIMEOUT = int(os.getenv("SSH_TIMEOUT", "30"))
 SSH_MAX_CONNECTIONS = int(os.getenv("SSH_MAX_CONNECTIONS", "10"))
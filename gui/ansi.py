@@ -0,0 +1,262 @@
+"""
+Incremental ANSI/VT100 escape sequence parsing for terminal output
+"""
+
+import re
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
+
+# Token kinds produced by AnsiTokenizer
+TEXT = 'text'
+CSI = 'csi'
+OSC = 'osc'
+ESC = 'esc'
+CONTROL = 'control'
+
+_SEQUENCE_RE = re.compile(
+    r'\x1b\[([0-?]*)([ -/]*)([@-~])'             # CSI: ESC [ params intermediates final
+    r'|\x1b\]([^\x07\x1b]*)(?:\x07|\x1b\\)'      # OSC: ESC ] text BEL|ST
+    r'|\x1b([ -/]*[0-Z\\^-~])'                   # other escapes (charset selection, keypad modes...)
+    r'|\x1b(?=[^ -~])'                           # stray ESC before a non-printable char
+    r'|([\x00-\x08\x0b-\x1a\x1c-\x1f\x7f])'      # C0 controls except TAB, LF and ESC
+)
+
+# Longest incomplete sequence kept between chunks before it is dropped as garbage
+MAX_PENDING = 4096
+
+# xterm palette: 16 base colors, 6x6x6 cube and grayscale ramp
+BASE_COLORS = [
+    "#000000", "#cd0000", "#00cd00", "#cdcd00", "#0000ee", "#cd00cd", "#00cdcd", "#e5e5e5",
+    "#7f7f7f", "#ff0000", "#00ff00", "#ffff00", "#5c5cff", "#ff00ff", "#00ffff", "#ffffff",
+]
+_CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+PALETTE = BASE_COLORS + [
+    f"#{_CUBE_LEVELS[r]:02x}{_CUBE_LEVELS[g]:02x}{_CUBE_LEVELS[b]:02x}"
+    for r in range(6) for g in range(6) for b in range(6)
+] + [f"#{v:02x}{v:02x}{v:02x}" for v in range(8, 248, 10)]
+
+DEFAULT_FOREGROUND = "white"
+DEFAULT_BACKGROUND = "black"
+
+
+class Style(NamedTuple):
+    """Graphic rendition state; colors are palette indexes or '#rrggbb'"""
+    fg: Optional[Union[int, str]] = None
+    bg: Optional[Union[int, str]] = None
+    bold: bool = False
+    underline: bool = False
+    inverse: bool = False
+
+
+DEFAULT_STYLE = Style()
+
+
+class AnsiTokenizer:
+    """Splits a stream into text and escape sequence tokens, resumable across chunks"""
+    
+    def __init__(self):
+        self.pending = ''
+    
+    def feed(self, data: str) -> List[Tuple]:
+        """Tokenize a chunk; an incomplete trailing sequence is kept for the next call"""
+        if self.pending:
+            data = self.pending + data
+            self.pending = ''
+        
+        tokens: List[Tuple] = []
+        pos = 0
+        for match in _SEQUENCE_RE.finditer(data):
+            start = match.start()
+            if start > pos:
+                tokens.append((TEXT, data[pos:start]))
+            pos = match.end()
+            
+            params, intermediates, final, osc, escape, control = match.groups()
+            if final is not None:
+                tokens.append((CSI, params, intermediates, final))
+            elif osc is not None:
+                tokens.append((OSC, osc))
+            elif escape is not None:
+                tokens.append((ESC, escape))
+            elif control is not None:
+                tokens.append((CONTROL, control))
+        
+        rest = data[pos:]
+        escape_at = rest.find('\x1b')
+        if escape_at == -1:
+            if rest:
+                tokens.append((TEXT, rest))
+            return tokens
+        
+        if escape_at:
+            tokens.append((TEXT, rest[:escape_at]))
+        tail = rest[escape_at:]
+        if len(tail) < MAX_PENDING:
+            self.pending = tail
+        else:
+            # Never terminated - give up on it instead of buffering forever
+            tokens.append((TEXT, tail[1:]))
+        return tokens
+
+
+def parse_params(params: str, default: int = 0) -> List[int]:
+    """Parse CSI parameters like '1;31' into integers"""
+    if not params:
+        return [default]
+    values = []
+    for part in params.lstrip('?>=!').split(';'):
+        part = part.split(':')[0]
+        values.append(int(part) if part.isdigit() else default)
+    return values
+
+
+def apply_sgr(style: Style, params: str) -> Style:
+    """Apply an SGR (ESC [ ... m) sequence to a style"""
+    codes = parse_params(params)
+    fg, bg, bold, underline, inverse = style
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        if code == 0:
+            fg, bg, bold, underline, inverse = DEFAULT_STYLE
+        elif code == 1:
+            bold = True
+        elif code == 22:
+            bold = False
+        elif code == 4:
+            underline = True
+        elif code == 24:
+            underline = False
+        elif code == 7:
+            inverse = True
+        elif code == 27:
+            inverse = False
+        elif 30 <= code <= 37:
+            fg = code - 30
+        elif 90 <= code <= 97:
+            fg = code - 90 + 8
+        elif code == 39:
+            fg = None
+        elif 40 <= code <= 47:
+            bg = code - 40
+        elif 100 <= code <= 107:
+            bg = code - 100 + 8
+        elif code == 49:
+            bg = None
+        elif code in (38, 48) and i + 1 < len(codes):
+            color = None
+            if codes[i + 1] == 5 and i + 2 < len(codes):
+                color = codes[i + 2] % 256
+                i += 2
+            elif codes[i + 1] == 2 and i + 4 < len(codes):
+                r, g, b = (min(c, 255) for c in codes[i + 2:i + 5])
+                color = f"#{r:02x}{g:02x}{b:02x}"
+                i += 4
+            if code == 38:
+                fg = color
+            else:
+                bg = color
+        i += 1
+    return Style(fg, bg, bold, underline, inverse)
+
+
+def color_value(color: Optional[Union[int, str]], default: str) -> str:
+    """Resolve a style color to a Tk color"""
+    if color is None:
+        return default
+    if isinstance(color, int):
+        return PALETTE[color]
+    return color
+
+
+def style_options(style: Style, font: Optional[Tuple] = None) -> Dict[str, Any]:
+    """Tk tag options for a style"""
+    fg = color_value(style.fg, DEFAULT_FOREGROUND)
+    bg = color_value(style.bg, "")
+    if style.bold and isinstance(style.fg, int) and style.fg < 8:
+        # Bold renders the bright variant, like most terminals
+        fg = PALETTE[style.fg + 8]
+    if style.inverse:
+        fg, bg = bg or DEFAULT_BACKGROUND, fg
+    
+    options: Dict[str, Any] = {'foreground': fg}
+    if bg:
+        options['background'] = bg
+    if style.underline:
+        options['underline'] = True
+    if style.bold and font:
+        options['font'] = tuple(font[:2]) + ("bold",)
+    return options
+
+
+class StyleTags:
+    """Stable Tk tag names for styles, so each style is configured only once"""
+    
+    def __init__(self, default_tag: str = "white", prefix: str = "ansi"):
+        self.default_tag = default_tag
+        self.prefix = prefix
+        self._tag_names: Dict[Style, str] = {DEFAULT_STYLE: default_tag}
+        self._tag_styles: Dict[str, Style] = {}
+    
+    def tag_for(self, style: Style) -> str:
+        """Get the tag name of a style, naming new styles once"""
+        tag = self._tag_names.get(style)
+        if tag is None:
+            tag = f"{self.prefix}{len(self._tag_names)}"
+            self._tag_names[style] = tag
+            self._tag_styles[tag] = style
+        return tag
+    
+    def tag_options(self, tag: str, font: Optional[Tuple] = None) -> Optional[Dict[str, Any]]:
+        """Tk options for a tag named by this cache, None for foreign tags"""
+        style = self._tag_styles.get(tag)
+        if style is None:
+            return None
+        return style_options(style, font)
+
+
+class AnsiParser:
+    """Turns a raw output stream into (text, tag) runs for a line-oriented Text widget"""
+    
+    def __init__(self, default_tag: str = "white"):
+        self.default_tag = default_tag
+        self.tokenizer = AnsiTokenizer()
+        self.style = DEFAULT_STYLE
+        self.tags = StyleTags(default_tag)
+    
+    def feed(self, data: str) -> List[Tuple[str, str]]:
+        """Parse a chunk and return text runs with their tag names"""
+        runs: List[Tuple[str, str]] = []
+        parts: List[str] = []
+        tag = self.tag_for(self.style)
+        
+        for token in self.tokenizer.feed(data):
+            kind = token[0]
+            if kind == TEXT:
+                parts.append(token[1])
+            elif kind == CSI and token[3] == 'm' and not token[2]:
+                self.style = apply_sgr(self.style, token[1])
+                new_tag = self.tag_for(self.style)
+                if new_tag != tag:
+                    if parts:
+                        runs.append((''.join(parts), tag))
+                        parts = []
+                    tag = new_tag
+            # Cursor movement, erase, OSC titles and C0 controls have no meaning
+            # in a line-oriented view and are dropped
+        
+        if parts:
+            runs.append((''.join(parts), tag))
+        return runs
+    
+    def tag_for(self, style: Style) -> str:
+        """Get the tag name of a style"""
+        return self.tags.tag_for(style)
+    
+    def tag_options(self, tag: str, font: Optional[Tuple] = None) -> Optional[Dict[str, Any]]:
+        """Tk options for a tag created by this parser, None for foreign tags"""
+        return self.tags.tag_options(tag, font)
+    
+    def reset(self):
+        """Forget the current style and any partial sequence"""
+        self.style = DEFAULT_STYLE
+        self.tokenizer.pending = ''
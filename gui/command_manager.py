@@ -1,14 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, Callable, Optional
-from models.database import DatabaseManager
+from models.database import get_db_manager
 
 
 class CommandManager(ttk.Frame):
-    def __init__(self, parent, on_snippet_select: Callable):
+    # Typing pause before searching, results shown for a search
+    SEARCH_DEBOUNCE_MS = 150
+    SEARCH_LIMIT = 200
+    
+    def __init__(self, parent, on_snippet_select: Callable,
+                 on_snippet_saved: Optional[Callable[[Dict[str, Any]], None]] = None):
         super().__init__(parent)
         self.on_snippet_select = on_snippet_select
-        self.db_manager = DatabaseManager()
+        self.on_snippet_saved = on_snippet_saved
+        self.db_manager = get_db_manager()
+        self.search_job = None
         self.setup_ui()
         self.load_commands()
         
@@ -18,6 +25,16 @@ class CommandManager(ttk.Frame):
         list_frame = ttk.LabelFrame(self, text="Command Snippets", padding=5)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
         
+        # Search box (full-text, prefix per word); empty shows every snippet
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+        
         # Treeview for commands
         columns = ("Category", "Description")
         self.commands_tree = ttk.Treeview(list_frame, columns=columns, show="tree headings", height=10)
@@ -53,20 +70,35 @@ class CommandManager(ttk.Frame):
         for item in self.commands_tree.get_children():
             self.commands_tree.delete(item)
             
-        # Load commands
-        commands = self.db_manager.get_all_commands()
+        # Load commands, or the best matches of the search
+        query = self.search_var.get().strip()
+        if query:
+            commands = self.db_manager.search_commands(query, self.SEARCH_LIMIT)
+        else:
+            commands = self.db_manager.get_all_commands()
         for cmd in commands:
             self.commands_tree.insert("", "end", cmd['id'], text=cmd['name'], 
                                     values=(cmd.get('category', 'General'), 
                                            cmd.get('description', '')))
                                            
+    def schedule_search(self):
+        """Search once typing pauses"""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DEBOUNCE_MS, self.run_search)
+        
+    def run_search(self):
+        self.search_job = None
+        self.load_commands()
+        
     def add_command(self):
         """Add a new command snippet"""
         dialog = CommandDialog(self, "Add Command Snippet")
         if dialog.result:
             command_data = dialog.result
             # Save to database
-            self.db_manager.add_command(command_data)
+            self.db_manager.add_command(**command_data)
+            self.snippet_saved(command_data)
             self.load_commands()
             
     def edit_command(self):
@@ -82,9 +114,15 @@ class CommandManager(ttk.Frame):
             dialog = CommandDialog(self, "Edit Command Snippet", command_data)
             if dialog.result:
                 # Update in database
-                self.db_manager.update_command(command_id, dialog.result)
+                self.db_manager.update_command(command_id, **dialog.result)
+                self.snippet_saved(dialog.result)
                 self.load_commands()
                 
+    def snippet_saved(self, command_data: Dict[str, Any]):
+        """Tell the owner about a new or changed snippet (e.g. for completion)"""
+        if self.on_snippet_saved:
+            self.on_snippet_saved(command_data)
+            
     def delete_command(self):
         """Delete selected command"""
         selection = self.commands_tree.selection()
@@ -1,14 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any, Callable, Optional
-from models.database import DatabaseManager
+from models.database import HOST_FIELDS, get_db_manager
 
 
 class ConnectionManager(ttk.Frame):
-    def __init__(self, parent, on_connection_select: Callable):
+    # Typing pause before searching, results shown for a search
+    SEARCH_DEBOUNCE_MS = 150
+    SEARCH_LIMIT = 200
+    
+    def __init__(self, parent, on_connection_select: Callable,
+                 on_connection_moved: Optional[Callable[[int], None]] = None):
         super().__init__(parent)
         self.on_connection_select = on_connection_select
-        self.db_manager = DatabaseManager()
+        self.on_connection_moved = on_connection_moved
+        self.db_manager = get_db_manager()
+        self.search_job = None
         self.setup_ui()
         self.load_connections()
         
@@ -18,6 +25,16 @@ class ConnectionManager(ttk.Frame):
         list_frame = ttk.LabelFrame(self, text="Connections", padding=5)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 5))
         
+        # Search box over name, host, username, notes and tags; empty shows every connection
+        search_frame = ttk.Frame(list_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+        
         # Treeview for connections
         columns = ("Host", "Port", "Username", "Description")
         self.connections_tree = ttk.Treeview(list_frame, columns=columns, show="tree headings", height=10)
@@ -53,20 +70,34 @@ class ConnectionManager(ttk.Frame):
         for item in self.connections_tree.get_children():
             self.connections_tree.delete(item)
             
-        # Load connections
-        connections = self.db_manager.get_all_connections()
+        # Load connections (secrets are decrypted only when one is opened or edited)
+        query = self.search_var.get().strip()
+        if query:
+            connections = self.db_manager.search_connections(query, self.SEARCH_LIMIT)
+        else:
+            connections = self.db_manager.list_connections()
         for conn in connections:
             self.connections_tree.insert("", "end", conn['id'], text=conn['name'], 
                                        values=(conn['host'], conn['port'], conn['username'], 
                                               conn.get('description', '')))
                                               
+    def schedule_search(self):
+        """Search once typing pauses"""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DEBOUNCE_MS, self.run_search)
+        
+    def run_search(self):
+        self.search_job = None
+        self.load_connections()
+        
     def add_connection(self):
         """Add a new connection"""
         dialog = ConnectionDialog(self, "Add Connection")
         if dialog.result:
             connection_data = dialog.result
             # Save to database
-            self.db_manager.add_connection(connection_data)
+            self.db_manager.add_connection(**connection_data)
             self.load_connections()
             
     def edit_connection(self):
@@ -82,7 +113,11 @@ class ConnectionManager(ttk.Frame):
             dialog = ConnectionDialog(self, "Edit Connection", connection_data)
             if dialog.result:
                 # Update in database
-                self.db_manager.update_connection(connection_id, dialog.result)
+                self.db_manager.update_connection(connection_id, **dialog.result)
+                moved = any(str(dialog.result.get(name, connection_data[name])) != str(connection_data[name])
+                            for name in HOST_FIELDS)
+                if moved and self.on_connection_moved:
+                    self.on_connection_moved(int(connection_id))
                 self.load_connections()
                 
     def delete_connection(self):
@@ -0,0 +1,257 @@
+import re
+import threading
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_right
+from typing import Callable, List, Optional, Tuple
+
+from utils.dispatcher import search_dispatcher
+from utils.scrollback import ScrollbackArchive
+
+
+class FindBar(ttk.Frame):
+    """Incremental find over a terminal's Text widget and its scrollback archive"""
+    
+    MATCH_TAG = "find_match"
+    CURRENT_TAG = "find_current"
+    
+    # Typing pause before searching, highlight cap, archive hits listed
+    DEBOUNCE_MS = 150
+    POLL_MS = 100
+    MAX_HIGHLIGHTS = 5000
+    MAX_ARCHIVE_HITS = 1000
+    
+    def __init__(self, parent, text: tk.Text, archive: Optional[ScrollbackArchive], on_close: Callable[[], None]):
+        super().__init__(parent)
+        self.text = text
+        self.archive = archive
+        self.on_close = on_close
+        self.search_job = None
+        
+        # Archive hits are produced by a worker and picked up by the Tk thread
+        self.generation = 0
+        self.archive_hits: List[Tuple[int, str]] = []
+        self.archive_count = 0
+        self.archive_listed = 0
+        self.archive_done = True
+        self.poll_scheduled = False
+        self.widget_count = 0
+        self.hits_lock = threading.Lock()
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """Setup the query entry, options, navigation and scrollback results"""
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X)
+        
+        ttk.Label(bar, text="Find:").pack(side=tk.LEFT)
+        self.query_var = tk.StringVar()
+        self.query_var.trace_add("write", lambda *args: self.schedule_search())
+        self.entry = ttk.Entry(bar, textvariable=self.query_var, width=30)
+        self.entry.pack(side=tk.LEFT, padx=5)
+        
+        self.regex_var = tk.BooleanVar(value=False)
+        self.case_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bar, text="Regex", variable=self.regex_var, command=self.schedule_search).pack(side=tk.LEFT)
+        ttk.Checkbutton(bar, text="Match case", variable=self.case_var, command=self.schedule_search).pack(side=tk.LEFT)
+        
+        ttk.Button(bar, text="▲", width=3, command=self.find_previous).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(bar, text="▼", width=3, command=self.find_next).pack(side=tk.LEFT)
+        ttk.Button(bar, text="✕", width=3, command=self.close).pack(side=tk.RIGHT)
+        
+        self.status_label = ttk.Label(bar, text="", foreground="gray")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        
+        # Matches in lines that were already trimmed from the widget
+        self.archive_list = tk.Listbox(self, height=5, font=("Consolas", 9), activestyle="none")
+        
+        self.entry.bind("<Return>", lambda event: self.find_next())
+        self.entry.bind("<Shift-Return>", lambda event: self.find_previous())
+        self.entry.bind("<F3>", lambda event: self.find_next())
+        self.entry.bind("<Shift-F3>", lambda event: self.find_previous())
+        self.entry.bind("<Escape>", lambda event: self.close())
+        
+        self.text.tag_configure(self.MATCH_TAG, background="#44475a")
+        self.text.tag_configure(self.CURRENT_TAG, background="#ffb86c", foreground="black")
+    
+    def open(self, query: str = ""):
+        """Focus the entry, optionally starting with a query (e.g. the selection)"""
+        if query:
+            self.query_var.set(query)
+        self.entry.focus_set()
+        self.entry.select_range(0, tk.END)
+        self.schedule_search()
+    
+    def schedule_search(self):
+        """Search once typing pauses"""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.DEBOUNCE_MS, self.search)
+    
+    def compile(self) -> Optional["re.Pattern"]:
+        query = self.query_var.get()
+        if not query:
+            return None
+        flags = 0 if self.case_var.get() else re.IGNORECASE
+        try:
+            return re.compile(query if self.regex_var.get() else re.escape(query), flags)
+        except re.error as e:
+            self.status_label.config(text=f"Invalid regex: {e}", foreground="red")
+            return None
+    
+    def search(self):
+        """Highlight matches in the widget and start searching the archive"""
+        self.search_job = None
+        self.generation += 1
+        self.clear_highlights()
+        with self.hits_lock:
+            self.archive_hits = []
+            self.archive_count = 0
+        self.archive_listed = 0
+        self.archive_list.delete(0, tk.END)
+        self.archive_list.pack_forget()
+        
+        pattern = self.compile()
+        if pattern is None:
+            if not self.query_var.get():
+                self.status_label.config(text="", foreground="gray")
+            return
+        
+        count = self.highlight(pattern)
+        
+        self.archive_done = True
+        if self.archive and self.archive.has_data():
+            self.archive_done = False
+            search_dispatcher.submit(self, self.search_archive, self.archive, pattern, self.generation)
+            if not self.poll_scheduled:
+                self.poll_scheduled = True
+                self.after(self.POLL_MS, self.poll_archive)
+        
+        self.update_status(count)
+        # Jump to the match closest to the bottom, where the user is reading
+        self.find_previous(from_end=True)
+    
+    def highlight(self, pattern: "re.Pattern") -> int:
+        """Tag up to MAX_HIGHLIGHTS matches in the widget; returns the number of matches"""
+        content = self.text.get("1.0", "end-1c")
+        
+        # Offsets of line starts, to turn string offsets into line.column indexes
+        line_starts = [0]
+        position = content.find('\n')
+        while position >= 0:
+            line_starts.append(position + 1)
+            position = content.find('\n', position + 1)
+        
+        def index(offset: int) -> str:
+            line = bisect_right(line_starts, offset)
+            return f"{line}.{offset - line_starts[line - 1]}"
+        
+        ranges = []
+        count = 0
+        for match in pattern.finditer(content):
+            if match.end() == match.start():
+                continue
+            count += 1
+            if count <= self.MAX_HIGHLIGHTS:
+                ranges.extend((index(match.start()), index(match.end())))
+        
+        # One Tcl call per batch instead of one per match
+        for start in range(0, len(ranges), 1000):
+            self.text.tag_add(self.MATCH_TAG, *ranges[start:start + 1000])
+        self.text.tag_raise(self.MATCH_TAG)
+        self.text.tag_raise(self.CURRENT_TAG)
+        self.widget_count = count
+        return count
+    
+    def search_archive(self, archive: ScrollbackArchive, pattern: "re.Pattern", generation: int):
+        """Runs on a worker: stream the archive, stopping when the query or the archive changes"""
+        stale = lambda: generation != self.generation
+        try:
+            for hit in archive.search(pattern.pattern, regex=True,
+                                           ignore_case=bool(pattern.flags & re.IGNORECASE),
+                                           should_stop=stale):
+                if stale():
+                    return
+                with self.hits_lock:
+                    # Only the first hits are listed; the rest are just counted
+                    if len(self.archive_hits) < self.MAX_ARCHIVE_HITS:
+                        self.archive_hits.append(hit)
+                    self.archive_count += 1
+        finally:
+            if not stale():
+                self.archive_done = True
+    
+    def set_archive(self, archive: Optional[ScrollbackArchive]):
+        """Search another archive from now on, or none once the terminal dropped its own"""
+        # A search still streaming the old archive stops; the hits listed so far stay
+        self.generation += 1
+        search_dispatcher.cancel(self)
+        self.archive_done = True
+        self.archive = archive
+    
+    def poll_archive(self):
+        """Show archive hits found so far"""
+        self.poll_scheduled = False
+        if not self.winfo_exists():
+            return
+        with self.hits_lock:
+            new_hits = self.archive_hits[self.archive_listed:]
+            total = self.archive_count
+        if new_hits:
+            if not self.archive_list.winfo_ismapped():
+                self.archive_list.pack(fill=tk.X)
+            self.archive_list.insert(tk.END, *(f"{number:>8}: {line}" for number, line in new_hits))
+            self.archive_listed += len(new_hits)
+        self.update_status(self.widget_count, total)
+        if not self.archive_done:
+            self.poll_scheduled = True
+            self.after(self.POLL_MS, self.poll_archive)
+    
+    def update_status(self, count: int, archive_count: int = 0):
+        status = f"{count} match{'es' if count != 1 else ''}"
+        if count > self.MAX_HIGHLIGHTS:
+            status += f" ({self.MAX_HIGHLIGHTS} highlighted)"
+        if self.archive and (archive_count or not self.archive_done):
+            status += f", {archive_count} in scrollback"
+            if not self.archive_done:
+                status += " (searching...)"
+        self.status_label.config(text=status, foreground="gray" if count or archive_count else "red")
+    
+    def find_next(self):
+        """Select the next highlighted match, wrapping at the end"""
+        current = self.text.tag_ranges(self.CURRENT_TAG)
+        start = current[1] if current else self.text.index("@0,0")
+        found = self.text.tag_nextrange(self.MATCH_TAG, start) or self.text.tag_nextrange(self.MATCH_TAG, "1.0")
+        self.select(found)
+        return "break"
+    
+    def find_previous(self, from_end: bool = False):
+        """Select the previous highlighted match, wrapping at the start"""
+        current = self.text.tag_ranges(self.CURRENT_TAG)
+        start = current[0] if current and not from_end else tk.END
+        found = self.text.tag_prevrange(self.MATCH_TAG, start) or self.text.tag_prevrange(self.MATCH_TAG, tk.END)
+        self.select(found)
+        return "break"
+    
+    def select(self, found):
+        self.text.tag_remove(self.CURRENT_TAG, "1.0", tk.END)
+        if found:
+            self.text.tag_add(self.CURRENT_TAG, found[0], found[1])
+            self.text.see(found[0])
+    
+    def clear_highlights(self):
+        self.text.tag_remove(self.MATCH_TAG, "1.0", tk.END)
+        self.text.tag_remove(self.CURRENT_TAG, "1.0", tk.END)
+        self.widget_count = 0
+    
+    def close(self):
+        """Stop searching, remove highlights and hide the bar"""
+        self.generation += 1
+        if self.search_job:
+            self.after_cancel(self.search_job)
+            self.search_job = None
+        search_dispatcher.cancel(self)
+        self.clear_highlights()
+        self.archive_done = True
+        self.on_close()
+        return "break"
\ No newline at end of file
@@ -0,0 +1,87 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Optional
+
+from models.history import CommandHistory
+
+
+class HistorySearch(ttk.Frame):
+    """Ctrl-R reverse search bar over the persistent command history"""
+    
+    RESULT_LIMIT = 50
+    
+    def __init__(self, parent, history: CommandHistory, on_accept: Callable[[str], None],
+                 on_close: Callable[[], None]):
+        super().__init__(parent)
+        self.history = history
+        self.on_accept = on_accept
+        self.on_close = on_close
+        self.connection_id: Optional[int] = None
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """Setup the query entry and the result list"""
+        bar = ttk.Frame(self)
+        bar.pack(fill=tk.X)
+        
+        ttk.Label(bar, text="reverse-i-search:").pack(side=tk.LEFT)
+        self.query_var = tk.StringVar()
+        self.query_var.trace_add("write", lambda *args: self.refresh())
+        self.entry = ttk.Entry(bar, textvariable=self.query_var)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        self.all_connections = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bar, text="All connections", variable=self.all_connections,
+                        command=self.refresh).pack(side=tk.LEFT)
+        
+        self.results = tk.Listbox(self, height=8, font=("Consolas", 10), activestyle="none")
+        self.results.pack(fill=tk.X)
+        self.results.bind("<Double-Button-1>", lambda event: self.accept())
+        
+        for widget in (self.entry, self.results):
+            widget.bind("<Return>", lambda event: self.accept())
+            widget.bind("<Escape>", lambda event: self.close())
+            widget.bind("<Up>", lambda event: self.move(-1))
+            widget.bind("<Down>", lambda event: self.move(1))
+            widget.bind("<Control-r>", lambda event: self.move(1))
+    
+    def open(self, connection_id: Optional[int], query: str = ""):
+        """Show results for the connection, starting from the current input"""
+        self.connection_id = connection_id
+        self.query_var.set(query)
+        self.refresh()
+        self.entry.focus_set()
+        self.entry.icursor(tk.END)
+    
+    def refresh(self):
+        """Re-run the search for the current query"""
+        connection_id = None if self.all_connections.get() else self.connection_id
+        matches = self.history.search(self.query_var.get(), connection_id, self.RESULT_LIMIT)
+        self.results.delete(0, tk.END)
+        for match in matches:
+            self.results.insert(tk.END, match['command'])
+        if matches:
+            self.results.selection_set(0)
+    
+    def move(self, step: int):
+        """Move the selection through the results"""
+        size = self.results.size()
+        if size:
+            selected = self.results.curselection()
+            index = min(max((selected[0] if selected else -1) + step, 0), size - 1)
+            self.results.selection_clear(0, tk.END)
+            self.results.selection_set(index)
+            self.results.see(index)
+        return "break"
+    
+    def accept(self):
+        """Put the selected command on the input line"""
+        selected = self.results.curselection()
+        if selected:
+            self.on_accept(self.results.get(selected[0]))
+        self.close()
+        return "break"
+    
+    def close(self):
+        self.on_close()
+        return "break"
\ No newline at end of file
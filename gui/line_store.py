@@ -0,0 +1,161 @@
+"""
+Compact append-only store for terminal lines and their style runs
+"""
+
+import io
+import threading
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.scrollback import compile_pattern, search_stream
+
+
+class LineStore:
+    """Terminal lines kept as UTF-8 in one bytearray, with array-backed offsets.
+
+    Line i (counted from the first line still held) spans
+    data[starts[i]:starts[i + 1]] including its newline; the last line is the
+    unfinished one. Styles are stored as runs: (byte offset in line, style id)
+    pairs in two flat arrays, with run_starts[i] pointing at the first run of
+    line i. A line therefore costs its bytes plus ~12 bytes and 6 bytes per
+    style change, instead of a Tk text line with its tags.
+
+    Once more than max_lines complete lines are held the oldest ones are
+    evicted in blocks and handed to on_evict (e.g. the gzip archive).
+    """
+    
+    def __init__(self, max_lines: int = 200000, on_evict: Optional[Callable[[str], None]] = None):
+        self.max_lines = max_lines
+        self.evict_block = max(1, max_lines // 10)
+        self.on_evict = on_evict
+        self.lock = threading.Lock()
+        self.styles: List[str] = []
+        self.style_ids: Dict[str, int] = {}
+        self.clear()
+    
+    def clear(self):
+        """Drop every line"""
+        with self.lock:
+            self.data = bytearray()
+            self.starts = array('Q', [0])
+            self.run_offsets = array('I')
+            self.run_styles = array('H')
+            self.run_starts = array('I', [0])
+            # Absolute number of the first line held (lines evicted so far)
+            self.base = 0
+    
+    @property
+    def line_count(self) -> int:
+        """Lines held, including the unfinished last one"""
+        return len(self.starts)
+    
+    @property
+    def end_line(self) -> int:
+        """Absolute number of the unfinished last line"""
+        return self.base + len(self.starts) - 1
+    
+    def memory_usage(self) -> int:
+        """Approximate bytes used by the stored lines"""
+        arrays = (self.starts, self.run_offsets, self.run_styles, self.run_starts)
+        return len(self.data) + sum(a.itemsize * len(a) for a in arrays)
+    
+    def _style_id(self, tag: str) -> int:
+        style = self.style_ids.get(tag)
+        if style is None:
+            style = self.style_ids[tag] = len(self.styles)
+            self.styles.append(tag)
+        return style
+    
+    def append(self, text: str, tag: str):
+        """Append text written with a tag; newlines finish lines"""
+        if not text:
+            return
+        style = self._style_id(tag)
+        with self.lock:
+            for piece in text.split('\n')[:-1]:
+                self._append_piece(piece, style)
+                self.data += b'\n'
+                self.starts.append(len(self.data))
+                self.run_starts.append(len(self.run_offsets))
+            self._append_piece(text[text.rfind('\n') + 1:], style)
+            evicted = self._evict() if len(self.starts) - 1 > self.max_lines + self.evict_block else None
+        if evicted and self.on_evict:
+            self.on_evict(evicted)
+    
+    def _append_piece(self, piece: str, style: int):
+        if not piece:
+            return
+        # New run unless the current line already ends with this style
+        if len(self.run_offsets) == self.run_starts[-1] or self.run_styles[-1] != style:
+            self.run_offsets.append(len(self.data) - self.starts[-1])
+            self.run_styles.append(style)
+        self.data += piece.encode('utf-8')
+    
+    def _evict(self) -> str:
+        # Drop the oldest complete lines down to max_lines, rebasing the offsets
+        count = len(self.starts) - 1 - self.max_lines
+        cut = self.starts[count]
+        run_cut = self.run_starts[count]
+        evicted = self.data[:cut].decode('utf-8', errors='replace')
+        
+        del self.data[:cut]
+        self.starts = array('Q', (start - cut for start in self.starts[count:]))
+        del self.run_offsets[:run_cut]
+        del self.run_styles[:run_cut]
+        self.run_starts = array('I', (start - run_cut for start in self.run_starts[count:]))
+        self.base += count
+        return evicted
+    
+    def _span(self, line: int) -> Tuple[int, int]:
+        index = line - self.base
+        start = self.starts[index]
+        end = self.starts[index + 1] - 1 if index + 1 < len(self.starts) else len(self.data)
+        return start, end
+    
+    def line_text(self, line: int) -> str:
+        """Text of an absolute line number, without the newline"""
+        with self.lock:
+            start, end = self._span(line)
+            return self.data[start:end].decode('utf-8', errors='replace')
+    
+    def line_runs(self, line: int) -> List[Tuple[str, str]]:
+        """(text, tag) runs of an absolute line number"""
+        with self.lock:
+            index = line - self.base
+            start, end = self._span(line)
+            first = self.run_starts[index]
+            last = self.run_starts[index + 1] if index + 1 < len(self.run_starts) else len(self.run_offsets)
+            runs = []
+            for run in range(first, last):
+                run_start = start + self.run_offsets[run]
+                run_end = start + self.run_offsets[run + 1] if run + 1 < last else end
+                if run_end > run_start:
+                    runs.append((self.data[run_start:run_end].decode('utf-8', errors='replace'),
+                                 self.styles[self.run_styles[run]]))
+            return runs
+    
+    def snapshot(self) -> Tuple[int, bytes]:
+        """(absolute number of the first line, copy of the text) for background readers"""
+        with self.lock:
+            return self.base, bytes(self.data)
+    
+    def has_data(self) -> bool:
+        return bool(self.data)
+    
+    def search(self, pattern: str, regex: bool = False, ignore_case: bool = False,
+               should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (line number, line) for held lines matching pattern; numbers start at 1"""
+        base, data = self.snapshot()
+        f = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='replace', newline='')
+        yield from search_stream(f, compile_pattern(pattern, regex, ignore_case),
+                                 should_stop=should_stop, first_line=base + 1)
+    
+    def export(self, destination, chunk_size: int = 1024 * 1024):
+        """Write the held lines into an open text file"""
+        _, data = self.snapshot()
+        f = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='replace', newline='')
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            destination.write(chunk)
\ No newline at end of file
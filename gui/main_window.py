@@ -3,21 +3,51 @@ from tkinter import ttk, messagebox, filedialog
 from typing import Dict, Any, Optional
 import json
 import os
+import threading
+import uuid
 
 from .connection_manager import ConnectionManager
 from .command_manager import CommandManager
 from .terminal_frame import TerminalFrame
-from models.database import DatabaseManager
+from .terminal_tabs import TerminalTabs, TerminalTab
+from .replay_viewer import ReplayViewer
+from models.database import get_db_manager
+from models.history import CommandHistory
+from models.audit import AuditLog
+from models.backup import BackupScheduler, restore_database
 from ssh.ssh_client import SSHClient
+from ssh.session_pool import SessionPool
+from ssh.host_facts import HostFactsCollector
+from ssh.completion import CompletionEngine
+from utils.config import config_manager, app_paths
+from utils.dispatcher import command_dispatcher, search_dispatcher
+from utils.scrollback import prune_archives
 
 
 class MainWindow(tk.Tk):
     def __init__(self):
         super().__init__()
         
-        self.db_manager = DatabaseManager()
-        self.ssh_client: Optional[SSHClient] = None
-        self.current_connection: Optional[Dict[str, Any]] = None
+        self.db_manager = get_db_manager()
+        prune_archives(config_manager.get('terminal.archive_max_age_days', 7))
+        self.host_facts = HostFactsCollector(self.db_manager, ttl=config_manager.get('ssh.facts_ttl', 3600))
+        self.completer = CompletionEngine(ttl=config_manager.get('ssh.completion_ttl', 300))
+        self.completer.add_snippets(self.db_manager.get_all_commands())
+        self.history = CommandHistory(self.db_manager)
+        threading.Thread(target=self.seed_completion, daemon=True).start()
+        self.audit_log = AuditLog(self.db_manager)
+        # Open transports are mirrored into the database for the admin stats, under an id of
+        # this process; rows left behind by an app that crashed have expired and are deleted
+        self.session_owner = uuid.uuid4().hex
+        self.db_manager.clear_ssh_sessions(self.session_owner)
+        self.session_pool = SessionPool(
+            on_command=self.audit_log.record,
+            on_sessions_changed=lambda key, users: self.db_manager.set_ssh_session(self.session_owner, *key, users))
+        self.closing = threading.Event()
+        threading.Thread(target=self.heartbeat_sessions, daemon=True).start()
+        self.backups = BackupScheduler(self.db_manager.db_path)
+        if config_manager.get('backup.enabled', True):
+            self.backups.start()
         
         self.setup_window()
         self.setup_ui()
@@ -89,7 +119,8 @@ class MainWindow(tk.Tk):
         connections_frame = ttk.Frame(self.left_notebook)
         self.left_notebook.add(connections_frame, text="Connections")
         
-        self.connection_manager = ConnectionManager(connections_frame, self.on_connection_select)
+        self.connection_manager = ConnectionManager(connections_frame, self.on_connection_select,
+                                                    on_connection_moved=self.on_connection_moved)
         self.connection_manager.pack(fill=tk.BOTH, expand=True)
         
         # Groups tab (new)
@@ -102,7 +133,8 @@ class MainWindow(tk.Tk):
         commands_frame = ttk.Frame(self.left_notebook)
         self.left_notebook.add(commands_frame, text="Snippets")
         
-        self.command_manager = CommandManager(commands_frame, self.on_snippet_select)
+        self.command_manager = CommandManager(commands_frame, self.on_snippet_select,
+                                              on_snippet_saved=lambda snippet: self.completer.add_snippets([snippet]))
         self.command_manager.pack(fill=tk.BOTH, expand=True)
         
     def setup_groups_tab(self, parent):
@@ -141,10 +173,34 @@ class MainWindow(tk.Tk):
         self.load_groups()
         
     def setup_right_panel(self, parent):
-        """Setup the right panel with terminal"""
-        # Terminal frame
-        self.terminal_frame = TerminalFrame(parent, self.execute_ssh_command)
-        self.terminal_frame.pack(fill=tk.BOTH, expand=True)
+        """Setup the right panel with terminal tabs"""
+        self.terminal_tabs = TerminalTabs(parent, self.session_pool, self.completer, self.host_facts, self.history,
+                                          on_tab_changed=self.on_tab_changed)
+        self.terminal_tabs.pack(fill=tk.BOTH, expand=True)
+        self.bind("<Control-w>", lambda event: self.close_tab())
+    
+    @property
+    def active_tab(self) -> Optional[TerminalTab]:
+        """The terminal tab that is currently shown"""
+        return self.terminal_tabs.active_tab()
+    
+    @property
+    def ssh_client(self) -> Optional[SSHClient]:
+        """SSH client of the active tab"""
+        tab = self.active_tab
+        return tab.ssh_client if tab else None
+    
+    @property
+    def current_connection(self) -> Optional[Dict[str, Any]]:
+        """Connection of the active tab"""
+        tab = self.active_tab
+        return tab.connection if tab else None
+    
+    @property
+    def terminal_frame(self) -> Optional[TerminalFrame]:
+        """Line-oriented terminal of the active tab, if it is one"""
+        tab = self.active_tab
+        return tab.view if tab and not tab.is_shell else None
         
     def setup_menu(self):
         """Setup the menu bar"""
@@ -156,10 +212,14 @@ class MainWindow(tk.Tk):
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="New Connection", command=self.new_connection)
         file_menu.add_command(label="New Group", command=self.new_group)
+        file_menu.add_command(label="Close Tab", command=self.close_tab, accelerator="Ctrl+W")
         file_menu.add_separator()
         file_menu.add_command(label="Import Connections", command=self.import_connections)
         file_menu.add_command(label="Export Connections", command=self.export_connections)
         file_menu.add_separator()
+        file_menu.add_command(label="Back Up Database", command=self.backup_database)
+        file_menu.add_command(label="Restore Database...", command=self.restore_database)
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.quit)
         
         # Edit menu
@@ -171,8 +231,14 @@ class MainWindow(tk.Tk):
         # View menu
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Interactive Shell", command=self.open_interactive_shell)
+        view_menu.add_separator()
         view_menu.add_command(label="Clear Terminal", command=self.clear_terminal)
+        view_menu.add_command(label="Refresh Host Facts", command=self.refresh_host_facts)
         view_menu.add_command(label="Save Terminal Output", command=self.save_terminal_output)
+        view_menu.add_separator()
+        view_menu.add_command(label="Start/Stop Recording", command=self.toggle_recording)
+        view_menu.add_command(label="Replay Recording...", command=self.replay_recording)
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -181,45 +247,59 @@ class MainWindow(tk.Tk):
         help_menu.add_command(label="Documentation", command=self.show_documentation)
         
     def on_connection_select(self, connection: Dict[str, Any]):
-        """Handle connection selection"""
-        self.current_connection = connection
-        self.terminal_frame.set_connection(connection)
+        """Handle connection selection - open it in a new terminal tab"""
+        tab = self.terminal_tabs.open_terminal(connection)
         self.status_label.config(text=f"Connected to: {connection['name']}", foreground="green")
         
         # Connect SSH
-        self.connect_ssh(connection)
-        
+        self.connect_ssh(tab)
+    
+    def on_connection_moved(self, connection_id: int):
+        """A connection now points at another machine: forget what is known about the old one"""
+        self.host_facts.invalidate(connection_id)
+        self.completer.invalidate(connection_id)
+        
+    def on_tab_changed(self, tab: Optional[TerminalTab]):
+        """Reflect the active tab in the status bar"""
+        if tab and tab.connection:
+            state = "SSH Connected" if tab.ssh_client and tab.ssh_client.is_connected() else "Disconnected"
+            self.status_label.config(text=f"{state}: {tab.connection['name']}",
+                                     foreground="green" if tab.ssh_client else "red")
+        else:
+            self.status_label.config(text="Ready", foreground="green")
+    
     def on_snippet_select(self, snippet: Dict[str, Any]):
         """Handle command snippet selection"""
-        if self.current_connection:
-            # Insert snippet into terminal
-            self.terminal_frame.write_output(f"\n# Snippet: {snippet['name']}\n", "yellow")
-            self.terminal_frame.write_output(f"{snippet['command']}\n", "cyan")
-            # Execute the snippet
-            self.execute_ssh_command(snippet['command'])
+        tab = self.active_tab
+        if tab and tab.connection:
+            if self.terminal_frame:
+                # Show snippet in terminal
+                self.terminal_frame.write_output(f"\n# Snippet: {snippet['name']}\n", "yellow")
+            # Execute the snippet in the active session
+            tab.run_snippet(snippet['command'])
         else:
             messagebox.showwarning("No Connection", "Please select a connection first.")
             
-    def connect_ssh(self, connection: Dict[str, Any]):
-        """Connect to SSH server"""
+    def connect_ssh(self, tab: TerminalTab):
+        """Connect a terminal tab to its SSH server (transports are shared between tabs)"""
+        connection = tab.connection
         try:
-            self.ssh_client = SSHClient()
-            self.ssh_client.connect(connection)
+            self.terminal_tabs.connect(tab)
             self.status_label.config(text=f"SSH Connected: {connection['name']}", foreground="green")
         except Exception as e:
             messagebox.showerror("Connection Error", f"Failed to connect: {str(e)}")
             self.status_label.config(text="Connection Failed", foreground="red")
             
     def execute_ssh_command(self, command: str) -> str:
-        """Execute SSH command and return result"""
-        if not self.ssh_client:
+        """Execute SSH command in the active tab and return result"""
+        tab = self.active_tab
+        if not tab:
             return "Error: No SSH connection"
-            
-        try:
-            result = self.ssh_client.execute_command(command)
-            return result
-        except Exception as e:
-            return f"Error: {str(e)}"
+        return tab.execute(command)
+    
+    def close_tab(self):
+        """Close the active terminal tab"""
+        self.terminal_tabs.close_tab()
             
     def new_connection(self):
         """Open new connection dialog"""
@@ -286,18 +366,71 @@ class MainWindow(tk.Tk):
     def open_preferences(self):
         """Open preferences dialog"""
         messagebox.showinfo("Preferences", "Preferences dialog will be implemented.")
+    
+    def seed_completion(self):
+        """Offer persisted history for completion once it is loaded (runs in a thread at startup)"""
+        self.history.loaded.wait()
+        for command in self.history.recent():
+            self.completer.add_history(command)
+    
+    def heartbeat_sessions(self):
+        """Report the open transports again every heartbeat so their rows do not expire (runs in a thread)"""
+        interval = config_manager.get('ssh.session_heartbeat', 60)
+        while not self.closing.wait(interval):
+            self.session_pool.report_all()
+    
+    def refresh_host_facts(self):
+        """Collect the active tab's host facts again"""
+        self.terminal_tabs.refresh_host_facts()
         
     def clear_terminal(self):
         """Clear the terminal"""
-        self.terminal_frame.clear_terminal()
+        if self.terminal_frame:
+            self.terminal_frame.clear_terminal()
+        
+    def toggle_recording(self):
+        """Start or stop recording the active tab"""
+        tab = self.active_tab
+        if not tab:
+            return
+        if tab.view.recorder:
+            path = tab.view.stop_recording()
+            self.status_label.config(text=f"Recording saved: {os.path.basename(path)}", foreground="green")
+        else:
+            title = tab.connection['name'] if tab.connection else None
+            recorder = tab.view.start_recording(title=title)
+            self.status_label.config(text=f"Recording to {recorder.path.name}", foreground="red")
+    
+    def replay_recording(self):
+        """Open a recording in the replay viewer"""
+        filename = filedialog.askopenfilename(
+            initialdir=str(app_paths.recordings_dir),
+            filetypes=[("Asciicast recordings", "*.cast *.cast.gz"), ("All files", "*.*")]
+        )
+        if filename:
+            try:
+                ReplayViewer(self, filename)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Replay Error", f"Failed to open recording: {str(e)}")
+    
+    def open_interactive_shell(self):
+        """Open a full-screen capable terminal tab (top, vim, less...) for the current connection"""
+        if not self.ssh_client or not self.ssh_client.is_connected():
+            messagebox.showwarning("No Connection", "Please select a connection first.")
+            return
         
+        try:
+            self.terminal_tabs.open_shell(self.current_connection)
+        except Exception as e:
+            messagebox.showerror("Shell Error", f"Failed to open shell: {str(e)}")
+    
     def save_terminal_output(self):
         """Save terminal output to file"""
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
         )
-        if filename:
+        if filename and self.terminal_frame:
             self.terminal_frame.save_output(filename)
             
     def import_connections(self):
@@ -309,9 +442,8 @@ class MainWindow(tk.Tk):
             try:
                 with open(filename, 'r') as f:
                     connections = json.load(f)
-                # Import connections
-                for conn in connections:
-                    self.db_manager.add_connection(conn)
+                # Import connections in one transaction
+                self.db_manager.add_connections_bulk(connections)
                 self.connection_manager.load_connections()
                 messagebox.showinfo("Import", f"Imported {len(connections)} connections.")
             except Exception as e:
@@ -332,6 +464,48 @@ class MainWindow(tk.Tk):
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export: {str(e)}")
                 
+    def backup_database(self):
+        """Take a backup in the background"""
+        def run():
+            try:
+                path = self.backups.run_now()
+                self.after(0, lambda: messagebox.showinfo("Backup", f"Database backed up to:\n{path}"))
+            except Exception as e:
+                self.after(0, lambda: messagebox.showerror("Backup Error", f"Failed to back up: {str(e)}"))
+        threading.Thread(target=run, daemon=True).start()
+    
+    def restore_database(self):
+        """Replace the database with a backup"""
+        filename = filedialog.askopenfilename(
+            initialdir=str(app_paths.backups_dir),
+            filetypes=[("Database backups", "*.db *.db.gz"), ("All files", "*.*")]
+        )
+        if not filename or not messagebox.askyesno(
+                "Restore", "Replace all connections, snippets and groups with this backup?\n"
+                           "The current database is backed up first."):
+            return
+        try:
+            # Pending history and audit entries go into the safety backup, not the restored database
+            self.history.flush()
+            self.audit_log.flush()
+            restore_database(filename, self.db_manager.db_path)
+            # The backup may come from an older schema
+            self.db_manager.reload()
+            self.db_manager.clear_ssh_sessions()
+            self.session_pool.report_all()
+            self.history.reload()
+            self.host_facts.clear()
+            self.completer.reset()
+            self.completer.invalidate()
+            self.completer.add_snippets(self.db_manager.get_all_commands())
+            self.seed_completion()
+            self.connection_manager.load_connections()
+            self.command_manager.load_commands()
+            self.load_groups()
+            messagebox.showinfo("Restore", "Database restored.")
+        except Exception as e:
+            messagebox.showerror("Restore Error", f"Failed to restore: {str(e)}")
+    
     def show_about(self):
         """Show about dialog"""
         messagebox.showinfo("About", "SSH Client v1.0\nProfessional SSH terminal client")
@@ -342,10 +516,14 @@ class MainWindow(tk.Tk):
         
     def on_closing(self):
         """Handle window closing"""
-        if self.ssh_client:
-            self.ssh_client.close()
-        if hasattr(self.terminal_frame, 'cleanup'):
-            self.terminal_frame.cleanup()
+        self.closing.set()
+        self.terminal_tabs.close_all()
+        self.session_pool.close_all()
+        command_dispatcher.shutdown()
+        search_dispatcher.shutdown()
+        self.history.close()
+        self.audit_log.close()
+        self.backups.stop()
         self.db_manager.close()
         self.quit()
 
@@ -412,8 +590,7 @@ class GroupDialog:
         self.result = {
             'name': name,
             'description': description,
-            'members': members,
-            'connections': []
+            'members': members
         }
         
         self.dialog.destroy()
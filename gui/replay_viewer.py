@@ -0,0 +1,224 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gui.screen import Screen
+from gui.screen_view import ScreenDisplay
+from utils.recording import RecordingReader
+
+
+class ReplayViewer(tk.Toplevel):
+    """Plays back an asciicast recording with pause, speed and seek.
+
+    Output is fed through the same Screen model a shell tab uses, so cursor
+    movement, erases, scroll regions and the alternate screen replay as they
+    were shown. The screen is snapshotted at the start of indexed batches; a
+    seek restores the nearest snapshot before the target (or starts over) and
+    feeds the recording from there, so what is shown is always what was on
+    screen at that time.
+    """
+    
+    FRAME_MS = 16
+    SPEEDS = ("0.5x", "1x", "2x", "4x", "8x")
+    # At most this many screen snapshots are kept for seeking back
+    MAX_SNAPSHOTS = 200
+    
+    def __init__(self, parent, path: str):
+        super().__init__(parent)
+        self.reader = RecordingReader(path)
+        self.duration = self.reader.duration()
+        self.title(f"Replay - {self.reader.header.get('title') or path}")
+        
+        # Playback state: events of the current batch, batches from the last restart
+        self.batches: Optional[Iterator[Tuple[int, List[List]]]] = None
+        self.batch: List[List] = []
+        self.batch_offset = 0
+        self.snapshots: Dict[int, Screen] = {}
+        self.snapshot_every = max(1, len(self.reader.index) // self.MAX_SNAPSHOTS)
+        self.position = 0.0
+        self.playing = False
+        self.play_anchor = 0.0
+        self.play_base = 0.0
+        self.speed = 1.0
+        self.tick_job = None
+        
+        self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.seek(0.0)
+    
+    def setup_ui(self):
+        """Setup the screen and the playback controls"""
+        controls = ttk.Frame(self)
+        controls.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        
+        self.play_button = ttk.Button(controls, text="Play", width=6, command=self.toggle)
+        self.play_button.pack(side=tk.LEFT)
+        
+        self.position_var = tk.DoubleVar(value=0.0)
+        self.scale = ttk.Scale(controls, from_=0.0, to=max(self.duration, 0.001), variable=self.position_var,
+                               command=lambda value: self.update_time_label(float(value)))
+        self.scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.scale.bind("<ButtonRelease-1>", lambda event: self.seek(self.position_var.get()))
+        
+        self.time_label = ttk.Label(controls, text="", width=16)
+        self.time_label.pack(side=tk.LEFT)
+        
+        self.speed_var = tk.StringVar(value="1x")
+        speed = ttk.Combobox(controls, textvariable=self.speed_var, values=self.SPEEDS, width=5, state="readonly")
+        speed.pack(side=tk.LEFT, padx=(5, 0))
+        speed.bind("<<ComboboxSelected>>", lambda event: self.set_speed(float(self.speed_var.get()[:-1])))
+        
+        self.display = ScreenDisplay(self, Screen(self.reader.height, self.reader.width))
+        self.display.pack(fill=tk.BOTH, expand=True)
+        self.fit_display()
+        
+        self.bind("<space>", lambda event: self.toggle())
+    
+    def fit_display(self):
+        """Size the widget to the recorded terminal"""
+        self.display.text.configure(width=self.display.screen.cols, height=self.display.screen.rows)
+    
+    def seek(self, target: float):
+        """Show the screen as it was at target"""
+        target = min(max(target, 0.0), self.duration)
+        if self.batches is None or target < self.position:
+            self.restart(target)
+        self.feed_until(target)
+        self.display.redraw()
+        
+        self.position = target
+        self.play_base = target
+        self.play_anchor = time.monotonic()
+        self.position_var.set(target)
+        self.update_time_label(target)
+    
+    def restart(self, target: float):
+        """Continue from the newest snapshot at or before target, or from the beginning"""
+        self.close_events()
+        start = self.reader.position(target)
+        while start > 0 and start not in self.snapshots:
+            start -= 1
+        screen = self.snapshots[start].copy() if start in self.snapshots else Screen(self.reader.height, self.reader.width)
+        self.set_screen(screen)
+        self.batches = self.reader.batches(start)
+    
+    def set_screen(self, screen: Screen):
+        self.display.screen = screen
+        self.fit_display()
+        self.display.rebuild_rows()
+    
+    def feed_until(self, target: float) -> bool:
+        """Apply every event up to target to the screen; False once the recording ended"""
+        screen = self.display.screen
+        chunks = []
+        while True:
+            if self.batch_offset >= len(self.batch):
+                if chunks:
+                    screen.feed("".join(chunks))
+                    chunks = []
+                if not self.next_batch():
+                    return False
+            event = self.batch[self.batch_offset]
+            if event[0] > target:
+                break
+            self.batch_offset += 1
+            if event[1] == "o":
+                chunks.append(event[2])
+            elif event[1] == "r":
+                if chunks:
+                    screen.feed("".join(chunks))
+                    chunks = []
+                self.resize(event[2])
+        if chunks:
+            screen.feed("".join(chunks))
+        return True
+    
+    def next_batch(self) -> bool:
+        """Load the next batch, snapshotting the screen before it is applied"""
+        for position, events in self.batches or ():
+            if position % self.snapshot_every == 0 and position not in self.snapshots:
+                self.snapshots[position] = self.display.screen.copy()
+            self.batch, self.batch_offset = events, 0
+            if events:
+                return True
+        self.batch, self.batch_offset = [], 0
+        return False
+    
+    def resize(self, size: str):
+        """Apply a recorded "<cols>x<rows>" size change"""
+        try:
+            cols, rows = (int(value) for value in size.split("x"))
+        except ValueError:
+            return
+        self.display.screen.resize(rows, cols)
+        self.fit_display()
+        self.display.rebuild_rows()
+    
+    def toggle(self):
+        """Play or pause"""
+        if self.playing:
+            self.pause()
+        else:
+            if self.position >= self.duration:
+                self.seek(0.0)
+            self.play()
+    
+    def play(self):
+        self.playing = True
+        self.play_base = self.position
+        self.play_anchor = time.monotonic()
+        self.play_button.config(text="Pause")
+        self.schedule_tick()
+    
+    def pause(self):
+        self.playing = False
+        self.play_button.config(text="Play")
+        if self.tick_job:
+            self.after_cancel(self.tick_job)
+            self.tick_job = None
+    
+    def set_speed(self, speed: float):
+        # Re-anchor so the position does not jump
+        self.play_base = self.position
+        self.play_anchor = time.monotonic()
+        self.speed = speed
+    
+    def schedule_tick(self):
+        if self.tick_job is None:
+            self.tick_job = self.after(self.FRAME_MS, self.tick)
+    
+    def tick(self):
+        """Advance playback by the time elapsed since the last frame"""
+        self.tick_job = None
+        if not self.playing:
+            return
+        self.position = min(self.duration, self.play_base + (time.monotonic() - self.play_anchor) * self.speed)
+        more = self.feed_until(self.position) and self.position < self.duration
+        self.display.redraw()
+        self.position_var.set(self.position)
+        self.update_time_label(self.position)
+        if more:
+            self.schedule_tick()
+        else:
+            self.pause()
+    
+    def update_time_label(self, position: float):
+        self.time_label.config(text=f"{self.format_time(position)} / {self.format_time(self.duration)}")
+    
+    @staticmethod
+    def format_time(seconds: float) -> str:
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+    
+    def close_events(self):
+        if self.batches is not None:
+            self.batches.close()
+            self.batches = None
+        self.batch, self.batch_offset = [], 0
+    
+    def close(self):
+        self.pause()
+        self.close_events()
+        self.destroy()
\ No newline at end of file
@@ -0,0 +1,415 @@
+"""
+Screen-model terminal emulation core (cell grid, cursor, scroll regions, alternate screen)
+"""
+
+import copy
+import re
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from gui.ansi import (AnsiTokenizer, Style, DEFAULT_STYLE, TEXT, CSI, OSC, ESC, CONTROL,
+                      apply_sgr, parse_params)
+
+_TEXT_CONTROLS_RE = re.compile(r'([\t\n])')
+
+TAB_WIDTH = 8
+
+
+class Screen:
+    """VT100/xterm subset emulator that records which rows changed"""
+    
+    def __init__(self, rows: int = 24, cols: int = 80, on_response: Optional[Callable[[str], None]] = None):
+        self.rows = rows
+        self.cols = cols
+        self.on_response = on_response
+        self.lock = threading.RLock()
+        self.tokenizer = AnsiTokenizer()
+        self.title = ""
+        self.reset()
+    
+    def reset(self):
+        """Full reset (RIS)"""
+        with self.lock:
+            self.style = DEFAULT_STYLE
+            self.cursor_x = 0
+            self.cursor_y = 0
+            self.wrap_pending = False
+            self.top = 0
+            self.bottom = self.rows - 1
+            self.autowrap = True
+            self.cursor_visible = True
+            self.application_cursor = False
+            self.bracketed_paste = False
+            self.saved_cursor: Tuple[int, int, Style] = (0, 0, DEFAULT_STYLE)
+            self.alternate = False
+            self._main_buffer = None
+            self.chars: List[List[str]] = [self._blank_chars() for _ in range(self.rows)]
+            self.styles: List[List[Style]] = [self._blank_styles() for _ in range(self.rows)]
+            self.dirty: Set[int] = set(range(self.rows))
+    
+    def copy(self) -> "Screen":
+        """Independent copy of the whole terminal state, e.g. to rewind a replay"""
+        with self.lock:
+            clone = copy.copy(self)
+            clone.lock = threading.RLock()
+            clone.tokenizer = copy.copy(self.tokenizer)
+            clone.chars = [row[:] for row in self.chars]
+            clone.styles = [row[:] for row in self.styles]
+            if self._main_buffer:
+                chars, styles = self._main_buffer
+                clone._main_buffer = ([row[:] for row in chars], [row[:] for row in styles])
+            clone.dirty = set(range(self.rows))
+            return clone
+    
+    # -- Input -----------------------------------------------------------
+    
+    def feed(self, data: str):
+        """Apply a chunk of output from the remote program"""
+        with self.lock:
+            for token in self.tokenizer.feed(data):
+                kind = token[0]
+                if kind == TEXT:
+                    self._text(token[1])
+                elif kind == CSI:
+                    self._csi(token[1], token[2], token[3])
+                elif kind == CONTROL:
+                    self._control(token[1])
+                elif kind == ESC:
+                    self._escape(token[1])
+                elif kind == OSC:
+                    code, _, value = token[1].partition(';')
+                    if code in ('0', '2'):
+                        self.title = value
+    
+    def _text(self, text: str):
+        for part in _TEXT_CONTROLS_RE.split(text):
+            if part == '\n':
+                self.linefeed()
+            elif part == '\t':
+                self.wrap_pending = False
+                self.cursor_x = min(self.cols - 1, (self.cursor_x // TAB_WIDTH + 1) * TAB_WIDTH)
+            elif part:
+                self.draw(part)
+    
+    def draw(self, text: str):
+        """Put printable characters at the cursor, wrapping at the right margin"""
+        style = self.style
+        while text:
+            if self.wrap_pending and self.autowrap:
+                self.cursor_x = 0
+                self.linefeed()
+            self.wrap_pending = False
+            
+            x, y = self.cursor_x, self.cursor_y
+            part = text[:self.cols - x]
+            text = text[len(part):]
+            end = x + len(part)
+            self.chars[y][x:end] = part
+            self.styles[y][x:end] = [style] * len(part)
+            self.dirty.add(y)
+            
+            if end >= self.cols:
+                self.cursor_x = self.cols - 1
+                self.wrap_pending = True
+                if not self.autowrap:
+                    # Without autowrap the rest overwrites the last column
+                    text = ''
+            else:
+                self.cursor_x = end
+    
+    def _control(self, char: str):
+        if char == '\r':
+            self.cursor_x = 0
+            self.wrap_pending = False
+        elif char in '\x0b\x0c':
+            self.linefeed()
+        elif char == '\b':
+            self.wrap_pending = False
+            self.cursor_x = max(0, self.cursor_x - 1)
+        # BEL, SO/SI and the rest are ignored
+    
+    def _escape(self, sequence: str):
+        if sequence == '7':
+            self.save_cursor()
+        elif sequence == '8':
+            self.restore_cursor()
+        elif sequence == 'D':
+            self.linefeed()
+        elif sequence == 'E':
+            self.cursor_x = 0
+            self.linefeed()
+        elif sequence == 'M':
+            self.reverse_index()
+        elif sequence == 'c':
+            self.reset()
+    
+    def _csi(self, params: str, intermediates: str, final: str):
+        if intermediates:
+            return
+        private = params.startswith('?')
+        if params.startswith(('>', '=')):
+            # Secondary device attributes and friends
+            if final == 'c' and self.on_response:
+                self.on_response("\x1b[>0;0;0c")
+            return
+        
+        if final == 'm':
+            self.style = apply_sgr(self.style, params)
+            return
+        if final in 'hl':
+            self._set_modes(parse_params(params), final == 'h', private)
+            return
+        
+        args = parse_params(params, 0)
+        n = max(args[0], 1)
+        self.wrap_pending = False
+        
+        if final == 'A':
+            self.cursor_y = max(self.top if self.cursor_y >= self.top else 0, self.cursor_y - n)
+        elif final == 'B':
+            self.cursor_y = min(self.bottom if self.cursor_y <= self.bottom else self.rows - 1, self.cursor_y + n)
+        elif final == 'C':
+            self.cursor_x = min(self.cols - 1, self.cursor_x + n)
+        elif final == 'D':
+            self.cursor_x = max(0, self.cursor_x - n)
+        elif final == 'E':
+            self.cursor_x = 0
+            self.cursor_y = min(self.rows - 1, self.cursor_y + n)
+        elif final == 'F':
+            self.cursor_x = 0
+            self.cursor_y = max(0, self.cursor_y - n)
+        elif final in 'G`':
+            self.cursor_x = min(self.cols - 1, n - 1)
+        elif final == 'd':
+            self.cursor_y = min(self.rows - 1, n - 1)
+        elif final in 'Hf':
+            row = max(args[0], 1)
+            col = max(args[1], 1) if len(args) > 1 else 1
+            self.cursor_y = min(self.rows - 1, row - 1)
+            self.cursor_x = min(self.cols - 1, col - 1)
+        elif final == 'J':
+            self.erase_display(args[0])
+        elif final == 'K':
+            self.erase_line(args[0])
+        elif final == 'X':
+            self._erase(self.cursor_y, self.cursor_x, min(self.cols, self.cursor_x + n))
+        elif final == '@':
+            self._insert_chars(n)
+        elif final == 'P':
+            self._delete_chars(n)
+        elif final == 'L':
+            if self.top <= self.cursor_y <= self.bottom:
+                self._scroll_down(n, self.cursor_y)
+        elif final == 'M':
+            if self.top <= self.cursor_y <= self.bottom:
+                self._scroll_up(n, self.cursor_y)
+        elif final == 'S':
+            self._scroll_up(n, self.top)
+        elif final == 'T':
+            self._scroll_down(n, self.top)
+        elif final == 'r':
+            top = max(args[0], 1) - 1
+            bottom = (args[1] if len(args) > 1 and args[1] else self.rows) - 1
+            if top < bottom < self.rows:
+                self.top, self.bottom = top, bottom
+                self.cursor_x, self.cursor_y = 0, 0
+        elif final == 's':
+            self.save_cursor()
+        elif final == 'u':
+            self.restore_cursor()
+        elif final == 'n' and self.on_response:
+            if args[0] == 6:
+                self.on_response(f"\x1b[{self.cursor_y + 1};{self.cursor_x + 1}R")
+            elif args[0] == 5:
+                self.on_response("\x1b[0n")
+        elif final == 'c' and self.on_response and not private:
+            self.on_response("\x1b[?1;2c")
+    
+    def _set_modes(self, modes: List[int], enabled: bool, private: bool):
+        if not private:
+            return
+        for mode in modes:
+            if mode == 1:
+                self.application_cursor = enabled
+            elif mode == 7:
+                self.autowrap = enabled
+            elif mode == 25:
+                self.cursor_visible = enabled
+                self.dirty.add(self.cursor_y)
+            elif mode == 2004:
+                self.bracketed_paste = enabled
+            elif mode in (47, 1047, 1049):
+                if mode == 1049 and enabled:
+                    self.save_cursor()
+                self.set_alternate(enabled)
+                if mode == 1049 and not enabled:
+                    self.restore_cursor()
+    
+    # -- Operations --------------------------------------------------------
+    
+    def linefeed(self):
+        """Move down one row, scrolling the region at its bottom"""
+        if self.cursor_y == self.bottom:
+            self._scroll_up(1, self.top)
+        elif self.cursor_y < self.rows - 1:
+            self.cursor_y += 1
+    
+    def reverse_index(self):
+        """Move up one row, scrolling the region at its top"""
+        if self.cursor_y == self.top:
+            self._scroll_down(1, self.top)
+        elif self.cursor_y > 0:
+            self.cursor_y -= 1
+    
+    def save_cursor(self):
+        self.saved_cursor = (self.cursor_x, self.cursor_y, self.style)
+    
+    def restore_cursor(self):
+        x, y, self.style = self.saved_cursor
+        self.cursor_x = min(x, self.cols - 1)
+        self.cursor_y = min(y, self.rows - 1)
+        self.wrap_pending = False
+    
+    def set_alternate(self, enabled: bool):
+        """Switch between the main and the alternate screen buffer"""
+        if enabled == self.alternate:
+            return
+        if enabled:
+            self._main_buffer = (self.chars, self.styles)
+            self.chars = [self._blank_chars() for _ in range(self.rows)]
+            self.styles = [self._blank_styles() for _ in range(self.rows)]
+        else:
+            self.chars, self.styles = self._main_buffer
+            self._main_buffer = None
+        self.alternate = enabled
+        self.dirty.update(range(self.rows))
+    
+    def erase_display(self, mode: int):
+        if mode == 0:
+            self.erase_line(0)
+            for y in range(self.cursor_y + 1, self.rows):
+                self._erase(y, 0, self.cols)
+        elif mode == 1:
+            self.erase_line(1)
+            for y in range(0, self.cursor_y):
+                self._erase(y, 0, self.cols)
+        elif mode in (2, 3):
+            for y in range(self.rows):
+                self._erase(y, 0, self.cols)
+    
+    def erase_line(self, mode: int):
+        if mode == 0:
+            self._erase(self.cursor_y, self.cursor_x, self.cols)
+        elif mode == 1:
+            self._erase(self.cursor_y, 0, self.cursor_x + 1)
+        elif mode == 2:
+            self._erase(self.cursor_y, 0, self.cols)
+    
+    def _erase(self, y: int, start: int, end: int):
+        if start >= end:
+            return
+        blank = self._erase_style()
+        self.chars[y][start:end] = ' ' * (end - start)
+        self.styles[y][start:end] = [blank] * (end - start)
+        self.dirty.add(y)
+    
+    def _insert_chars(self, n: int):
+        x, y = self.cursor_x, self.cursor_y
+        n = min(n, self.cols - x)
+        row, styles = self.chars[y], self.styles[y]
+        row[x:x] = ' ' * n
+        styles[x:x] = [self._erase_style()] * n
+        del row[self.cols:], styles[self.cols:]
+        self.dirty.add(y)
+    
+    def _delete_chars(self, n: int):
+        x, y = self.cursor_x, self.cursor_y
+        n = min(n, self.cols - x)
+        row, styles = self.chars[y], self.styles[y]
+        del row[x:x + n], styles[x:x + n]
+        row.extend(' ' * n)
+        styles.extend([self._erase_style()] * n)
+        self.dirty.add(y)
+    
+    def _scroll_up(self, n: int, top: int):
+        """Scroll rows top..bottom up by n, blank rows appear at the bottom"""
+        n = min(n, self.bottom - top + 1)
+        for _ in range(n):
+            del self.chars[top], self.styles[top]
+            self.chars.insert(self.bottom, self._blank_chars())
+            self.styles.insert(self.bottom, self._blank_styles())
+        self.dirty.update(range(top, self.bottom + 1))
+    
+    def _scroll_down(self, n: int, top: int):
+        """Scroll rows top..bottom down by n, blank rows appear at the top"""
+        n = min(n, self.bottom - top + 1)
+        for _ in range(n):
+            del self.chars[self.bottom], self.styles[self.bottom]
+            self.chars.insert(top, self._blank_chars())
+            self.styles.insert(top, self._blank_styles())
+        self.dirty.update(range(top, self.bottom + 1))
+    
+    def resize(self, rows: int, cols: int):
+        """Change the grid size, keeping the content near the cursor"""
+        with self.lock:
+            if rows == self.rows and cols == self.cols:
+                return
+            buffers = [(self.chars, self.styles)]
+            if self._main_buffer:
+                buffers.append(self._main_buffer)
+            
+            # Drop rows from the top when shrinking so the cursor row survives
+            shift = max(0, self.cursor_y - rows + 1)
+            for chars, styles in buffers:
+                del chars[:shift], styles[:shift]
+                del chars[rows:], styles[rows:]
+                for row, row_styles in zip(chars, styles):
+                    del row[cols:], row_styles[cols:]
+                    row.extend(' ' * (cols - len(row)))
+                    row_styles.extend([DEFAULT_STYLE] * (cols - len(row_styles)))
+                while len(chars) < rows:
+                    chars.append([' '] * cols)
+                    styles.append([DEFAULT_STYLE] * cols)
+            
+            self.rows, self.cols = rows, cols
+            self.cursor_y = min(self.cursor_y - shift, rows - 1)
+            self.cursor_x = min(self.cursor_x, cols - 1)
+            self.top, self.bottom = 0, rows - 1
+            self.wrap_pending = False
+            self.dirty = set(range(rows))
+    
+    # -- Output for views --------------------------------------------------
+    
+    def take_dirty(self) -> List[int]:
+        """Rows changed since the last call"""
+        with self.lock:
+            dirty = sorted(y for y in self.dirty if y < self.rows)
+            self.dirty = set()
+            return dirty
+    
+    def line_runs(self, y: int) -> List[Tuple[str, Style]]:
+        """Text of a row split into runs of equal style"""
+        with self.lock:
+            chars, styles = self.chars[y], self.styles[y]
+            runs: List[Tuple[str, Style]] = []
+            start = 0
+            for x in range(1, self.cols + 1):
+                if x == self.cols or styles[x] != styles[start]:
+                    runs.append((''.join(chars[start:x]), styles[start]))
+                    start = x
+            return runs
+    
+    def display(self) -> List[str]:
+        """Plain text of every row"""
+        with self.lock:
+            return [''.join(row) for row in self.chars]
+    
+    def _blank_chars(self) -> List[str]:
+        return [' '] * self.cols
+    
+    def _blank_styles(self) -> List[Style]:
+        return [DEFAULT_STYLE] * self.cols
+    
+    def _erase_style(self) -> Style:
+        # Erased cells keep the current background color (BCE)
+        return Style(bg=self.style.bg) if self.style.bg is not None else DEFAULT_STYLE
@@ -0,0 +1,231 @@
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+from typing import Callable, List, Optional
+
+from gui.ansi import StyleTags, Style
+from gui.screen import Screen
+from ssh.shell_session import ShellSession
+from utils.recording import SessionRecorder
+
+# Keys that send escape sequences; cursor keys depend on the application cursor mode
+CURSOR_KEYS = {"Up": "A", "Down": "B", "Right": "C", "Left": "D", "Home": "H", "End": "F"}
+SPECIAL_KEYS = {
+    "Return": "\r", "KP_Enter": "\r", "BackSpace": "\x7f", "Tab": "\t", "Escape": "\x1b",
+    "Insert": "\x1b[2~", "Delete": "\x1b[3~", "Prior": "\x1b[5~", "Next": "\x1b[6~",
+    "F1": "\x1bOP", "F2": "\x1bOQ", "F3": "\x1bOR", "F4": "\x1bOS",
+    "F5": "\x1b[15~", "F6": "\x1b[17~", "F7": "\x1b[18~", "F8": "\x1b[19~",
+    "F9": "\x1b[20~", "F10": "\x1b[21~", "F11": "\x1b[23~", "F12": "\x1b[24~",
+}
+
+
+class ScreenDisplay(ttk.Frame):
+    """Read-only widget showing a Screen model, one line per row, redrawing only damaged rows"""
+    
+    TERMINAL_FONT = ("Consolas", 10)
+    
+    def __init__(self, parent, screen: Screen):
+        super().__init__(parent)
+        self.screen = screen
+        self.tags = StyleTags(default_tag="screen_default", prefix="screen")
+        self.configured_tags = set()
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """Setup the screen widget"""
+        self.text = tk.Text(
+            self,
+            wrap=tk.NONE,
+            font=self.TERMINAL_FONT,
+            bg="black",
+            fg="white",
+            insertwidth=0,
+            cursor="xterm",
+            padx=2,
+            pady=2
+        )
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.text.tag_configure("screen_default", foreground="white")
+        self.text.tag_configure("cursor", background="white", foreground="black")
+        self.configured_tags.add("screen_default")
+        
+        self.char_font = tkfont.Font(font=self.TERMINAL_FONT)
+        self.rebuild_rows()
+    
+    def rebuild_rows(self):
+        """Make the widget hold exactly one line per screen row"""
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n" * (self.screen.rows - 1))
+        with self.screen.lock:
+            self.screen.dirty = set(range(self.screen.rows))
+    
+    def redraw(self) -> List[int]:
+        """Redraw damaged rows and the cursor; returns the rows drawn"""
+        dirty = self.screen.take_dirty()
+        for y in dirty:
+            self.draw_row(y)
+        self.draw_cursor()
+        return dirty
+    
+    def draw_row(self, y: int):
+        """Replace one widget line with the runs of a screen row"""
+        args = []
+        for text, style in self.screen.line_runs(y):
+            args.extend((text, self.tag_for(style)))
+        line = f"{y + 1}.0"
+        self.text.delete(line, f"{y + 1}.end")
+        if args:
+            self.text.insert(line, *args)
+    
+    def draw_cursor(self):
+        self.text.tag_remove("cursor", "1.0", tk.END)
+        screen = self.screen
+        if screen.cursor_visible:
+            position = f"{screen.cursor_y + 1}.{screen.cursor_x}"
+            self.text.tag_add("cursor", position, f"{position}+1c")
+    
+    def tag_for(self, style: Style) -> str:
+        """Tag name for a style, configured in the widget on first use"""
+        tag = self.tags.tag_for(style)
+        if tag not in self.configured_tags:
+            options = self.tags.tag_options(tag, self.TERMINAL_FONT)
+            if options:
+                self.text.tag_configure(tag, **options)
+                self.text.tag_raise("cursor")
+            self.configured_tags.add(tag)
+        return tag
+
+
+class ScreenView(ScreenDisplay):
+    """Interactive terminal that renders a Screen model, redrawing only damaged rows"""
+    
+    FRAME_MS = 16
+    IDLE_MS = 50
+    
+    def __init__(self, parent, ssh_client, on_title: Optional[Callable[[str], None]] = None):
+        self.ssh_client = ssh_client
+        self.on_title = on_title
+        self.session: Optional[ShellSession] = None
+        self.recorder: Optional[SessionRecorder] = None
+        self.running = True
+        self.visible = True
+        self.render_scheduled = False
+        self.last_title = ""
+        super().__init__(parent, Screen(24, 80, on_response=self.send))
+    
+    def setup_ui(self):
+        """Setup the screen widget and the key bindings"""
+        super().setup_ui()
+        self.text.bind("<Key>", self.on_key)
+        self.text.bind("<<Paste>>", self.on_paste)
+        self.text.bind("<Control-Shift-V>", self.on_paste)
+        self.text.bind("<Configure>", self.on_resize)
+    
+    def start(self):
+        """Open the remote PTY and start rendering"""
+        self.session = ShellSession(self.ssh_client, self.on_data, on_close=self.on_session_closed,
+                                    cols=self.screen.cols, rows=self.screen.rows)
+        self.session.start()
+        self.schedule_render(self.IDLE_MS)
+        self.text.focus_set()
+    
+    def on_data(self, data: str):
+        """Called from the reader thread with remote output"""
+        if self.recorder:
+            self.recorder.output(data)
+        self.screen.feed(data)
+    
+    def send(self, data: str):
+        """Send input (or terminal responses) to the remote program"""
+        if self.session:
+            self.session.send(data)
+    
+    def on_key(self, event):
+        """Translate a key press into the bytes a terminal would send"""
+        keysym = event.keysym
+        if keysym in CURSOR_KEYS:
+            prefix = "\x1bO" if self.screen.application_cursor else "\x1b["
+            self.send(prefix + CURSOR_KEYS[keysym])
+        elif keysym in SPECIAL_KEYS:
+            self.send(SPECIAL_KEYS[keysym])
+        elif event.char:
+            self.send(event.char)
+        return "break"
+    
+    def on_paste(self, event=None):
+        """Paste clipboard text, bracketed when the program asked for it"""
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return "break"
+        text = text.replace("\r\n", "\r").replace("\n", "\r")
+        if self.screen.bracketed_paste:
+            text = f"\x1b[200~{text}\x1b[201~"
+        self.send(text)
+        return "break"
+    
+    def on_resize(self, event):
+        """Fit the grid to the widget and tell the remote PTY"""
+        char_width = max(1, self.char_font.measure("0"))
+        line_height = max(1, self.char_font.metrics("linespace"))
+        cols = max(20, (event.width - 8) // char_width)
+        rows = max(5, (event.height - 8) // line_height)
+        if (rows, cols) == (self.screen.rows, self.screen.cols):
+            return
+        self.screen.resize(rows, cols)
+        self.rebuild_rows()
+        if self.recorder:
+            self.recorder.resize(cols, rows)
+        if self.session:
+            self.session.resize(cols, rows)
+    
+    def schedule_render(self, delay: int):
+        """Arm the render timer unless it is already pending"""
+        if not self.render_scheduled:
+            self.render_scheduled = True
+            self.after(delay, self.render)
+    
+    def set_visible(self, visible: bool):
+        """Skip rendering while hidden; the screen model keeps tracking damage"""
+        self.visible = visible
+        if visible and self.running:
+            self.schedule_render(1)
+    
+    def render(self):
+        """Redraw damaged rows and the cursor, once per frame"""
+        self.render_scheduled = False
+        if not self.running or not self.visible:
+            return
+        try:
+            dirty = self.redraw()
+            if self.on_title and self.screen.title != self.last_title:
+                self.last_title = self.screen.title
+                self.on_title(self.last_title)
+        except tk.TclError:
+            return
+        self.schedule_render(self.FRAME_MS if dirty else self.IDLE_MS)
+    
+    def on_session_closed(self):
+        """Called from the reader thread when the remote shell exits"""
+        self.screen.feed("\r\n\x1b[0m[Session closed]\r\n")
+    
+    def start_recording(self, path: Optional[str] = None, title: Optional[str] = None) -> SessionRecorder:
+        """Record the shell output as an asciicast file"""
+        if not self.recorder:
+            self.recorder = SessionRecorder(path, width=self.screen.cols, height=self.screen.rows,
+                                            title=title or self.last_title or "shell")
+        return self.recorder
+    
+    def stop_recording(self) -> Optional[str]:
+        """Stop recording; returns the recording path"""
+        recorder, self.recorder = self.recorder, None
+        if not recorder:
+            return None
+        recorder.close()
+        return str(recorder.path)
+    
+    def close(self):
+        """Stop rendering and close the remote shell"""
+        self.running = False
+        self.stop_recording()
+        if self.session:
+            self.session.close()
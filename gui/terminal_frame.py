@@ -1,19 +1,90 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from typing import Dict, Any, Callable, Optional
+import os
+import re
+import shlex
 import threading
-import queue
+import time
+from collections import deque
+
+from gui.ansi import AnsiParser, Style, style_options
+from gui.find_bar import FindBar
+from gui.history_search import HistorySearch
+from models.history import CommandHistory
+from ssh.completion import CompletionEngine
+from ssh.host_facts import display_cwd, format_memory
+from utils.config import config_manager
+from utils.dispatcher import command_dispatcher
+from utils.recording import SessionRecorder
+from utils.scrollback import ScrollbackArchive
+
+
+# A plain cd; compound commands are left alone
+CD_COMMAND_RE = re.compile(r'^cd(\s+[^;&|<>`$()]*)?$')
 
 
 class TerminalFrame(ttk.Frame):
-    def __init__(self, parent, on_ssh_command: Callable):
+    # Tk mark placed right after the last prompt
+    INPUT_MARK = "input_start"
+    
+    # Output rendering: poll interval while busy/idle, time and size budget per frame
+    OUTPUT_FRAME_MS = 16
+    OUTPUT_IDLE_MS = 50
+    OUTPUT_FRAME_BUDGET = 0.008
+    OUTPUT_FRAME_CHARS = 64 * 1024
+    
+    # Fixed tags used by the client's own messages
+    BASE_TAGS = {
+        "white": "white",
+        "red": "#ff5555",
+        "green": "#50fa7b",
+        "yellow": "#f1fa8c",
+        "cyan": "#8be9fd",
+    }
+    TERMINAL_FONT = ("Consolas", 10)
+    # SGR codes for the message tags when written to a recording
+    RECORD_SGR = {"white": "0", "red": "31", "green": "32", "yellow": "33", "cyan": "36"}
+    
+    def __init__(self, parent, on_ssh_command: Callable, completer: Optional[CompletionEngine] = None,
+                 history: Optional[CommandHistory] = None):
         super().__init__(parent)
         self.on_ssh_command = on_ssh_command
+        self.completer = completer or CompletionEngine()
+        # Persistent history shared by all terminals; command_history is this terminal's Up/Down list
+        self.history = history
         self.current_connection: Optional[Dict[str, Any]] = None
         self.command_history = []
         self.history_index = 0
         self.current_prompt = "$ "
-        self.command_queue = queue.Queue()
+        self.host_facts: Optional[Dict[str, Any]] = None
+        # Every command runs in its own exec channel, so the directory a cd moved to is kept
+        # here and each command starts there; None is the login directory
+        self.cwd: Optional[str] = None
+        self.recorder: Optional[SessionRecorder] = None
+        
+        # Pending (text, tag) chunks, or (None, callback) actions, rendered on the Tk thread
+        self.output_queue: deque = deque()
+        self.ui_thread = threading.current_thread()
+        # Hidden terminals (background tabs) only buffer output until shown,
+        # dropping the oldest lines beyond hidden_output_limit()
+        self.visible = True
+        self.poll_scheduled = False
+        self.queue_lock = threading.Lock()
+        self.hidden_lines = 0
+        self.dropped_lines = 0
+        
+        # Remote output is parsed for ANSI colors into tags configured once on first use
+        self.ansi = AnsiParser(default_tag="white")
+        self.configured_tags = set()
+        
+        # Scrollback kept in the widget; older lines go to the on-disk archive
+        self.scrollback_limit = config_manager.get('terminal.scrollback_lines', 10000)
+        self.scrollback_trim_block = config_manager.get('terminal.scrollback_trim_block', 1000)
+        self.archive: Optional[ScrollbackArchive] = None
+        if config_manager.get('terminal.archive_scrollback', True):
+            self.archive = ScrollbackArchive()
+        
         self.setup_ui()
         
     def setup_ui(self):
@@ -28,11 +99,19 @@ class TerminalFrame(ttk.Frame):
         self.connection_info = ttk.Label(header_frame, text="No connection selected", foreground="gray")
         self.connection_info.pack(side=tk.RIGHT)
         
+        # Remote system badge (filled from the host facts cache)
+        self.facts_badge = ttk.Label(header_frame, text="", foreground="gray")
+        self.facts_badge.pack(side=tk.RIGHT, padx=(0, 10))
+        
+        # Shown while the session is being recorded
+        self.record_label = ttk.Label(header_frame, text="", foreground="red")
+        self.record_label.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # Terminal output area - теперь это основной терминал
         self.terminal_text = tk.Text(
             self,
             wrap=tk.NONE,
-            font=("Consolas", 10),
+            font=self.TERMINAL_FONT,
             bg="black",
             fg="white",
             insertbackground="white",
@@ -40,14 +119,16 @@ class TerminalFrame(ttk.Frame):
             cursor="xterm"
         )
         
+        self.setup_tags()
+        
         # Scrollbars
-        v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.terminal_text.yview)
+        self.v_scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.terminal_text.yview)
         h_scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.terminal_text.xview)
-        self.terminal_text.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.terminal_text.configure(yscrollcommand=self.v_scrollbar.set, xscrollcommand=h_scrollbar.set)
         
         # Pack terminal and scrollbars
         self.terminal_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
         # Bind events for terminal-like behavior
@@ -59,58 +140,233 @@ class TerminalFrame(ttk.Frame):
         self.terminal_text.bind("<Control-c>", self.on_copy)
         self.terminal_text.bind("<Control-v>", self.on_paste)
         self.terminal_text.bind("<Control-l>", self.on_clear)
+        self.terminal_text.bind("<Control-r>", self.on_history_search)
+        self.terminal_text.bind("<Control-f>", self.on_find)
+        
+        # Reverse history search bar, shown on Ctrl-R
+        self.history_search: Optional[HistorySearch] = None
+        if self.history:
+            self.history_search = HistorySearch(self, self.history, self.replace_current_line,
+                                                self.close_history_search)
+        
+        # Find bar over the output and the scrollback archive, shown on Ctrl-F
+        self.find_bar = FindBar(self, self.terminal_text, self.archive, self.close_find)
         
         # Set initial prompt
+        self.running = True
         self.write_prompt()
+        self.schedule_poll(self.OUTPUT_IDLE_MS)
         
-        # Start command processing thread
-        self.running = True
-        self.command_thread = threading.Thread(target=self.process_commands, daemon=True)
-        self.command_thread.start()
+    def setup_tags(self):
+        """Pre-create message tags and the common ANSI color tags"""
+        for tag, color in self.BASE_TAGS.items():
+            self.terminal_text.tag_configure(tag, foreground=color)
+            self.configured_tags.add(tag)
         
+        for color in range(16):
+            for bold in (False, True):
+                self.configure_tag(self.ansi.tag_for(Style(fg=color, bold=bold)))
+    
+    def configure_tag(self, tag: str):
+        """Configure a parser tag in the widget the first time it is used"""
+        options = self.ansi.tag_options(tag, self.TERMINAL_FONT)
+        if options:
+            self.terminal_text.tag_configure(tag, **options)
+        self.configured_tags.add(tag)
+    
     def write_prompt(self):
-        """Write the current prompt to terminal"""
+        """Write the current prompt to terminal (safe to call from any thread)"""
+        self.record(self.current_prompt)
+        self.queue_action(self._insert_prompt)
+    
+    def queue_action(self, action: Callable[[], None]):
+        """Run action on the Tk thread once the output queued before it is rendered"""
+        self.output_queue.append((None, action))
+        if threading.current_thread() is self.ui_thread:
+            self.schedule_poll(1)
+    
+    def _insert_prompt(self):
         self.terminal_text.insert(tk.END, self.current_prompt)
+        # User input starts right after the prompt; left gravity keeps the mark
+        # in front of anything typed there
+        self.terminal_text.mark_set(self.INPUT_MARK, "end-1c")
+        self.terminal_text.mark_gravity(self.INPUT_MARK, tk.LEFT)
         self.terminal_text.see(tk.END)
         self.terminal_text.mark_set(tk.INSERT, tk.END)
         
     def write_output(self, text: str, color: str = "white"):
-        """Write output to terminal with color"""
-        self.terminal_text.insert(tk.END, text, color)
+        """Write output to terminal with color (safe to call from any thread)"""
+        if not text:
+            return
+        self.record(f"\x1b[{self.RECORD_SGR.get(color, '0')}m{text}\x1b[0m")
+        self._enqueue_output(text, color)
+    
+    def write_ansi(self, data: str):
+        """Write raw remote output, turning ANSI color sequences into tags"""
+        self.record(data)
+        for text, tag in self.ansi.feed(data):
+            self._enqueue_output(text, tag)
+    
+    def _enqueue_output(self, text: str, tag: str):
+        self.output_queue.append((text, tag))
+        # Rendered by the output timer within the frame budget, even when written
+        # by the Tk thread itself; widget edits that must follow go through queue_action
+        if threading.current_thread() is self.ui_thread:
+            self.schedule_poll(1)
+        if not self.visible:
+            self._cap_hidden_output(text.count('\n'))
+    
+    def hidden_output_limit(self) -> int:
+        """Lines a hidden terminal queues before dropping the oldest (0 = unlimited)"""
+        return self.scrollback_limit + self.scrollback_trim_block if self.scrollback_limit else 0
+    
+    def _cap_hidden_output(self, lines: int):
+        # Lines beyond the limit would be trimmed from the widget right after rendering anyway
+        limit = self.hidden_output_limit()
+        if not limit:
+            return
+        with self.queue_lock:
+            self.hidden_lines += lines
+            if self.hidden_lines <= limit:
+                return
+            keep = limit * 9 // 10
+            while self.hidden_lines > keep and self.output_queue:
+                text, _ = self.output_queue.popleft()
+                if text is not None:
+                    count = text.count('\n')
+                    self.hidden_lines -= count
+                    self.dropped_lines += count
+    
+    def schedule_poll(self, delay: int):
+        """Arm the output timer unless it is already pending"""
+        if not self.poll_scheduled:
+            self.poll_scheduled = True
+            self.after(delay, self.poll_output)
+    
+    def poll_output(self):
+        """Render queued output once per frame on the Tk thread"""
+        self.poll_scheduled = False
+        if not self.running or not self.visible:
+            # Stopped or hidden: output keeps queueing, set_visible restarts the timer
+            return
+        try:
+            self.flush_output(self.OUTPUT_FRAME_BUDGET)
+        except tk.TclError:
+            # Widget destroyed while output was pending
+            return
+        self.schedule_poll(self.OUTPUT_FRAME_MS if self.output_queue else self.OUTPUT_IDLE_MS)
+    
+    def set_visible(self, visible: bool):
+        """Pause rendering while hidden; queued output is drawn when shown again"""
+        self.visible = visible
+        if visible:
+            with self.queue_lock:
+                self.hidden_lines = 0
+                if self.dropped_lines:
+                    self.output_queue.appendleft(
+                        (f"[... {self.dropped_lines} lines skipped while the tab was in the background ...]\n", "yellow"))
+                    self.dropped_lines = 0
+        if visible and self.running:
+            self.schedule_poll(1)
+    
+    def flush_output(self, budget: Optional[float] = None):
+        """Drain the output queue, coalescing chunks into one insert per tag run"""
+        if not self.output_queue:
+            return
+        
+        deadline = time.perf_counter() + budget if budget is not None else None
+        runs = []
+        run_text = []
+        run_tag = None
+        size = 0
+        
+        while self.output_queue:
+            text, tag = self.output_queue.popleft()
+            
+            if text is None:
+                # Ordered action (e.g. the prompt): render what we have, then run it
+                self._insert_runs(runs, run_text, run_tag)
+                runs, run_text, run_tag = [], [], None
+                tag()
+            else:
+                room = self.OUTPUT_FRAME_CHARS - size
+                if budget is not None and len(text) > room:
+                    # Split huge chunks so a single frame never inserts too much
+                    self.output_queue.appendleft((text[room:], tag))
+                    text = text[:room]
+                if tag != run_tag and run_text:
+                    runs.append((''.join(run_text), run_tag))
+                    run_text = []
+                run_tag = tag
+                run_text.append(text)
+                size += len(text)
+            
+            if budget is not None and (size >= self.OUTPUT_FRAME_CHARS or time.perf_counter() >= deadline):
+                break
+        
+        self._insert_runs(runs, run_text, run_tag)
+    
+    def _insert_runs(self, runs, run_text, run_tag):
+        """Insert text runs with a single widget call"""
+        if run_text:
+            runs.append((''.join(run_text), run_tag))
+        if not runs:
+            return
+        args = []
+        for text, tag in runs:
+            if tag not in self.configured_tags:
+                self.configure_tag(tag)
+            args.extend((text, tag))
+        self.terminal_text.insert(tk.END, *args)
+        self.trim_scrollback()
         self.terminal_text.see(tk.END)
         self.terminal_text.mark_set(tk.INSERT, tk.END)
+    
+    def trim_scrollback(self):
+        """Move the oldest lines to the archive once the limit is exceeded by a whole block"""
+        if not self.scrollback_limit:
+            return
+        
+        line_count = int(self.terminal_text.index("end-1c").split('.')[0])
+        if line_count <= self.scrollback_limit + self.scrollback_trim_block:
+            return
+        
+        cut_index = f"{line_count - self.scrollback_limit + 1}.0"
+        if self.archive:
+            try:
+                self.archive.append(self.terminal_text.get("1.0", cut_index))
+            except OSError as e:
+                self.archive = None
+                self.find_bar.set_archive(None)
+                self.terminal_text.insert(tk.END, f"Scrollback archive disabled: {e}\n", "red")
+        self.terminal_text.delete("1.0", cut_index)
         
     def on_key_press(self, event):
         """Handle key press events"""
-        # Prevent editing above the current line
-        current_line = self.terminal_text.index(tk.INSERT).split('.')[0]
-        last_prompt_line = self.get_last_prompt_line()
-        
-        if int(current_line) < last_prompt_line:
+        # Prevent editing anything before the current input
+        if self.terminal_text.compare(tk.INSERT, "<", self.INPUT_MARK):
+            return "break"
+        if event.keysym == "BackSpace" and self.terminal_text.compare(tk.INSERT, "==", self.INPUT_MARK):
             return "break"
             
     def on_return(self, event):
         """Handle Enter key - execute command"""
-        # Get the current line
-        current_line = self.terminal_text.index(tk.INSERT).split('.')[0]
-        line_start = f"{current_line}.0"
-        line_end = f"{current_line}.end"
-        
-        # Get command from current line
-        line_content = self.terminal_text.get(line_start, line_end)
-        command = line_content.replace(self.current_prompt, "").strip()
+        command = self.get_current_input().strip()
         
         if command:
             # Add to history
-            if command not in self.command_history:
+            if not self.command_history or self.command_history[-1] != command:
                 self.command_history.append(command)
+            if self.history:
+                self.history.add(command, self.connection_id())
+            self.completer.add_history(command)
             self.history_index = len(self.command_history)
             
             # Execute command
             self.execute_command(command)
         else:
             # Just add new line with prompt
-            self.terminal_text.insert(tk.END, "\n")
+            self.write_output("\n")
             self.write_prompt()
             
         return "break"
@@ -131,24 +387,72 @@ class TerminalFrame(ttk.Frame):
             self.history_index += 1
             self.replace_current_line("")
         return "break"
+    
+    def on_history_search(self, event=None):
+        """Ctrl-R - fuzzy search the persistent history"""
+        if not self.history_search:
+            return "break"
+        if not self.history_search.winfo_ismapped():
+            self.history_search.pack(side=tk.BOTTOM, fill=tk.X, before=self.terminal_text)
+        self.history_search.open(self.connection_id(), self.get_current_input().strip())
+        return "break"
+    
+    def close_history_search(self):
+        """Hide the search bar and return to the input line"""
+        self.history_search.pack_forget()
+        self.terminal_text.focus_set()
+        self.terminal_text.mark_set(tk.INSERT, tk.END)
+    
+    def on_find(self, event=None):
+        """Ctrl-F - find in output, starting from the selected text"""
+        try:
+            selection = self.terminal_text.get(tk.SEL_FIRST, tk.SEL_LAST)
+        except tk.TclError:
+            selection = ""
+        if not self.find_bar.winfo_ismapped():
+            self.find_bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.terminal_text)
+        self.find_bar.open(selection if "\n" not in selection else "")
+        return "break"
+    
+    def close_find(self):
+        """Hide the find bar and return to the input line"""
+        self.find_bar.pack_forget()
+        self.terminal_text.focus_set()
+        self.terminal_text.mark_set(tk.INSERT, tk.END)
+    
+    def connection_id(self) -> Optional[int]:
+        return self.current_connection.get('id') if self.current_connection else None
         
     def on_tab(self, event):
-        """Handle tab - autocomplete (basic implementation)"""
-        # Basic autocomplete for common commands
-        common_commands = ["ls", "cd", "pwd", "whoami", "ps", "top", "df", "du", "cat", "vim", "nano"]
+        """Handle tab - complete from the cached remote executables, paths, snippets and history"""
+        command = self.get_current_input().lstrip()
         
-        current_line = self.terminal_text.index(tk.INSERT).split('.')[0]
-        line_start = f"{current_line}.0"
-        line_end = f"{current_line}.end"
-        line_content = self.terminal_text.get(line_start, line_end)
-        command = line_content.replace(self.current_prompt, "").strip()
+        if not command:
+            return "break"
+        
+        connection_id = self.current_connection.get('id') if self.current_connection else None
+        candidates = self.completer.complete(command, connection_id, cwd=self.cwd)
+        if not candidates:
+            return "break"
+        
+        if len(candidates) == 1:
+            completion = candidates[0]
+            if not completion.endswith('/') and ' ' not in completion[len(command):]:
+                completion += " "
+            self.replace_current_line(completion)
+            return "break"
+        
+        # Several matches - extend to the common prefix, or list them like a shell does
+        common = os.path.commonprefix(candidates)
+        if len(common) > len(command):
+            self.replace_current_line(common)
+        else:
+            head = command[:len(command) - len(command.split(' ')[-1])]
+            shown = [candidate[len(head):] for candidate in candidates[:100]]
+            self.write_output("\n" + "  ".join(shown) + "\n")
+            self.write_prompt()
+            self.queue_action(lambda: self.replace_current_line(command))
         
-        if command:
-            for cmd in common_commands:
-                if cmd.startswith(command):
-                    self.replace_current_line(cmd)
-                    break
-                    
         return "break"
         
     def on_copy(self, event):
@@ -172,29 +476,18 @@ class TerminalFrame(ttk.Frame):
         
     def on_clear(self, event):
         """Handle Ctrl+L - clear screen"""
-        self.terminal_text.delete(1.0, tk.END)
-        self.write_prompt()
+        self.clear_terminal()
         return "break"
         
     def replace_current_line(self, new_command: str):
-        """Replace the current line with new command"""
-        current_line = self.terminal_text.index(tk.INSERT).split('.')[0]
-        line_start = f"{current_line}.0"
-        line_end = f"{current_line}.end"
-        
-        self.terminal_text.delete(line_start, line_end)
-        self.terminal_text.insert(line_start, self.current_prompt + new_command)
+        """Replace the current input with new command"""
+        self.terminal_text.delete(self.INPUT_MARK, "end-1c")
+        self.terminal_text.insert(tk.END, new_command)
         self.terminal_text.mark_set(tk.INSERT, tk.END)
         
-    def get_last_prompt_line(self) -> int:
-        """Get the line number of the last prompt"""
-        content = self.terminal_text.get(1.0, tk.END)
-        lines = content.split('\n')
-        
-        for i in range(len(lines) - 1, -1, -1):
-            if lines[i].endswith(self.current_prompt):
-                return i + 1
-        return 1
+    def get_current_input(self) -> str:
+        """Get the text typed after the last prompt"""
+        return self.terminal_text.get(self.INPUT_MARK, "end-1c")
         
     def execute_command(self, command: str):
         """Execute a command"""
@@ -203,30 +496,34 @@ class TerminalFrame(ttk.Frame):
             self.write_prompt()
             return
             
-        # Add command to queue for processing
-        self.command_queue.put(command)
+        # Run on the shared worker pool, in order with this terminal's other commands
+        command_dispatcher.submit(self, self.execute_ssh_command, command)
         
-    def process_commands(self):
-        """Process commands in background thread"""
-        while self.running:
-            try:
-                command = self.command_queue.get(timeout=0.1)
-                self.execute_ssh_command(command)
-            except queue.Empty:
-                continue
-                
     def execute_ssh_command(self, command: str):
         """Execute SSH command and update terminal"""
+        if not self.running:
+            return
         try:
             # Show command being executed
             self.write_output(f"\n$ {command}\n", "green")
             
-            # Execute command
-            result = self.on_ssh_command(command)
+            # Execute command in the tab's directory; a cd reports where it went
+            remote_command = command
+            changes_directory = bool(CD_COMMAND_RE.match(command))
+            if changes_directory:
+                remote_command = f"{command} >/dev/null && pwd"
+            if self.cwd:
+                remote_command = f"cd {shlex.quote(self.cwd)} && {remote_command}"
+            result = self.on_ssh_command(remote_command)
+            
+            if changes_directory and result and result.startswith('/') and '\n' not in result.strip():
+                self.cwd = result.strip()
+                self.current_prompt = self.render_prompt()
+                result = ""
             
             # Show result
             if result:
-                self.write_output(result + "\n")
+                self.write_ansi(result + "\n")
                 
         except Exception as e:
             self.write_output(f"Error: {str(e)}\n", "red")
@@ -243,14 +540,55 @@ class TerminalFrame(ttk.Frame):
                 text=f"Connected to: {connection['name']} ({connection['host']}:{connection['port']})",
                 foreground="green"
             )
-            self.current_prompt = f"{connection['username']}@{connection['host']}:~$ "
+            self.host_facts = None
+            self.cwd = None
+            self.current_prompt = self.render_prompt()
+            if self.history:
+                self.command_history = self.history.recent(connection.get('id'))
+                self.history_index = len(self.command_history)
             self.write_output(f"Connected to {connection['name']} ({connection['host']}:{connection['port']})\n", "green")
         else:
             self.connection_info.config(text="No connection selected", foreground="gray")
+            self.host_facts = None
+            self.cwd = None
             self.current_prompt = "$ "
+        self.update_facts_badge()
+    
+    def set_host_facts(self, facts: Optional[Dict[str, Any]]):
+        """Use cached host facts for the prompt and the system badge"""
+        self.host_facts = facts
+        if self.current_connection:
+            self.current_prompt = self.render_prompt()
+        self.update_facts_badge()
+    
+    def render_prompt(self) -> str:
+        """Build the prompt from the connection, the tab's directory and cached host facts"""
+        connection = self.current_connection
+        if not connection:
+            return "$ "
+        location = display_cwd(self.host_facts or {}, self.cwd)
+        return f"{connection['username']}@{connection['host']}:{location}$ "
+    
+    def update_facts_badge(self):
+        """Show OS, kernel and resources of the remote host"""
+        facts = self.host_facts
+        if not facts:
+            self.facts_badge.config(text="")
+            return
+        parts = [facts.get('os') or "unknown OS"]
+        if facts.get('kernel'):
+            parts.append(facts['kernel'])
+        if facts.get('cpus'):
+            parts.append(f"{facts['cpus']} CPU")
+        if facts.get('mem_kb'):
+            parts.append(format_memory(facts['mem_kb']))
+        self.facts_badge.config(text=" | ".join(parts))
             
     def clear_terminal(self):
-        """Clear the terminal"""
+        """Clear the terminal, dropping output that has not been rendered yet"""
+        with self.queue_lock:
+            self.output_queue.clear()
+            self.hidden_lines = 0
         self.terminal_text.delete(1.0, tk.END)
         self.write_prompt()
         
@@ -258,12 +596,52 @@ class TerminalFrame(ttk.Frame):
         """Save terminal output to file"""
         try:
             with open(filename, 'w') as f:
+                # Archived lines first, streamed from disk
+                if self.archive:
+                    self.archive.export(f)
                 f.write(self.terminal_text.get(1.0, tk.END))
         except Exception as e:
             self.write_output(f"Error saving output: {str(e)}\n", "red")
             
+    def search_scrollback(self, pattern: str, regex: bool = False, ignore_case: bool = False):
+        """Search lines that were trimmed into the archive"""
+        if not self.archive:
+            return iter(())
+        return self.archive.search(pattern, regex=regex, ignore_case=ignore_case)
+    
+    def record(self, data: str):
+        """Add output to the recording; bare newlines become CR LF as a terminal would show them"""
+        if self.recorder:
+            self.recorder.output(data.replace("\r\n", "\n").replace("\n", "\r\n"))
+    
+    def start_recording(self, path: Optional[str] = None, title: Optional[str] = None) -> SessionRecorder:
+        """Record everything written to this terminal as an asciicast file"""
+        if not self.recorder:
+            if not title:
+                title = self.current_connection['name'] if self.current_connection else "terminal"
+            self.recorder = SessionRecorder(path, width=self.terminal_text.cget("width"),
+                                            height=self.terminal_text.cget("height"), title=title)
+            self.record_label.config(text="● REC")
+        return self.recorder
+    
+    def stop_recording(self) -> Optional[str]:
+        """Stop recording; returns the recording path"""
+        recorder, self.recorder = self.recorder, None
+        if not recorder:
+            return None
+        self.record_label.config(text="")
+        recorder.close()
+        return str(recorder.path)
+    
     def cleanup(self):
         """Cleanup resources"""
         self.running = False
-        if hasattr(self, 'command_thread'):
-            self.command_thread.join(timeout=1) 
\ No newline at end of file
+        self.stop_recording()
+        # A command already running finishes in the background; its output is dropped
+        command_dispatcher.cancel(self)
+        # Stops a find-bar search before its archive is deleted
+        self.find_bar.set_archive(None)
+        # The archive only backs this tab's scrollback; Save Output writes its own copy
+        if self.archive:
+            self.archive.remove()
+            self.archive = None 
\ No newline at end of file
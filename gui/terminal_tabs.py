@@ -0,0 +1,176 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Any, List, Optional, Callable
+
+from .terminal_frame import TerminalFrame
+from .screen_view import ScreenView
+from .virtual_terminal import VirtualTerminalFrame
+from utils.config import config_manager
+
+
+class TerminalTab:
+    """A notebook page: one connection, its pooled SSH client and a terminal view"""
+    
+    def __init__(self, view, connection: Optional[Dict[str, Any]] = None):
+        self.view = view
+        self.connection = connection
+        self.ssh_client = None
+    
+    @property
+    def is_shell(self) -> bool:
+        return isinstance(self.view, ScreenView)
+    
+    def execute(self, command: str) -> str:
+        """Run a command over this tab's client (called from the command worker)"""
+        if not self.ssh_client:
+            return "Error: No SSH connection"
+        try:
+            return self.ssh_client.execute_command(command)
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    def run_snippet(self, command: str):
+        """Run a snippet in this tab"""
+        if self.is_shell:
+            self.view.send(command + "\r")
+        else:
+            self.view.execute_command(command)
+
+
+class TerminalTabs(ttk.Frame):
+    """Notebook of independent terminal sessions sharing pooled transports"""
+    
+    def __init__(self, parent, session_pool, completer, host_facts, history=None,
+                 on_tab_changed: Optional[Callable[[Optional[TerminalTab]], None]] = None):
+        super().__init__(parent)
+        self.session_pool = session_pool
+        self.completer = completer
+        self.host_facts = host_facts
+        self.history = history
+        self.on_tab_changed = on_tab_changed
+        self.tabs: Dict[str, TerminalTab] = {}
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """Setup the notebook with an initial, unconnected terminal"""
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self.notebook.bind("<Button-2>", self._on_middle_click)
+        
+        self._add_tab(TerminalTab(self._new_terminal()), "Terminal")
+    
+    def _new_terminal(self) -> TerminalFrame:
+        # "virtual" keeps output in a compact line store and renders only the viewport
+        terminal_class = VirtualTerminalFrame if config_manager.get('terminal.view', 'text') == 'virtual' else TerminalFrame
+        return terminal_class(self.notebook, lambda command: "Error: No SSH connection", self.completer,
+                             self.history)
+    
+    def _add_tab(self, tab: TerminalTab, title: str) -> TerminalTab:
+        self.tabs[str(tab.view)] = tab
+        self.notebook.add(tab.view, text=title)
+        self.notebook.select(tab.view)
+        return tab
+    
+    def active_tab(self) -> Optional[TerminalTab]:
+        """The tab that is currently shown"""
+        try:
+            selected = self.notebook.select()
+        except tk.TclError:
+            return None
+        return self.tabs.get(selected) if selected else None
+    
+    def all_tabs(self) -> List[TerminalTab]:
+        return list(self.tabs.values())
+    
+    def open_terminal(self, connection: Dict[str, Any]) -> TerminalTab:
+        """Open a command terminal tab for a connection (not connected yet)"""
+        tab = self.active_tab()
+        if not tab or tab.is_shell or tab.connection:
+            tab = self._add_tab(TerminalTab(self._new_terminal()), connection['name'])
+        else:
+            # Reuse the initial empty terminal
+            self.notebook.tab(tab.view, text=connection['name'])
+        
+        tab.connection = connection
+        tab.view.on_ssh_command = tab.execute
+        tab.view.set_connection(connection)
+        return tab
+    
+    def open_shell(self, connection: Dict[str, Any]) -> TerminalTab:
+        """Open an interactive PTY shell tab sharing the connection's transport"""
+        ssh_client = self.session_pool.acquire(connection)
+        view = ScreenView(self.notebook, ssh_client)
+        tab = TerminalTab(view, connection)
+        tab.ssh_client = ssh_client
+        view.on_title = lambda title: self._set_title(tab, title or f"{connection['name']} (shell)")
+        self._add_tab(tab, f"{connection['name']} (shell)")
+        try:
+            view.start()
+        except Exception:
+            self.close_tab(tab)
+            raise
+        if config_manager.get('recording.auto_record', False):
+            view.start_recording(title=connection['name'])
+        return tab
+    
+    def connect(self, tab: TerminalTab):
+        """Attach a pooled SSH client to a terminal tab and load host facts"""
+        connection = tab.connection
+        tab.ssh_client = self.session_pool.acquire(connection)
+        facts = self.host_facts.get_facts(connection, tab.ssh_client)
+        tab.view.set_host_facts(facts)
+        self.completer.attach(connection.get('id'), tab.ssh_client, facts)
+        if config_manager.get('recording.auto_record', False):
+            tab.view.start_recording()
+    
+    def refresh_host_facts(self, tab: Optional[TerminalTab] = None):
+        """Probe the host of a connected tab again and rescan its PATH for completion"""
+        tab = tab or self.active_tab()
+        if not tab or tab.is_shell or not tab.ssh_client:
+            return
+        connection = tab.connection
+        facts = self.host_facts.get_facts(connection, tab.ssh_client, refresh=True)
+        tab.view.set_host_facts(facts)
+        self.completer.invalidate(connection.get('id'))
+        self.completer.attach(connection.get('id'), tab.ssh_client, facts)
+    
+    def close_tab(self, tab: Optional[TerminalTab] = None):
+        """Close a tab, its session and its share of the transport"""
+        tab = tab or self.active_tab()
+        if not tab:
+            return
+        if tab.is_shell:
+            tab.view.close()
+        else:
+            tab.view.cleanup()
+        if tab.ssh_client:
+            self.session_pool.release(tab.ssh_client)
+            tab.ssh_client = None
+        self.tabs.pop(str(tab.view), None)
+        self.notebook.forget(tab.view)
+        tab.view.destroy()
+    
+    def close_all(self):
+        """Close every tab"""
+        for tab in self.all_tabs():
+            self.close_tab(tab)
+    
+    def _set_title(self, tab: TerminalTab, title: str):
+        if str(tab.view) in self.tabs:
+            self.notebook.tab(tab.view, text=title[:40])
+    
+    def _on_tab_changed(self, event=None):
+        # Only the visible tab renders; the others keep buffering
+        active = self.active_tab()
+        for tab in self.tabs.values():
+            tab.view.set_visible(tab is active)
+        if self.on_tab_changed:
+            self.on_tab_changed(active)
+    
+    def _on_middle_click(self, event):
+        try:
+            index = self.notebook.index(f"@{event.x},{event.y}")
+        except tk.TclError:
+            return
+        self.close_tab(self.tabs.get(self.notebook.tabs()[index]))
@@ -0,0 +1,228 @@
+import tkinter as tk
+from tkinter import font as tkfont
+from typing import Callable, Iterator, Optional, Tuple
+
+from gui.line_store import LineStore
+from gui.terminal_frame import TerminalFrame
+from utils.config import config_manager
+
+
+class _ScrollbackSource:
+    """Archive followed by the line store, searchable like a ScrollbackArchive"""
+    
+    def __init__(self, archive, store: LineStore):
+        self.archive = archive
+        self.store = store
+    
+    def has_data(self) -> bool:
+        return bool(self.archive and self.archive.has_data()) or self.store.has_data()
+    
+    def search(self, pattern: str, regex: bool = False, ignore_case: bool = False,
+               should_stop: Optional[Callable[[], bool]] = None) -> Iterator[Tuple[int, str]]:
+        if self.archive:
+            yield from self.archive.search(pattern, regex=regex, ignore_case=ignore_case, should_stop=should_stop)
+        yield from self.store.search(pattern, regex=regex, ignore_case=ignore_case, should_stop=should_stop)
+
+
+class VirtualTerminalFrame(TerminalFrame):
+    """Terminal whose output lives in a LineStore; the Text widget only holds the viewport.
+
+    While following the output the widget holds the last lines plus the prompt
+    and input, like TerminalFrame, but is trimmed to VIEW_MARGIN lines above
+    the viewport. Scrolling further back renders the requested lines from the
+    store around the viewport; scrolling to the bottom restores the prompt.
+    """
+    
+    VIEW_MARGIN = 100
+    
+    def __init__(self, parent, on_ssh_command: Callable, completer=None, history=None):
+        # The store exists before TerminalFrame writes the first prompt
+        self.store = LineStore(max_lines=config_manager.get('terminal.store_lines', 200000),
+                               on_evict=self.archive_lines)
+        self.following = True
+        self.window_start = 0
+        self.saved_input = ""
+        super().__init__(parent, on_ssh_command, completer, history)
+        
+        self.line_height = max(1, tkfont.Font(font=self.TERMINAL_FONT).metrics("linespace"))
+        self.v_scrollbar.configure(command=self.on_scroll)
+        self.terminal_text.configure(yscrollcommand=self.on_view_scrolled)
+        self.terminal_text.bind("<MouseWheel>", lambda event: self.on_scroll("scroll", -3 if event.delta > 0 else 3, "units"))
+        self.terminal_text.bind("<Button-4>", lambda event: self.on_scroll("scroll", -3, "units"))
+        self.terminal_text.bind("<Button-5>", lambda event: self.on_scroll("scroll", 3, "units"))
+        self.find_bar.archive = _ScrollbackSource(self.archive, self.store)
+    
+    def archive_lines(self, text: str):
+        """Lines evicted from the store go to the gzip archive"""
+        if self.archive:
+            try:
+                self.archive.append(text)
+            except OSError:
+                self.archive = None
+    
+    def hidden_output_limit(self) -> int:
+        return self.store.max_lines
+    
+    def visible_rows(self) -> int:
+        return max(1, self.terminal_text.winfo_height() // self.line_height)
+    
+    def widget_lines(self) -> int:
+        return int(self.terminal_text.index("end-1c").split('.')[0])
+    
+    def top_line(self) -> int:
+        """Absolute store line at the top of the viewport"""
+        return self.window_start + int(self.terminal_text.index("@0,0").split('.')[0]) - 1
+    
+    # Output goes to the store; the widget is only touched while following
+    
+    def _insert_runs(self, runs, run_text, run_tag):
+        if run_text:
+            runs.append((''.join(run_text), run_tag))
+            run_text = []
+        for text, tag in runs:
+            self.store.append(text, tag)
+        if self.following:
+            super()._insert_runs(runs, run_text, run_tag)
+        else:
+            if self.window_start < self.store.base:
+                self.render_window(self.store.base)
+            self.update_scrollbar()
+    
+    def _insert_prompt(self):
+        self.store.append(self.current_prompt, "white")
+        if self.following:
+            super()._insert_prompt()
+    
+    def trim_scrollback(self):
+        """Keep only the viewport and a margin in the widget; the store has the rest"""
+        keep = self.visible_rows() + self.VIEW_MARGIN
+        line_count = self.widget_lines()
+        if line_count <= keep + self.VIEW_MARGIN:
+            return
+        cut = line_count - keep
+        self.terminal_text.delete("1.0", f"{cut + 1}.0")
+        self.window_start = self.store.end_line - (keep - 1)
+    
+    # Scrolling maps the scrollbar onto the whole store
+    
+    def on_scroll(self, *args):
+        """Scrollbar and mouse wheel commands, in store lines"""
+        rows = self.visible_rows()
+        total = self.store.line_count
+        if args[0] == "moveto":
+            target = self.store.base + int(float(args[1]) * total)
+        else:
+            step = int(args[1]) * (rows if args[2] == "pages" else 1)
+            target = self.top_line() + step
+        self.scroll_to(target)
+        return "break"
+    
+    def scroll_to(self, target: int):
+        rows = self.visible_rows()
+        last_top = max(self.store.base, self.store.end_line - rows + 1)
+        target = min(max(target, self.store.base), last_top)
+        
+        if target >= last_top:
+            self.follow()
+            return
+        window_end = self.window_start + self.widget_lines()
+        inside = self.window_start <= target and target + rows <= window_end
+        if inside and not self.following:
+            # Re-render before the margin around the viewport runs out
+            near_top = target - self.window_start < self.VIEW_MARGIN // 2 and self.window_start > self.store.base
+            near_bottom = window_end - (target + rows) < self.VIEW_MARGIN // 2 and window_end <= self.store.end_line
+            inside = not (near_top or near_bottom)
+        if inside:
+            self.terminal_text.yview(f"{target - self.window_start + 1}.0")
+        else:
+            self.render_window(target)
+    
+    def render_window(self, top: int):
+        """Show store lines around top; leaves follow mode"""
+        if self.following:
+            self.saved_input = self.get_current_input()
+            self.following = False
+        rows = self.visible_rows()
+        start = max(self.store.base, top - self.VIEW_MARGIN)
+        end = min(self.store.end_line, top + rows + self.VIEW_MARGIN)
+        self.render_lines(start, end)
+        self.terminal_text.yview(f"{top - start + 1}.0")
+    
+    def follow(self):
+        """Back to the end of the output, with the prompt and the saved input"""
+        if not self.following:
+            start = max(self.store.base, self.store.end_line - self.visible_rows() - self.VIEW_MARGIN)
+            self.render_lines(start, self.store.end_line)
+            # The unfinished last line ends with the prompt
+            self.terminal_text.mark_set(self.INPUT_MARK, "end-1c")
+            self.terminal_text.mark_gravity(self.INPUT_MARK, tk.LEFT)
+            self.terminal_text.insert(tk.END, self.saved_input)
+            self.saved_input = ""
+            self.following = True
+        self.terminal_text.see(tk.END)
+        self.terminal_text.mark_set(tk.INSERT, tk.END)
+    
+    def render_lines(self, start: int, end: int):
+        """Replace the widget contents with store lines start..end (inclusive)"""
+        args = []
+        for line in range(start, end + 1):
+            for text, tag in self.store.line_runs(line):
+                if tag not in self.configured_tags:
+                    self.configure_tag(tag)
+                args.extend((text, tag))
+            if line < end:
+                args.extend(("\n", "white"))
+        self.terminal_text.delete("1.0", tk.END)
+        if args:
+            self.terminal_text.insert("1.0", *args)
+        self.window_start = start
+    
+    def on_view_scrolled(self, first: str, last: str):
+        """Widget yscrollcommand: show the viewport's position within the whole store"""
+        line_count = self.widget_lines()
+        total = max(1, self.store.line_count)
+        top = self.window_start + float(first) * line_count - self.store.base
+        bottom = self.window_start + float(last) * line_count - self.store.base
+        self.v_scrollbar.set(top / total, bottom / total)
+    
+    def update_scrollbar(self):
+        first, last = self.terminal_text.yview()
+        self.on_view_scrolled(first, last)
+    
+    # Input always happens at the end of the output
+    
+    def on_key_press(self, event):
+        if not self.following and event.char:
+            self.follow()
+        return super().on_key_press(event)
+    
+    def get_current_input(self) -> str:
+        if not self.following:
+            return self.saved_input
+        return super().get_current_input()
+    
+    def replace_current_line(self, new_command: str):
+        self.follow()
+        super().replace_current_line(new_command)
+    
+    def on_clear(self, event):
+        self.clear_terminal()
+        return "break"
+    
+    def clear_terminal(self):
+        """Clear the terminal and its line store"""
+        self.store.clear()
+        self.window_start = 0
+        self.saved_input = ""
+        self.following = True
+        super().clear_terminal()
+    
+    def save_output(self, filename: str):
+        """Save archived and stored output to file"""
+        try:
+            with open(filename, 'w') as f:
+                if self.archive:
+                    self.archive.export(f)
+                self.store.export(f)
+        except Exception as e:
+            self.write_output(f"Error saving output: {str(e)}\n", "red")
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Audit log of executed commands, written in batches by a background thread
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional
+import logging
+
+from utils.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """Queues command audit entries; a writer thread inserts them in batched transactions.
+
+    record() only puts the entry on a queue, so commands run on many hosts at
+    once never wait for the database. The writer gathers entries for up to
+    flush_interval (or batch_size entries) and writes each batch in one
+    transaction.
+    """
+    
+    def __init__(self, db_manager, flush_interval: Optional[float] = None, batch_size: Optional[int] = None,
+                 retention_days: Optional[float] = None):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval or config_manager.get('audit.flush_interval', 1.0)
+        self.batch_size = batch_size or config_manager.get('audit.batch_size', 500)
+        self.retention_days = config_manager.get('audit.retention_days', 90) if retention_days is None else retention_days
+        self._pending: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+    
+    def record(self, entry: Dict[str, Any]):
+        """Queue an entry (host, username, command, exit_code, started_at, duration, output_size)"""
+        if entry.get('host') and entry.get('command'):
+            entry.setdefault('started_at', time.time())
+            self._pending.put(entry)
+    
+    def query(self, host: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Entries newest first, including everything recorded so far"""
+        self.flush()
+        return self.db_manager.get_command_audit(host, since, until, limit)
+    
+    def flush(self, timeout: float = 5.0):
+        """Wait until everything recorded so far is written"""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._pending.put({'flush': done})
+        done.wait(timeout)
+    
+    def close(self):
+        """Write what is pending and stop the writer"""
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join(timeout=5)
+    
+    def _prune(self):
+        if not self.retention_days:
+            return
+        try:
+            removed = self.db_manager.delete_command_audit(time.time() - self.retention_days * 86400)
+            if removed:
+                logger.info(f"Removed {removed} audit entries older than {self.retention_days} days")
+        except Exception as e:
+            logger.error(f"Failed to prune the audit log: {e}")
+    
+    def _run(self):
+        self._prune()
+        running = True
+        while running:
+            # Block until there is work, then gather more for up to flush_interval
+            item = self._pending.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                elif 'flush' in item:
+                    waiters.append(item['flush'])
+                else:
+                    batch.append(item)
+                if not running or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            
+            try:
+                self.db_manager.record_command_audit(batch)
+            except Exception as e:
+                logger.error(f"Failed to save {len(batch)} audit entries: {e}")
+            for waiter in waiters:
+                waiter.set()
\ No newline at end of file
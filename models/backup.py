@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Online backups of the SQLite database into app_paths.backups_dir
+
+Backups are taken with SQLite's backup API a few pages at a time while the
+application keeps running. The source connection holds one read transaction
+for the whole copy: in WAL mode that pins a snapshot, so other connections
+keep writing and the backup never restarts because of them.
+
+Usage: python -m models.backup [create | list | restore <backup>]
+"""
+
+import argparse
+import gzip
+import itertools
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import logging
+
+from utils.config import app_paths, config_manager
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "ssh_client-"
+# Wait this long after startup before a scheduled backup competes with loading
+STARTUP_DELAY = 60
+
+
+def list_backups(directory: Optional[Union[str, Path]] = None) -> List[Path]:
+    """Finished backups, newest first"""
+    directory = Path(directory or app_paths.backups_dir)
+    backups = [path for path in directory.glob(f"{BACKUP_PREFIX}*")
+               if path.name.endswith((".db", ".db.gz"))]
+    return sorted(backups, key=lambda path: path.name, reverse=True)
+
+
+def _claim_backup_name(directory: Path, compress: bool) -> Tuple[Path, Path]:
+    # Microseconds keep backups taken in the same second apart; the exclusive create of the
+    # partial file settles the rare exact tie with a _1, _2... suffix (sorting after the first)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    for attempt in itertools.count():
+        name = f"{BACKUP_PREFIX}{stamp}{f'_{attempt}' if attempt else ''}.db"
+        path = directory / (name + (".gz" if compress else ""))
+        partial = directory / (name + ".partial")
+        if path.exists():
+            continue
+        try:
+            partial.touch(exist_ok=False)
+        except FileExistsError:
+            continue
+        return path, partial
+
+
+def backup_database(db_path: Union[str, Path], directory: Optional[Union[str, Path]] = None,
+                    compress: Optional[bool] = None, step_pages: Optional[int] = None,
+                    step_sleep: Optional[float] = None) -> Path:
+    """Copy a live database into a timestamped backup file and return its path"""
+    if compress is None:
+        compress = config_manager.get('backup.compress', True)
+    step_pages = step_pages or config_manager.get('backup.step_pages', 256)
+    step_sleep = config_manager.get('backup.step_sleep', 0.005) if step_sleep is None else step_sleep
+    directory = Path(directory or app_paths.backups_dir)
+    
+    started = time.monotonic()
+    source = sqlite3.connect(str(db_path), timeout=10.0)
+    # Written under a temporary name so list_backups() never sees a partial file
+    path, partial = _claim_backup_name(directory, compress)
+    target = sqlite3.connect(str(partial))
+    try:
+        # A read transaction pins the WAL snapshot the copy is taken from
+        source.execute('BEGIN')
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        # backup() only sleeps on SQLITE_BUSY; pausing between steps leaves room for other work
+        source.backup(target, pages=step_pages, progress=lambda status, remaining, total: time.sleep(step_sleep))
+        source.rollback()
+    except BaseException:
+        target.close()
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    target.close()
+    
+    try:
+        if compress:
+            with open(partial, 'rb') as f, gzip.open(path, 'wb', compresslevel=6) as out:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+            partial.unlink()
+        else:
+            os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+        raise
+    logger.info(f"Backed up database to {path} ({path.stat().st_size} bytes, "
+                f"{time.monotonic() - started:.1f}s)")
+    return path
+
+
+def rotate_backups(keep: Optional[int] = None, directory: Optional[Union[str, Path]] = None) -> int:
+    """Delete all but the newest keep backups; returns how many were deleted"""
+    keep = config_manager.get('backup.keep', 7) if keep is None else keep
+    removed = 0
+    for path in list_backups(directory)[max(0, keep):]:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Failed to delete old backup {path}: {e}")
+    return removed
+
+
+def restore_database(backup_path: Union[str, Path], db_path: Union[str, Path], safety_backup: bool = True):
+    """Replace the contents of db_path with a backup.
+
+    The backup is checked first, and unless safety_backup is False the current
+    database is backed up before it is overwritten. The copy goes through the
+    backup API, so the WAL and other open connections stay consistent.
+    """
+    backup_path = Path(backup_path)
+    unpacked = None
+    if backup_path.suffix == ".gz":
+        unpacked = backup_path.with_name(backup_path.name[:-3] + ".restore")
+        with gzip.open(backup_path, 'rb') as f, open(unpacked, 'wb') as out:
+            shutil.copyfileobj(f, out, 1024 * 1024)
+    source_path = unpacked or backup_path
+    
+    try:
+        source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+        try:
+            result = source.execute('PRAGMA quick_check').fetchone()[0]
+            if result != 'ok':
+                raise ValueError(f"Backup {backup_path} is damaged: {result}")
+            if safety_backup and Path(db_path).exists():
+                backup_database(db_path)
+            target = sqlite3.connect(str(db_path), timeout=30.0)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+    finally:
+        if unpacked:
+            unpacked.unlink(missing_ok=True)
+    logger.info(f"Restored database from {backup_path}")
+
+
+class BackupScheduler:
+    """Background thread that backs up the database every interval and rotates old backups.
+
+    A backup is due when the newest file in the backups directory is older than
+    the interval, so several processes sharing the database (desktop and web)
+    do not each take one.
+    """
+    
+    def __init__(self, db_path: Union[str, Path], interval_hours: Optional[float] = None,
+                 keep: Optional[int] = None):
+        self.db_path = db_path
+        self.interval = (interval_hours or config_manager.get('backup.interval_hours', 24)) * 3600
+        self.keep = keep
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="backup", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def due(self) -> bool:
+        backups = list_backups()
+        return not backups or time.time() - backups[0].stat().st_mtime >= self.interval
+    
+    def run_now(self) -> Path:
+        """Take a backup and rotate; one at a time"""
+        with self._lock:
+            path = backup_database(self.db_path)
+            removed = rotate_backups(self.keep)
+            if removed:
+                logger.info(f"Deleted {removed} old backup(s)")
+            return path
+    
+    def _run(self):
+        if self._stop.wait(STARTUP_DELAY):
+            return
+        while True:
+            try:
+                if self.due():
+                    self.run_now()
+            except Exception as e:
+                logger.error(f"Scheduled backup failed: {e}")
+            if self._stop.wait(min(self.interval, 3600)):
+                return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up or restore the SSH Client database")
+    commands = parser.add_subparsers(dest='action', required=True)
+    commands.add_parser('create', help="back up now and rotate old backups")
+    commands.add_parser('list', help="list backups, newest first")
+    restore = commands.add_parser('restore', help="restore a backup (the current database is backed up first)")
+    restore.add_argument('backup', help="backup file, or its name in the backups directory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
+    db_path = app_paths.get_database_path()
+    if args.action == 'create':
+        BackupScheduler(db_path).run_now()
+    elif args.action == 'list':
+        for path in list_backups():
+            print(f"{path.name:<40} {path.stat().st_size:>12} bytes")
+    else:
+        backup = Path(args.backup)
+        if not backup.exists():
+            backup = app_paths.get_backup_path(args.backup)
+        if not backup.exists():
+            parser.error(f"No such backup: {args.backup}")
+        restore_database(backup, db_path)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Versioned read-through cache for DatabaseManager queries
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+_CONTAINERS = (list, dict)
+
+
+def copy_result(value: Any) -> Any:
+    """Copy the lists and dicts of a query result; everything else in a row is immutable"""
+    kind = type(value)
+    if kind is list:
+        return [item if type(item) not in _CONTAINERS else copy_result(item) for item in value]
+    if kind is dict:
+        copied = value.copy()
+        for key, item in copied.items():
+            if type(item) in _CONTAINERS:
+                copied[key] = copy_result(item)
+        return copied
+    return value
+
+
+class QueryCache:
+    """Query results keyed by (method, arguments), stamped with table versions.
+
+    Every table has a version counter that write methods bump after they
+    commit. A result is stored with the versions of the tables it was read
+    from, taken before the query ran, so a read racing a write is stored with
+    the old versions and is never served afterwards. invalidate_all() bumps a
+    generation shared by all tables, e.g. when another process changed the
+    database file.
+
+    At most max_entries results are kept, least recently used first out.
+    Results are copied in and out, so callers may modify what they get.
+    """
+    
+    def __init__(self, enabled: bool = True, max_entries: int = 256):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.versions: Dict[str, int] = {}
+        # Bumped by invalidate_all(), part of every stamp
+        self.generation = 0
+        # key -> (tables, versions of those tables when read, value)
+        self.entries: "OrderedDict[Hashable, Tuple[Tuple[str, ...], Tuple[int, ...], Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def stamp(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return (self.generation,) + tuple(self.versions.get(table, 0) for table in tables)
+    
+    def get(self, key: Hashable, tables: Tuple[str, ...]) -> Tuple[bool, Any]:
+        """(found, copy of the value) for a key whose tables have not changed since it was stored"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == self.stamp(tables):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                value = entry[2]
+            else:
+                self.misses += 1
+                return False, None
+        return True, copy_result(value)
+    
+    def put(self, key: Hashable, tables: Tuple[str, ...], stamp: Tuple[int, ...], value: Any):
+        """Store a copy of value, evicting the least recently used entries beyond max_entries"""
+        value = copy_result(value)
+        with self.lock:
+            self.entries[key] = (tables, stamp, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, *tables: str):
+        """Bump table versions; entries read from them are dropped"""
+        with self.lock:
+            for table in tables:
+                self.versions[table] = self.versions.get(table, 0) + 1
+            # Entries stamped with the old versions can never be served again
+            stale = [key for key, (entry_tables, stamp, _) in self.entries.items()
+                     if stamp != self.stamp(entry_tables)]
+            for key in stale:
+                del self.entries[key]
+    
+    def invalidate_all(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def cached(*tables: str) -> Callable:
+    """Serve a DatabaseManager read from self.cache while its tables are unchanged.
+
+    Only for reads with a small, fixed set of arguments: every distinct call is an entry.
+    """
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache: QueryCache = self.cache
+            if not cache.enabled:
+                return method(self, *args, **kwargs)
+            self.check_external_changes()
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            found, value = cache.get(key, tables)
+            if found:
+                return value
+            stamp = cache.stamp(tables)
+            value = method(self, *args, **kwargs)
+            cache.put(key, tables, stamp, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables: str) -> Callable:
+    """Bump the versions of the tables a DatabaseManager write touches, once it returns"""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.cache.invalidate(*tables)
+        return wrapper
+    return decorator
\ No newline at end of file
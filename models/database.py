@@ -1,26 +1,391 @@
 import sqlite3
 import os
 import json
+import base64
+import time
+import hashlib
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
 
 # Import utilities
 from utils.encryption import EncryptionManager
-from utils.config import app_paths
+from utils.config import app_paths, config_manager
+from .cache import QueryCache, cached, invalidates
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """ALTER TABLE ADD COLUMN unless the column is already there"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _migration_users_auth(cursor: sqlite3.Cursor):
+    # Columns the web login and registration have always expected
+    _add_column(cursor, 'users', 'password_hash', 'TEXT')
+    _add_column(cursor, 'users', 'is_admin', 'BOOLEAN DEFAULT FALSE')
+
+
+def _migration_lookup_indexes(cursor: sqlite3.Cursor):
+    # users.username is already indexed by its UNIQUE constraint
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users (email)')
+    # List views are ordered by name; snippets are also filtered by category
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_connections_name ON connections (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_commands_name ON commands (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_commands_category ON commands (category, name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name)')
+
+
+def _migration_group_membership(cursor: sqlite3.Cursor):
+    # Junction tables replace the JSON lists in groups.members / groups.connections
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_members (
+            group_id INTEGER NOT NULL REFERENCES groups (id) ON DELETE CASCADE,
+            member TEXT NOT NULL,  -- member email
+            PRIMARY KEY (group_id, member)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_members_member ON group_members (member)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS group_connections (
+            group_id INTEGER NOT NULL REFERENCES groups (id) ON DELETE CASCADE,
+            connection_id INTEGER NOT NULL REFERENCES connections (id) ON DELETE CASCADE,
+            PRIMARY KEY (group_id, connection_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_group_connections_connection ON group_connections (connection_id)')
+    
+    # Move the existing lists over; ids of deleted connections are dropped
+    cursor.execute('SELECT id, members, connections FROM groups')
+    for group_id, members, connections in cursor.fetchall():
+        cursor.executemany('INSERT OR IGNORE INTO group_members (group_id, member) VALUES (?, ?)',
+                           [(group_id, member) for member in json.loads(members or '[]')])
+        cursor.executemany('''
+            INSERT OR IGNORE INTO group_connections (group_id, connection_id)
+            SELECT ?, id FROM connections WHERE id = ?
+        ''', [(group_id, connection_id) for connection_id in json.loads(connections or '[]')])
+    cursor.execute('UPDATE groups SET members = NULL, connections = NULL')
+
+
+def _migration_filter_indexes(cursor: sqlite3.Cursor):
+    # Host filters of the paged connection queries
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_connections_host ON connections (host)')
+
+
+def fts5_available(cursor: sqlite3.Cursor) -> bool:
+    """Whether the SQLite library was built with FTS5"""
+    cursor.execute('PRAGMA compile_options')
+    return 'ENABLE_FTS5' in [row[0] for row in cursor.fetchall()]
+
+
+def _migration_full_text_search(cursor: sqlite3.Cursor):
+    # External-content FTS5 indexes over snippets and connections, kept in sync by triggers.
+    # Without FTS5 the search methods fall back to LIKE scans.
+    if not fts5_available(cursor):
+        logger.warning("SQLite has no FTS5; search falls back to LIKE")
+        return
+    indexes = {
+        'commands': ('commands_fts', ['name', 'command', 'category', 'description']),
+        'connections': ('connections_fts', ['name', 'host', 'username', 'notes', 'tags']),
+    }
+    for table, (fts, columns) in indexes.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column_list}, content='{table}', content_rowid='id', prefix='2 3'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        # Index the rows that already exist
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _migration_command_audit(cursor: sqlite3.Cursor):
+    # One row per executed command; queried by host or by time range, newest first
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS command_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            connection_id INTEGER,
+            host TEXT NOT NULL,
+            username TEXT,
+            command TEXT NOT NULL,
+            exit_code INTEGER,
+            started_at REAL NOT NULL,
+            duration REAL,
+            output_size INTEGER
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_command_audit_host ON command_audit (host, started_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_command_audit_started ON command_audit (started_at)')
+
+
+# Tables whose row counts are kept in table_counts
+COUNTED_TABLES = ('connections', 'commands', 'groups', 'users', 'command_audit')
+
+
+def _migration_admin_stats(cursor: sqlite3.Cursor):
+    # Row counts maintained by triggers, so the admin dashboard never runs COUNT(*)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_counts (
+            name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    for table in COUNTED_TABLES:
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO table_counts (name, row_count)
+            VALUES ('{table}', (SELECT COUNT(*) FROM {table}))
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table} BEGIN
+                UPDATE table_counts SET row_count = row_count + 1 WHERE name = '{table}';
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table} BEGIN
+                UPDATE table_counts SET row_count = row_count - 1 WHERE name = '{table}';
+            END
+        ''')
+    
+    # Open SSH transports reported by the desktop session pool, one row per (host, port, username)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ssh_sessions (
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            users INTEGER NOT NULL,  -- terminals sharing the transport
+            opened_at REAL NOT NULL,
+            PRIMARY KEY (host, port, username)
+        ) WITHOUT ROWID
+    ''')
+
+
+def _migration_nocase_prefix_indexes(cursor: sqlite3.Cursor):
+    # Prefix filters compare with COLLATE NOCASE, so "web" finds "Web-01"
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_connections_name_nocase ON connections (name COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_connections_host_nocase ON connections (host COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_commands_name_nocase ON commands (name COLLATE NOCASE)')
+
+
+def _migration_ssh_session_owners(cursor: sqlite3.Cursor):
+    # Rows belong to the desktop process that reported them and expire unless it refreshes
+    # seen_at, so a crashed app's sessions drop out of the stats. The rows are transient.
+    cursor.execute('DROP TABLE IF EXISTS ssh_sessions')
+    cursor.execute('''
+        CREATE TABLE ssh_sessions (
+            owner TEXT NOT NULL,  -- id of the reporting process
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            users INTEGER NOT NULL,  -- terminals sharing the transport
+            opened_at REAL NOT NULL,
+            seen_at REAL NOT NULL,
+            PRIMARY KEY (owner, host, port, username)
+        ) WITHOUT ROWID
+    ''')
+
+
+def fts_query(text: str) -> str:
+    """FTS5 query matching every word of text as a prefix, e.g. 'sys stat' -> "sys"* "stat"*"""
+    words = text.split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+# Forward migrations, applied in order; PRAGMA user_version holds how many ran.
+# Append new ones at the end and never edit one that has shipped.
+MIGRATIONS: List[Tuple[str, Callable[[sqlite3.Cursor], None]]] = [
+    ("users: password_hash and is_admin", _migration_users_auth),
+    ("indexes for login and list lookups", _migration_lookup_indexes),
+    ("group membership junction tables", _migration_group_membership),
+    ("indexes for paged connection filters", _migration_filter_indexes),
+    ("full-text search over snippets and connections", _migration_full_text_search),
+    ("command execution audit log", _migration_command_audit),
+    ("row counters and SSH sessions for admin stats", _migration_admin_stats),
+    ("case-insensitive indexes for prefix filters", _migration_nocase_prefix_indexes),
+    ("SSH sessions per reporting process", _migration_ssh_session_owners),
+]
+
+# Fields update_many() accepts per table -> (column, encrypted)
+UPDATABLE_FIELDS: Dict[str, Dict[str, Tuple[str, bool]]] = {
+    'connections': {
+        'name': ('name', False),
+        'host': ('host', False),
+        'port': ('port', False),
+        'username': ('username', False),
+        'password': ('password_encrypted', True),
+        'key_path': ('private_key_encrypted', True),
+        'description': ('notes', False),
+    },
+    'commands': {
+        'name': ('name', False),
+        'command': ('command', False),
+        'category': ('category', False),
+        'description': ('description', False),
+        'arguments': ('arguments', False),
+    },
+}
+
+# Fields that say which machine a connection reaches; its host facts are dropped when they change
+HOST_FIELDS = ('host', 'port', 'username')
+
+# Connection columns for list views: everything except the secrets
+CONNECTION_LIST_COLUMNS = '''
+    c.id, c.name, c.host, c.port, c.username, c.group_name, c.tags, c.notes,
+    c.password_encrypted IS NOT NULL, c.private_key_encrypted IS NOT NULL,
+    c.created_at, c.updated_at
+'''
+
+# Upper bound for the limit of paged queries
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(name: str, row_id: int) -> str:
+    """Opaque keyset cursor: the (name, id) of the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps([name, row_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(name, id) from a cursor; ValueError if it was not made by encode_cursor"""
+    try:
+        name, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(name, str) or not isinstance(row_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return name, row_id
+
+
+def _prefix_range(column: str, prefix: str, conditions: List[str], params: List[Any]):
+    # A range instead of LIKE so the column's NOCASE index is used; ASCII letters match either case
+    conditions.append(f'{column} COLLATE NOCASE >= ? AND {column} COLLATE NOCASE < ?')
+    params.extend([prefix, prefix + '\U0010ffff'])
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Connection of the pool; commits go through on_commit so the manager can tell them from other processes'"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_commit: Optional[Callable[[Callable[[], None]], None]] = None
+    
+    def commit(self):
+        if self.on_commit and self.in_transaction:
+            self.on_commit(super().commit)
+        else:
+            super().commit()
+
+
 class DatabaseManager:
+    # Applied to every pooled connection; WAL lets readers run alongside a writer
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA cache_size=-8000',
+        'PRAGMA foreign_keys=ON',
+    )
+    # Prepared statements kept per connection, seconds to wait for a writer
+    STATEMENT_CACHE = 256
+    BUSY_TIMEOUT = 10.0
+    
     def __init__(self, db_path: Optional[str] = None):
         if db_path is None:
             db_path = str(app_paths.get_database_path())
         self.db_path = db_path
         self.encryption_manager = EncryptionManager(str(app_paths.get_key_path()))
+        
+        # One connection per thread, opened on first use and reused by every call
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        
+        # Reads of connections, commands and groups are served from memory until a write;
+        # writes from other processes are noticed through PRAGMA data_version, polled at most
+        # every external_check_interval seconds
+        self.cache = QueryCache(enabled=config_manager.get('database.cache_enabled', True),
+                                max_entries=config_manager.get('database.cache_max_entries', 256))
+        self.watch_external_changes = config_manager.get('database.watch_external_changes', True)
+        self.external_check_interval = config_manager.get('database.external_check_interval', 1.0)
+        # Desktop apps refresh their SSH session rows every heartbeat; three missed ones expire them
+        self.ssh_session_ttl = 3 * config_manager.get('ssh.session_heartbeat', 60)
+        self._watch_conn: Optional[sqlite3.Connection] = None
+        self._watch_lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._next_external_check = 0.0
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Pooled connection of the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT, factory=_PooledConnection,
+                                   cached_statements=self.STATEMENT_CACHE, check_same_thread=False)
+            if self.watch_external_changes:
+                conn.on_commit = self._local_commit
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._pool_lock:
+                self._connections.append(conn)
+        elif conn.in_transaction:
+            # A previous call failed before committing; drop its partial writes
+            conn.rollback()
+        return conn
+    
+    def check_external_changes(self):
+        """Drop every cached read once another process has committed; polls at most once per interval"""
+        if not self.watch_external_changes or time.monotonic() < self._next_external_check:
+            return
+        with self._watch_lock:
+            self._next_external_check = time.monotonic() + self.external_check_interval
+            version = self._watch_version()
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+        if changed:
+            self.cache.invalidate_all()
+    
+    def _watch_version(self) -> int:
+        # Called with _watch_lock held. A dedicated connection: its data_version moves on
+        # commits by any other connection, including the pooled ones of this process
+        if self._watch_conn is None:
+            self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._watch_conn.execute('PRAGMA data_version').fetchone()[0]
+    
+    def _local_commit(self, commit: Callable[[], None]):
+        """Commit a pooled connection and move the data_version baseline past it"""
+        # The open write transaction holds the write lock, so nothing else commits before ours
+        with self._watch_lock:
+            before = self._watch_version()
+        commit()
+        with self._watch_lock:
+            # Only when no external change was pending; targeted invalidation covers this write.
+            # A foreign commit landing right after ours is missed until the next one.
+            if before == self._data_version:
+                self._data_version = self._watch_version()
+    
     def encrypt(self, data: str) -> Optional[str]:
         """Encrypt data"""
         if data:
@@ -35,7 +400,7 @@ class DatabaseManager:
     
     def init_database(self):
         """Инициализация базы данных"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Таблица подключений
@@ -95,13 +460,74 @@ class DatabaseManager:
             )
         ''')
         
+        # Кэш фактов об удалённых хостах
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS host_facts (
+                connection_id INTEGER PRIMARY KEY,
+                facts TEXT NOT NULL,  -- JSON object produced by the facts probe
+                collected_at REAL NOT NULL  -- unix timestamp
+            )
+        ''')
+        
+        # История команд терминала (connection_id = 0 - без подключения)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS command_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                connection_id INTEGER NOT NULL DEFAULT 0,
+                command TEXT NOT NULL,
+                command_hash TEXT NOT NULL,  -- sha1 of the command, deduplicates via the unique index
+                use_count INTEGER NOT NULL DEFAULT 1,
+                last_used REAL NOT NULL  -- unix timestamp
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_command_history_hash
+            ON command_history (connection_id, command_hash)
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_command_history_last_used ON command_history (last_used)')
+        
         conn.commit()
-        conn.close()
+        self.reload()
+    
+    def reload(self):
+        """Migrate and re-detect features, e.g. after a backup replaced the database contents"""
+        self.migrate()
+        cursor = self._connect().execute("SELECT 1 FROM sqlite_master WHERE name = 'commands_fts'")
+        self.full_text_search = cursor.fetchone() is not None
+        self.cache.invalidate_all()
+    
+    def schema_version(self) -> int:
+        """Number of migrations applied to the database"""
+        return self._connect().execute('PRAGMA user_version').fetchone()[0]
+    
+    def migrate(self):
+        """Apply pending migrations, each in its own transaction"""
+        conn = self._connect()
+        
+        while self.schema_version() < len(MIGRATIONS):
+            # BEGIN IMMEDIATE takes the write lock, so the desktop and web apps
+            # starting together cannot both apply the same migration
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                break
+            description, migration = MIGRATIONS[version]
+            try:
+                migration(conn.cursor())
+                conn.execute(f'PRAGMA user_version = {version + 1}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.error(f"Database migration {version + 1} failed: {description}")
+                raise
+            logger.info(f"Applied database migration {version + 1}: {description}")
     
+    @invalidates('connections')
     def add_connection(self, name: str, host: str, port: int = 22, username: Optional[str] = None, 
                       password: Optional[str] = None, key_path: Optional[str] = None, description: Optional[str] = None) -> int:
         """Add a new connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -117,13 +543,12 @@ class DatabaseManager:
         
         connection_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         logger.info(f"Added connection: {name}")
         return connection_id if connection_id is not None else 0
     
     def get_all_connections(self) -> List[Dict[str, Any]]:
         """Get all connections"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM connections ORDER BY name')
@@ -139,17 +564,126 @@ class DatabaseManager:
                 'username': row[4],
                 'password': self.decrypt(row[5]) if row[5] else None,
                 'key_path': self.decrypt(row[6]) if row[6] else None,
-                'description': row[7],
-                'created_at': row[8],
-                'updated_at': row[9]
+                'description': row[10],
+                'created_at': row[11],
+                'updated_at': row[12]
             })
         
-        conn.close()
         return connections
     
+    @cached('connections')
+    def list_connections(self) -> List[Dict[str, Any]]:
+        """Get all connections for list views, without secrets (nothing is decrypted)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'SELECT {CONNECTION_LIST_COLUMNS} FROM connections c ORDER BY c.name')
+        return [self._connection_summary(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _connection_summary(row) -> Dict[str, Any]:
+        # Row selected with CONNECTION_LIST_COLUMNS
+        return {
+            'id': row[0],
+            'name': row[1],
+            'host': row[2],
+            'port': row[3],
+            'username': row[4],
+            'group_name': row[5],
+            'tags': row[6],
+            'description': row[7],
+            'has_password': bool(row[8]),
+            'has_key': bool(row[9]),
+            'created_at': row[10],
+            'updated_at': row[11]
+        }
+    
+    def query_connections(self, cursor: Optional[str] = None, limit: int = 100, q: Optional[str] = None,
+                          host: Optional[str] = None, group_id: Optional[int] = None,
+                          tag: Optional[str] = None) -> Dict[str, Any]:
+        """One page of connections (without secrets) ordered by name.
+
+        q and host are case-insensitive prefixes; tag matches one entry of the comma-separated
+        tags. Returns {'items': [...], 'next_cursor': cursor or None}.
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        if q:
+            _prefix_range('c.name', q, conditions, params)
+        if host:
+            _prefix_range('c.host', host, conditions, params)
+        if group_id is not None:
+            conditions.append('c.id IN (SELECT connection_id FROM group_connections WHERE group_id = ?)')
+            params.append(group_id)
+        if tag:
+            conditions.append("instr(',' || REPLACE(COALESCE(c.tags, ''), ' ', '') || ',', ?) > 0")
+            params.append(f",{tag.strip()},")
+        
+        return self._fetch_page(f'SELECT {CONNECTION_LIST_COLUMNS} FROM connections c', 'c.name', 'c.id',
+                                conditions, params, cursor, limit, self._connection_summary)
+    
+    def _fetch_page(self, select: str, name_column: str, id_column: str, conditions: List[str],
+                    params: List[Any], cursor: Optional[str], limit: int, to_item: Callable) -> Dict[str, Any]:
+        """Keyset page: rows after the cursor's (name, id), one extra row tells whether more follow"""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if cursor:
+            conditions = conditions + [f'({name_column}, {id_column}) > (?, ?)']
+            params = params + list(decode_cursor(cursor))
+        
+        query = select
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY {name_column}, {id_column} LIMIT ?'
+        
+        db_cursor = self._connect().cursor()
+        db_cursor.execute(query, params + [limit + 1])
+        items = [to_item(row) for row in db_cursor.fetchall()]
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1]['name'], items[-1]['id'])
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def search_connections(self, text: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Connections whose name, host, username, notes or tags match every word of text as a prefix"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if self.full_text_search:
+            match = fts_query(text)
+            if not match:
+                return []
+            # bm25 weights per column: name, host, username, notes, tags
+            cursor.execute(f'''
+                SELECT {CONNECTION_LIST_COLUMNS}
+                FROM connections_fts JOIN connections c ON c.id = connections_fts.rowid
+                WHERE connections_fts MATCH ?
+                ORDER BY bm25(connections_fts, 10.0, 5.0, 2.0, 1.0, 3.0)
+                LIMIT ?
+            ''', (match, limit))
+        else:
+            where, params = self._like_all_words(text, ['c.name', 'c.host', 'c.username', 'c.notes', 'c.tags'])
+            if not params:
+                return []
+            cursor.execute(f'SELECT {CONNECTION_LIST_COLUMNS} FROM connections c WHERE {where} ORDER BY c.name LIMIT ?',
+                           params + [limit])
+        
+        return [self._connection_summary(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _like_all_words(text: str, columns: List[str]) -> Tuple[str, List[Any]]:
+        # Fallback without FTS5: every word must appear in one of the columns
+        conditions = []
+        params: List[Any] = []
+        for word in text.split():
+            conditions.append('(' + ' OR '.join(f'{column} LIKE ?' for column in columns) + ')')
+            params.extend([f'%{word}%'] * len(columns))
+        return ' AND '.join(conditions), params
+    
     def get_connection(self, connection_id: int) -> Optional[Dict[str, Any]]:
-        """Get connection by ID"""
-        conn = sqlite3.connect(self.db_path)
+        """Get connection by ID, with its secrets decrypted"""
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM connections WHERE id = ?', (connection_id,))
@@ -164,20 +698,20 @@ class DatabaseManager:
                 'username': row[4],
                 'password': self.decrypt(row[5]) if row[5] else None,
                 'key_path': self.decrypt(row[6]) if row[6] else None,
-                'description': row[7],
-                'created_at': row[8],
-                'updated_at': row[9]
+                'description': row[10],
+                'created_at': row[11],
+                'updated_at': row[12]
             }
         else:
             connection = None
         
-        conn.close()
         return connection
     
+    @invalidates('commands')
     def add_command(self, name: str, command: str, category: Optional[str] = None, 
                    description: Optional[str] = None, arguments: Optional[str] = None) -> int:
         """Add a new command"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -187,13 +721,13 @@ class DatabaseManager:
         
         command_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         logger.info(f"Added command: {name}")
         return command_id if command_id is not None else 0
     
+    @cached('commands')
     def get_all_commands(self) -> List[Dict[str, Any]]:
         """Get all commands"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM commands ORDER BY name')
@@ -211,12 +745,12 @@ class DatabaseManager:
                 'created_at': row[6]
             })
         
-        conn.close()
         return commands
     
+    @cached('commands')
     def get_command(self, command_id: int) -> Optional[Dict[str, Any]]:
         """Get command by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM commands WHERE id = ?', (command_id,))
@@ -235,12 +769,64 @@ class DatabaseManager:
         else:
             command = None
         
-        conn.close()
         return command
     
+    def query_commands(self, cursor: Optional[str] = None, limit: int = 100, q: Optional[str] = None,
+                       category: Optional[str] = None) -> Dict[str, Any]:
+        """One page of command snippets ordered by name; q is a case-insensitive name prefix"""
+        conditions: List[str] = []
+        params: List[Any] = []
+        if q:
+            _prefix_range('name', q, conditions, params)
+        if category:
+            conditions.append('category = ?')
+            params.append(category)
+        
+        return self._fetch_page('SELECT id, name, command, category, description, arguments, created_at FROM commands',
+                                'name', 'id', conditions, params, cursor, limit, self._command_row)
+    
+    def search_commands(self, text: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Snippets matching every word of text as a prefix, best matches first"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if self.full_text_search:
+            match = fts_query(text)
+            if not match:
+                return []
+            # bm25 weights per column: name, command, category, description
+            cursor.execute('''
+                SELECT c.id, c.name, c.command, c.category, c.description, c.arguments, c.created_at
+                FROM commands_fts JOIN commands c ON c.id = commands_fts.rowid
+                WHERE commands_fts MATCH ?
+                ORDER BY bm25(commands_fts, 10.0, 4.0, 2.0, 1.0)
+                LIMIT ?
+            ''', (match, limit))
+        else:
+            where, params = self._like_all_words(text, ['name', 'command', 'category', 'description'])
+            if not params:
+                return []
+            cursor.execute(f'SELECT id, name, command, category, description, arguments, created_at '
+                           f'FROM commands WHERE {where} ORDER BY name LIMIT ?', params + [limit])
+        
+        return [self._command_row(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _command_row(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'name': row[1],
+            'command': row[2],
+            'category': row[3],
+            'description': row[4],
+            'arguments': row[5],
+            'created_at': row[6]
+        }
+    
+    @invalidates('commands')
     def update_command(self, command_id: int, **kwargs) -> bool:
         """Update command"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Prepare update fields
@@ -277,24 +863,24 @@ class DatabaseManager:
         else:
             success = False
         
-        conn.close()
         return success
     
+    @invalidates('commands')
     def delete_command(self, command_id: int) -> bool:
         """Delete command"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM commands WHERE id = ?', (command_id,))
         conn.commit()
-        conn.close()
         
         logger.info(f"Deleted command ID: {command_id}")
         return True
     
+    @invalidates('connections')
     def update_connection(self, connection_id: int, **kwargs) -> bool:
         """Update connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         # Prepare update fields
@@ -333,6 +919,7 @@ class DatabaseManager:
         values.append(connection_id)
         
         if update_fields:
+            self._forget_moved_host_facts(cursor, [(connection_id, kwargs)])
             query = f"UPDATE connections SET {', '.join(update_fields)} WHERE id = ?"
             cursor.execute(query, values)
             conn.commit()
@@ -340,132 +927,390 @@ class DatabaseManager:
         else:
             success = False
         
-        conn.close()
         return success
     
+    @invalidates('connections', 'groups')
     def delete_connection(self, connection_id: int) -> bool:
         """Delete connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM connections WHERE id = ?', (connection_id,))
+        cursor.execute('DELETE FROM host_facts WHERE connection_id = ?', (connection_id,))
         conn.commit()
-        conn.close()
         
         logger.info(f"Deleted connection ID: {connection_id}")
         return True
     
-    def add_group(self, group_data: Dict[str, Any]) -> int:
-        """Add a new group"""
-        conn = sqlite3.connect(self.db_path)
+    @invalidates('connections')
+    def add_connections_bulk(self, connections: List[Dict[str, Any]]) -> List[int]:
+        """Add many connections (dicts as returned by get_connection) in one transaction"""
+        if not connections:
+            return []
+        passwords = self.encryption_manager.encrypt_many([c.get('password') for c in connections])
+        key_paths = self.encryption_manager.encrypt_many([c.get('key_path') for c in connections])
+        rows = [
+            (c['name'], c['host'], c.get('port') or 22, c['username'], password, key_path, c.get('description'))
+            for c, password, key_path in zip(connections, passwords, key_paths)
+        ]
+        
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT INTO connections (name, host, port, username, password_encrypted, 
+                                       private_key_encrypted, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            connection_ids = self._inserted_ids(cursor, len(rows))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        logger.info(f"Added {len(rows)} connections")
+        return connection_ids
+    
+    @invalidates('commands')
+    def add_commands_bulk(self, commands: List[Dict[str, Any]]) -> List[int]:
+        """Add many command snippets in one transaction"""
+        if not commands:
+            return []
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT INTO commands (name, command, category, description, arguments)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (c['name'], c['command'], c.get('category'), c.get('description'), c.get('arguments'))
+                for c in commands
+            ])
+            command_ids = self._inserted_ids(cursor, len(commands))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        logger.info(f"Added {len(commands)} commands")
+        return command_ids
+    
+    @staticmethod
+    def _inserted_ids(cursor: sqlite3.Cursor, count: int) -> List[int]:
+        # The transaction holds the write lock, so the rows just inserted got consecutive ids
+        cursor.execute('SELECT last_insert_rowid()')
+        last_id = cursor.fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+    
+    @staticmethod
+    def _forget_moved_host_facts(cursor: sqlite3.Cursor, rows: List[Tuple[int, Dict[str, Any]]]):
+        # Called before the update: drops the facts of rows whose host, port or username
+        # differs from the new value (all rows change the same fields)
+        moved = [name for name in HOST_FIELDS if name in rows[0][1]]
+        if not moved:
+            return
+        changed = ' OR '.join(f'{name} IS NOT ?' for name in moved)
+        cursor.executemany(
+            f'DELETE FROM host_facts WHERE connection_id = ? AND EXISTS '
+            f'(SELECT 1 FROM connections WHERE id = ? AND ({changed}))',
+            [(row_id, row_id, *(values[name] for name in moved)) for row_id, values in rows]
+        )
+    
+    @invalidates('connections', 'commands')
+    def update_many(self, table: str, changes: Dict[int, Dict[str, Any]]) -> int:
+        """Apply {id: {field: value}} changes to connections or commands in one transaction"""
+        fields = UPDATABLE_FIELDS[table]
+        
+        # Rows changing the same fields share one statement and one executemany
+        batches: Dict[Tuple[str, ...], List[Tuple[int, Dict[str, Any]]]] = {}
+        for row_id, values in changes.items():
+            names = tuple(name for name in fields if name in values)
+            if names:
+                batches.setdefault(names, []).append((row_id, values))
+        
+        conn = self._connect()
         cursor = conn.cursor()
+        updated = 0
+        try:
+            for names, rows in batches.items():
+                # Encrypted fields are encrypted column by column, as one batch each
+                columns = []
+                for name in names:
+                    column_values = [row_values[name] for _, row_values in rows]
+                    if fields[name][1]:
+                        column_values = self.encryption_manager.encrypt_many(column_values)
+                    columns.append(column_values)
+                
+                assignments = [f'{fields[name][0]} = ?' for name in names]
+                if table == 'connections':
+                    assignments.append('updated_at = CURRENT_TIMESTAMP')
+                    self._forget_moved_host_facts(cursor, rows)
+                cursor.executemany(f"UPDATE {table} SET {', '.join(assignments)} WHERE id = ?",
+                                   [(*row, row_id) for row, (row_id, _) in zip(zip(*columns), rows)])
+                updated += cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         
-        # Convert lists to JSON strings
-        members_json = json.dumps(group_data.get('members', []))
-        connections_json = json.dumps(group_data.get('connections', []))
+        logger.info(f"Updated {updated} rows in {table}")
+        return updated
+    
+    @invalidates('connections', 'commands', 'groups')
+    def delete_many(self, table: str, ids: List[int]) -> int:
+        """Delete connections or commands by ID in one transaction"""
+        if table not in UPDATABLE_FIELDS:
+            raise KeyError(table)
+        conn = self._connect()
+        cursor = conn.cursor()
+        params = [(row_id,) for row_id in ids]
+        try:
+            cursor.executemany(f'DELETE FROM {table} WHERE id = ?', params)
+            deleted = cursor.rowcount
+            if table == 'connections':
+                cursor.executemany('DELETE FROM host_facts WHERE connection_id = ?', params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        logger.info(f"Deleted {deleted} rows from {table}")
+        return deleted
+    
+    @invalidates('groups')
+    def add_group(self, group_data: Dict[str, Any]) -> int:
+        """Add a new group with its members and connections"""
+        conn = self._connect()
+        cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO groups (name, description, members, connections)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO groups (name, description)
+            VALUES (?, ?)
         ''', (
             group_data['name'],
-            group_data.get('description', ''),
-            members_json,
-            connections_json
+            group_data.get('description', '')
         ))
+        group_id = cursor.lastrowid
+        self._insert_members(cursor, group_id, group_data.get('members', []))
+        self._insert_group_connections(cursor, group_id, group_data.get('connections', []))
         
         conn.commit()
-        group_id = cursor.lastrowid
         logger.info(f"Added group: {group_data['name']}")
         return group_id
     
+    @cached('groups')
     def get_group(self, group_id: int) -> Optional[Dict[str, Any]]:
         """Get a group by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM groups WHERE id = ?', (group_id,))
+        cursor.execute('SELECT id, name, description, created_at, updated_at FROM groups WHERE id = ?', (group_id,))
         row = cursor.fetchone()
+        if not row:
+            return None
         
-        if row:
-            group = {
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'members': json.loads(row[3]) if row[3] else [],
-                'connections': json.loads(row[4]) if row[4] else [],
-                'created_at': row[5],
-                'updated_at': row[6]
-            }
-        else:
-            group = None
-        
-        conn.close()
+        group = self._group_row(row)
+        group['members'] = self.get_group_members(group_id)
+        group['connections'] = self.get_group_connection_ids(group_id)
         return group
     
+    @cached('groups')
     def get_all_groups(self) -> List[Dict[str, Any]]:
         """Get all groups"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM groups ORDER BY name')
-        rows = cursor.fetchall()
+        cursor.execute('SELECT id, name, description, created_at, updated_at FROM groups ORDER BY name')
+        groups = [self._group_row(row) for row in cursor.fetchall()]
+        by_id = {}
+        for group in groups:
+            group['members'] = []
+            group['connections'] = []
+            by_id[group['id']] = group
+        
+        # Two ordered scans of the junction tables instead of decoding JSON per group
+        cursor.execute('SELECT group_id, member FROM group_members ORDER BY group_id, member')
+        for group_id, member in cursor.fetchall():
+            by_id[group_id]['members'].append(member)
+        cursor.execute('SELECT group_id, connection_id FROM group_connections ORDER BY group_id, connection_id')
+        for group_id, connection_id in cursor.fetchall():
+            by_id[group_id]['connections'].append(connection_id)
         
-        groups = []
-        for row in rows:
-            groups.append({
-                'id': row[0],
-                'name': row[1],
-                'description': row[2],
-                'members': json.loads(row[3]) if row[3] else [],
-                'connections': json.loads(row[4]) if row[4] else [],
-                'created_at': row[5],
-                'updated_at': row[6]
-            })
-        
-        conn.close()
         return groups
     
+    @staticmethod
+    def _group_row(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'created_at': row[3],
+            'updated_at': row[4]
+        }
+    
+    @invalidates('groups')
     def update_group(self, group_id: int, group_data: Dict[str, Any]):
-        """Update a group"""
-        conn = sqlite3.connect(self.db_path)
+        """Update a group; members and connections are replaced when given"""
+        conn = self._connect()
         cursor = conn.cursor()
         
-        # Convert lists to JSON strings
-        members_json = json.dumps(group_data.get('members', []))
-        connections_json = json.dumps(group_data.get('connections', []))
-        
         cursor.execute('''
             UPDATE groups 
-            SET name = ?, description = ?, members = ?, connections = ?, updated_at = CURRENT_TIMESTAMP
+            SET name = ?, description = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         ''', (
             group_data['name'],
             group_data.get('description', ''),
-            members_json,
-            connections_json,
             group_id
         ))
+        if 'members' in group_data:
+            cursor.execute('DELETE FROM group_members WHERE group_id = ?', (group_id,))
+            self._insert_members(cursor, group_id, group_data['members'])
+        if 'connections' in group_data:
+            cursor.execute('DELETE FROM group_connections WHERE group_id = ?', (group_id,))
+            self._insert_group_connections(cursor, group_id, group_data['connections'])
         
         conn.commit()
         logger.info(f"Updated group: {group_data['name']}")
-        
-        conn.close()
     
+    @invalidates('groups')
     def delete_group(self, group_id: int):
-        """Delete a group"""
-        conn = sqlite3.connect(self.db_path)
+        """Delete a group (its memberships go with it)"""
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM groups WHERE id = ?', (group_id,))
         conn.commit()
-        conn.close()
         
         logger.info(f"Deleted group: {group_id}")
     
+    def _insert_members(self, cursor: sqlite3.Cursor, group_id: int, members: List[str]):
+        cursor.executemany('INSERT OR IGNORE INTO group_members (group_id, member) VALUES (?, ?)',
+                           [(group_id, member) for member in members])
+    
+    def _insert_group_connections(self, cursor: sqlite3.Cursor, group_id: int, connection_ids: List[int]):
+        # Unknown connection ids are skipped instead of failing the foreign key
+        cursor.executemany('''
+            INSERT OR IGNORE INTO group_connections (group_id, connection_id)
+            SELECT ?, id FROM connections WHERE id = ?
+        ''', [(group_id, connection_id) for connection_id in connection_ids])
+    
+    @cached('groups')
+    def get_group_members(self, group_id: int) -> List[str]:
+        """Member emails of a group"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT member FROM group_members WHERE group_id = ? ORDER BY member', (group_id,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    @invalidates('groups')
+    def add_group_members(self, group_id: int, members: List[str]):
+        """Add members to a group; existing members are left as they are"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        self._insert_members(cursor, group_id, members)
+        cursor.execute('UPDATE groups SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (group_id,))
+        conn.commit()
+    
+    @invalidates('groups')
+    def remove_group_members(self, group_id: int, members: List[str]):
+        """Remove members from a group"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany('DELETE FROM group_members WHERE group_id = ? AND member = ?',
+                           [(group_id, member) for member in members])
+        cursor.execute('UPDATE groups SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (group_id,))
+        conn.commit()
+    
+    @cached('groups')
+    def get_member_groups(self, member: str) -> List[Dict[str, Any]]:
+        """Groups a member belongs to (without their member and connection lists)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT g.id, g.name, g.description, g.created_at, g.updated_at
+            FROM group_members m JOIN groups g ON g.id = m.group_id
+            WHERE m.member = ? ORDER BY g.name
+        ''', (member,))
+        return [self._group_row(row) for row in cursor.fetchall()]
+    
+    @cached('groups')
+    def get_group_connection_ids(self, group_id: int) -> List[int]:
+        """IDs of the connections in a group"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT connection_id FROM group_connections WHERE group_id = ? ORDER BY connection_id',
+                       (group_id,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    @cached('groups', 'connections')
+    def get_group_connections(self, group_id: int) -> List[Dict[str, Any]]:
+        """Connections in a group, without secrets, e.g. to fan a command out"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {CONNECTION_LIST_COLUMNS}
+            FROM group_connections gc JOIN connections c ON c.id = gc.connection_id
+            WHERE gc.group_id = ? ORDER BY c.name
+        ''', (group_id,))
+        return [self._connection_summary(row) for row in cursor.fetchall()]
+    
+    @invalidates('groups')
+    def add_group_connections(self, group_id: int, connection_ids: List[int]):
+        """Add connections to a group; unknown ids are skipped"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        self._insert_group_connections(cursor, group_id, connection_ids)
+        cursor.execute('UPDATE groups SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (group_id,))
+        conn.commit()
+    
+    @invalidates('groups')
+    def remove_group_connections(self, group_id: int, connection_ids: List[int]):
+        """Remove connections from a group"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany('DELETE FROM group_connections WHERE group_id = ? AND connection_id = ?',
+                           [(group_id, connection_id) for connection_id in connection_ids])
+        cursor.execute('UPDATE groups SET updated_at = CURRENT_TIMESTAMP WHERE id = ?', (group_id,))
+        conn.commit()
+    
+    @cached('groups')
+    def get_connection_groups(self, connection_id: int) -> List[Dict[str, Any]]:
+        """Groups that contain a connection"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT g.id, g.name, g.description, g.created_at, g.updated_at
+            FROM group_connections gc JOIN groups g ON g.id = gc.group_id
+            WHERE gc.connection_id = ? ORDER BY g.name
+        ''', (connection_id,))
+        return [self._group_row(row) for row in cursor.fetchall()]
+    
+    @cached('groups')
+    def member_can_access(self, member: str, connection_id: int) -> bool:
+        """Whether a member shares a group with the connection"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT 1 FROM group_members m
+            JOIN group_connections gc ON gc.group_id = m.group_id
+            WHERE m.member = ? AND gc.connection_id = ? LIMIT 1
+        ''', (member, connection_id))
+        return cursor.fetchone() is not None
+    
     def add_user(self, user_data: Dict[str, Any]) -> int:
         """Add a new user (for web app)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -485,10 +1330,13 @@ class DatabaseManager:
     
     def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Get a user by username"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM users WHERE username = ?', (username,))
+        cursor.execute('''
+            SELECT id, username, email, password_hash, is_admin, created_at
+            FROM users WHERE username = ?
+        ''', (username,))
         row = cursor.fetchone()
         
         if row:
@@ -498,21 +1346,22 @@ class DatabaseManager:
                 'email': row[2],
                 'password_hash': row[3],
                 'is_admin': bool(row[4]),
-                'created_at': row[5],
-                'updated_at': row[6]
+                'created_at': row[5]
             }
         else:
             user = None
         
-        conn.close()
         return user
     
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get a user by email"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
+        cursor.execute('''
+            SELECT id, username, email, password_hash, is_admin, created_at
+            FROM users WHERE email = ?
+        ''', (email,))
         row = cursor.fetchone()
         
         if row:
@@ -522,16 +1371,291 @@ class DatabaseManager:
                 'email': row[2],
                 'password_hash': row[3],
                 'is_admin': bool(row[4]),
-                'created_at': row[5],
-                'updated_at': row[6]
+                'created_at': row[5]
             }
         else:
             user = None
         
-        conn.close()
         return user
     
+    def get_host_facts(self, connection_id: int, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Get cached host facts, ignoring entries older than max_age seconds"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT facts, collected_at FROM host_facts WHERE connection_id = ?', (connection_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            return None
+        if max_age is not None and time.time() - row[1] > max_age:
+            return None
+        
+        facts = json.loads(row[0])
+        facts['collected_at'] = row[1]
+        return facts
+    
+    def save_host_facts(self, connection_id: int, facts: Dict[str, Any]):
+        """Store host facts for a connection"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO host_facts (connection_id, facts, collected_at)
+            VALUES (?, ?, ?)
+        ''', (connection_id, json.dumps(facts), facts.get('collected_at', time.time())))
+        
+        conn.commit()
+    
+    def delete_host_facts(self, connection_id: int):
+        """Drop cached host facts for a connection"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM host_facts WHERE connection_id = ?', (connection_id,))
+        conn.commit()
+    
+    def record_command_history(self, entries: List[Dict[str, Any]]):
+        """Merge a batch of history entries (connection_id, command, use_count, last_used)"""
+        if not entries:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO command_history (connection_id, command, command_hash, use_count, last_used)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (connection_id, command_hash) DO UPDATE SET
+                use_count = use_count + excluded.use_count,
+                last_used = MAX(last_used, excluded.last_used)
+        ''', [
+            (entry.get('connection_id') or 0, entry['command'],
+             hashlib.sha1(entry['command'].encode('utf-8')).hexdigest(),
+             entry.get('use_count', 1), entry['last_used'])
+            for entry in entries
+        ])
+        
+        conn.commit()
+    
+    def get_command_history(self, connection_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get command history, oldest first; all connections when connection_id is None"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        query = 'SELECT connection_id, command, use_count, last_used FROM command_history'
+        params = ()
+        if connection_id is not None:
+            query += ' WHERE connection_id = ?'
+            params = (connection_id,)
+        cursor.execute(query + ' ORDER BY last_used', params)
+        
+        history = []
+        for row in cursor.fetchall():
+            history.append({
+                'connection_id': row[0],
+                'command': row[1],
+                'use_count': row[2],
+                'last_used': row[3]
+            })
+        
+        return history
+    
+    def clear_command_history(self, connection_id: Optional[int] = None):
+        """Delete command history of one connection, or all of it"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if connection_id is None:
+            cursor.execute('DELETE FROM command_history')
+        else:
+            cursor.execute('DELETE FROM command_history WHERE connection_id = ?', (connection_id,))
+        conn.commit()
+    
+    def record_command_audit(self, entries: List[Dict[str, Any]]):
+        """Insert a batch of audit entries in one transaction"""
+        if not entries:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO command_audit (connection_id, host, username, command, exit_code,
+                                       started_at, duration, output_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (entry.get('connection_id'), entry['host'], entry.get('username'), entry['command'],
+             entry.get('exit_code'), entry['started_at'], entry.get('duration'), entry.get('output_size'))
+            for entry in entries
+        ])
+        
+        conn.commit()
+    
+    def get_command_audit(self, host: Optional[str] = None, since: Optional[float] = None,
+                          until: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Audit entries newest first, optionally for one host and started within [since, until)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # host + started_at range uses idx_command_audit_host, a range alone idx_command_audit_started
+        query = '''
+            SELECT id, connection_id, host, username, command, exit_code, started_at, duration, output_size
+            FROM command_audit
+        '''
+        conditions, params = [], []
+        if host is not None:
+            conditions.append('host = ?')
+            params.append(host)
+        if since is not None:
+            conditions.append('started_at >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('started_at < ?')
+            params.append(until)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY started_at DESC LIMIT ?'
+        params.append(limit)
+        cursor.execute(query, params)
+        
+        columns = ('id', 'connection_id', 'host', 'username', 'command', 'exit_code',
+                   'started_at', 'duration', 'output_size')
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def delete_command_audit(self, before: float) -> int:
+        """Delete audit entries started before a timestamp; returns how many"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM command_audit WHERE started_at < ?', (before,))
+        conn.commit()
+        return cursor.rowcount
+    
+    def get_table_counts(self) -> Dict[str, int]:
+        """Row counts of COUNTED_TABLES, read from the trigger-maintained counters"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT name, row_count FROM table_counts')
+        return dict(cursor.fetchall())
+    
+    def get_user_stats(self) -> List[Dict[str, Any]]:
+        """Per user: groups joined and distinct connections reachable through them"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT u.id, u.username, u.email, u.is_admin,
+                   COUNT(DISTINCT gm.group_id), COUNT(DISTINCT gc.connection_id)
+            FROM users u
+            LEFT JOIN group_members gm ON gm.member = u.email
+            LEFT JOIN group_connections gc ON gc.group_id = gm.group_id
+            GROUP BY u.id
+            ORDER BY u.username
+        ''')
+        return [{
+            'id': row[0],
+            'username': row[1],
+            'email': row[2],
+            'is_admin': bool(row[3]),
+            'groups_count': row[4],
+            'connections_count': row[5]
+        } for row in cursor.fetchall()]
+    
+    def get_group_stats(self) -> List[Dict[str, Any]]:
+        """Per group: member and connection counts from the junction table primary keys"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT g.id, g.name,
+                   (SELECT COUNT(*) FROM group_members m WHERE m.group_id = g.id),
+                   (SELECT COUNT(*) FROM group_connections c WHERE c.group_id = g.id)
+            FROM groups g
+            ORDER BY g.name
+        ''')
+        return [{
+            'id': row[0],
+            'name': row[1],
+            'members_count': row[2],
+            'connections_count': row[3]
+        } for row in cursor.fetchall()]
+    
+    def set_ssh_session(self, owner: str, host: str, port: int, username: str, users: int):
+        """Record how many of owner's terminals use an SSH transport; 0 removes it.
+
+        Reporting again refreshes seen_at; rows not refreshed for ssh_session_ttl
+        seconds are left out of the stats.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if users > 0:
+            now = time.time()
+            cursor.execute('''
+                INSERT INTO ssh_sessions (owner, host, port, username, users, opened_at, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (owner, host, port, username) DO UPDATE SET users = excluded.users,
+                                                                        seen_at = excluded.seen_at
+            ''', (owner, host, port, username, users, now, now))
+        else:
+            cursor.execute('DELETE FROM ssh_sessions WHERE owner = ? AND host = ? AND port = ? AND username = ?',
+                           (owner, host, port, username))
+        conn.commit()
+    
+    def clear_ssh_sessions(self, owner: Optional[str] = None):
+        """Delete owner's SSH session rows and the expired ones; without owner, delete all"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        if owner is None:
+            cursor.execute('DELETE FROM ssh_sessions')
+        else:
+            cursor.execute('DELETE FROM ssh_sessions WHERE owner = ? OR seen_at < ?',
+                           (owner, time.time() - self.ssh_session_ttl))
+        conn.commit()
+    
+    def get_ssh_session_stats(self) -> Dict[str, Any]:
+        """Open SSH transports, the terminals using them, and transports per host"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # Rows of an app that stopped refreshing them (e.g. it crashed) have expired
+        since = time.time() - self.ssh_session_ttl
+        cursor.execute('SELECT host, COUNT(*) FROM ssh_sessions WHERE seen_at >= ? GROUP BY host ORDER BY host',
+                       (since,))
+        by_host = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(users), 0) FROM ssh_sessions WHERE seen_at >= ?', (since,))
+        transports, terminals = cursor.fetchone()
+        return {'transports': transports, 'terminals': terminals, 'by_host': by_host}
+    
     def close(self):
-        """Close database connection"""
-        # SQLite connections are closed automatically, but we can add cleanup here
-        logger.info("Database manager closed") 
\ No newline at end of file
+        """Close every pooled connection"""
+        with self._pool_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        with self._watch_lock:
+            if self._watch_conn is not None:
+                connections.append(self._watch_conn)
+                self._watch_conn = None
+                self._data_version = None
+        self.cache.invalidate_all()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing database connection: {e}")
+        logger.info("Database manager closed")
+
+
+# Global instance, created on first use so importing stays cheap
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+
+def get_db_manager() -> DatabaseManager:
+    """Shared DatabaseManager: the key is loaded and the schema checked once per process"""
+    global _db_manager
+    with _db_manager_lock:
+        if _db_manager is None:
+            _db_manager = DatabaseManager()
+        return _db_manager 
\ No newline at end of file
@@ -0,0 +1,325 @@
+"""
+Persistent terminal command history with an in-memory search index
+"""
+
+import queue
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from utils.config import config_manager
+
+logger = logging.getLogger(__name__)
+
+# Uses older than this count half as much when ranking
+RANK_HALF_LIFE = 7 * 24 * 3600
+
+
+class _Entry:
+    __slots__ = ('connection_id', 'command', 'folded', 'use_count', 'last_used', 'position')
+    
+    def __init__(self, connection_id: int, command: str, use_count: int, last_used: float):
+        self.connection_id = connection_id
+        self.command = command
+        self.folded = command.lower()
+        self.use_count = use_count
+        self.last_used = last_used
+        self.position = -1
+    
+    def score(self, now: float) -> float:
+        return self.use_count * 0.5 ** (max(0.0, now - self.last_used) / RANK_HALF_LIFE)
+
+
+class HistoryIndex:
+    """Deduplicated history entries indexed by character bitmaps.
+
+    Every entry owns one bit position; positions grow with recency, so the
+    highest set bit is the most recent use. Each character (and each
+    connection) has an int bitmap of the positions whose command contains it,
+    and a search ANDs the bitmaps of the query characters before touching any
+    command string.
+    """
+    
+    def __init__(self):
+        self.entries: Dict[Tuple[int, str], _Entry] = {}
+        self.by_position: Dict[int, _Entry] = {}
+        self.char_bits: Dict[str, int] = {}
+        self.connection_bits: Dict[int, int] = {}
+        self.live_bits = 0
+        self.next_position = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def add(self, connection_id: int, command: str, use_count: int = 1, last_used: Optional[float] = None):
+        """Record a use of a command, moving it to the most recent position"""
+        last_used = last_used or time.time()
+        key = (connection_id, command)
+        entry = self.entries.get(key)
+        if entry:
+            entry.use_count += use_count
+            entry.last_used = max(entry.last_used, last_used)
+        else:
+            entry = _Entry(connection_id, command, use_count, last_used)
+            self.entries[key] = entry
+        self._move(entry)
+        
+        # Positions of re-used commands leave holes; renumber once they dominate
+        if self.next_position > 2 * len(self.entries) + 1024:
+            self.rebuild()
+    
+    def _move(self, entry: _Entry):
+        # Clear the old position (if any) and set the new one in every bitmap
+        old = entry.position
+        new = self.next_position
+        self.next_position += 1
+        bit = 1 << new
+        if old >= 0:
+            bit |= 1 << old
+            del self.by_position[old]
+        entry.position = new
+        self.by_position[new] = entry
+        
+        for ch in set(entry.folded):
+            self.char_bits[ch] = self.char_bits.get(ch, 0) ^ bit
+        cid = entry.connection_id
+        self.connection_bits[cid] = self.connection_bits.get(cid, 0) ^ bit
+        self.live_bits ^= bit
+    
+    def rebuild(self, entries: Optional[List[_Entry]] = None):
+        """Renumber positions by recency and rebuild every bitmap in one pass"""
+        if entries is None:
+            entries = list(self.entries.values())
+        entries.sort(key=lambda entry: entry.last_used)
+        
+        size = (len(entries) + 7) // 8
+        char_bytes: Dict[str, bytearray] = {}
+        connection_bytes: Dict[int, bytearray] = {}
+        self.by_position = {}
+        for position, entry in enumerate(entries):
+            entry.position = position
+            self.by_position[position] = entry
+            index, bit = position >> 3, 1 << (position & 7)
+            for ch in set(entry.folded):
+                bits = char_bytes.get(ch)
+                if bits is None:
+                    bits = char_bytes[ch] = bytearray(size)
+                bits[index] |= bit
+            bits = connection_bytes.get(entry.connection_id)
+            if bits is None:
+                bits = connection_bytes[entry.connection_id] = bytearray(size)
+            bits[index] |= bit
+        
+        self.char_bits = {ch: int.from_bytes(bits, 'little') for ch, bits in char_bytes.items()}
+        self.connection_bits = {cid: int.from_bytes(bits, 'little') for cid, bits in connection_bytes.items()}
+        self.live_bits = (1 << len(entries)) - 1
+        self.next_position = len(entries)
+    
+    def load(self, rows: List[Dict[str, Any]]):
+        """Bulk load stored entries (dicts with connection_id, command, use_count, last_used)"""
+        for row in rows:
+            key = (row.get('connection_id') or 0, row['command'])
+            entry = self.entries.get(key)
+            if entry:
+                entry.use_count += row.get('use_count', 1)
+                entry.last_used = max(entry.last_used, row['last_used'])
+            else:
+                self.entries[key] = _Entry(key[0], key[1], row.get('use_count', 1), row['last_used'])
+        self.rebuild()
+    
+    def _newest_first(self, mask: int):
+        # Walk set bits from the top, one 64-bit word at a time
+        words = memoryview(mask.to_bytes(((mask.bit_length() + 63) // 64) * 8, 'little')).cast('Q')
+        for index in range(len(words) - 1, -1, -1):
+            word = words[index]
+            while word:
+                bit = word.bit_length() - 1
+                word ^= 1 << bit
+                yield self.by_position[index * 64 + bit]
+    
+    def _candidates(self, folded: str, connection_id: Optional[int]) -> int:
+        mask = self.live_bits if connection_id is None else self.connection_bits.get(connection_id, 0)
+        for ch in set(folded):
+            if not mask:
+                break
+            mask &= self.char_bits.get(ch, 0)
+        return mask
+    
+    @staticmethod
+    def _fuzzy_pattern(folded: str):
+        # "abc" -> a[^b]*b[^c]*c: takes the leftmost next character, never backtracks
+        parts = [re.escape(folded[0])]
+        for ch in folded[1:]:
+            parts.append(f"[^{re.escape(ch)}]*{re.escape(ch)}")
+        return re.compile(''.join(parts))
+    
+    def search(self, query: str, connection_id: Optional[int] = None, limit: int = 20,
+               scan_limit: int = 100) -> List[Dict[str, Any]]:
+        """Fuzzy search: commands containing the query characters in order.
+
+        The scan_limit most recent matches are ranked: exact substring matches
+        first, then by use count decayed with age.
+        """
+        folded = query.lower()
+        mask = self._candidates(folded, connection_id)
+        pattern = self._fuzzy_pattern(folded) if folded else None
+        
+        matches = []
+        for entry in self._newest_first(mask):
+            if pattern is None or pattern.search(entry.folded):
+                matches.append(entry)
+                if len(matches) >= scan_limit:
+                    break
+        
+        # All connections: merge the same command used on several hosts
+        if connection_id is None:
+            merged: Dict[str, _Entry] = {}
+            for entry in matches:
+                seen = merged.get(entry.command)
+                if seen is None:
+                    merged[entry.command] = _Entry(0, entry.command, entry.use_count, entry.last_used)
+                else:
+                    seen.use_count += entry.use_count
+                    seen.last_used = max(seen.last_used, entry.last_used)
+            matches = list(merged.values())
+        
+        now = time.time()
+        matches.sort(key=lambda entry: (folded in entry.folded, entry.score(now)), reverse=True)
+        return [{
+            'command': entry.command,
+            'connection_id': entry.connection_id if connection_id is not None else None,
+            'use_count': entry.use_count,
+            'last_used': entry.last_used
+        } for entry in matches[:limit]]
+    
+    def recent(self, connection_id: Optional[int] = None, limit: int = 1000) -> List[str]:
+        """Distinct commands by recency, oldest first (for Up/Down navigation)"""
+        mask = self.live_bits if connection_id is None else self.connection_bits.get(connection_id, 0)
+        commands = []
+        seen = set()
+        for entry in self._newest_first(mask):
+            if entry.command not in seen:
+                seen.add(entry.command)
+                commands.append(entry.command)
+                if len(commands) >= limit:
+                    break
+        commands.reverse()
+        return commands
+
+
+class CommandHistory:
+    """Command history shared by all terminals, persisted in batches by a writer thread"""
+    
+    def __init__(self, db_manager, flush_interval: Optional[float] = None, batch_size: Optional[int] = None):
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval or config_manager.get('history.flush_interval', 1.0)
+        self.batch_size = batch_size or config_manager.get('history.batch_size', 200)
+        self.index = HistoryIndex()
+        self.loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+    
+    def add(self, command: str, connection_id: Optional[int] = None):
+        """Record a command; returns immediately, the write happens in the background"""
+        command = command.strip()
+        if not command:
+            return
+        entry = {'connection_id': connection_id or 0, 'command': command, 'use_count': 1, 'last_used': time.time()}
+        with self._lock:
+            self.index.add(entry['connection_id'], command, 1, entry['last_used'])
+        self._pending.put(entry)
+    
+    def search(self, query: str, connection_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Ranked fuzzy search; all connections when connection_id is None"""
+        with self._lock:
+            return self.index.search(query, connection_id, limit)
+    
+    def recent(self, connection_id: Optional[int] = None, limit: int = 1000) -> List[str]:
+        """Recent distinct commands, oldest first"""
+        self.loaded.wait(0.5)
+        with self._lock:
+            return self.index.recent(connection_id, limit)
+    
+    def clear(self, connection_id: Optional[int] = None):
+        """Forget the history of one connection, or all of it"""
+        self.flush()
+        self.db_manager.clear_command_history(connection_id)
+        with self._lock:
+            rows = [] if connection_id is None else [
+                {'connection_id': e.connection_id, 'command': e.command,
+                 'use_count': e.use_count, 'last_used': e.last_used}
+                for e in self.index.entries.values() if e.connection_id != connection_id
+            ]
+            self.index = HistoryIndex()
+            self.index.load(rows)
+    
+    def reload(self):
+        """Rebuild the index from the database, e.g. after a backup was restored"""
+        self.flush()
+        rows = self.db_manager.get_command_history()
+        with self._lock:
+            self.index = HistoryIndex()
+            self.index.load(rows)
+    
+    def flush(self, timeout: float = 5.0):
+        """Wait until everything added so far is written"""
+        done = threading.Event()
+        self._pending.put({'flush': done})
+        done.wait(timeout)
+    
+    def close(self):
+        """Write what is pending and stop the writer"""
+        if self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join(timeout=5)
+    
+    def _load(self):
+        try:
+            rows = self.db_manager.get_command_history()
+            with self._lock:
+                # Commands added before the load finished are replayed on top
+                added = [
+                    {'connection_id': e.connection_id, 'command': e.command,
+                     'use_count': e.use_count, 'last_used': e.last_used}
+                    for e in self.index.entries.values()
+                ]
+                self.index = HistoryIndex()
+                self.index.load(rows + added)
+            logger.info(f"Loaded {len(rows)} history entries")
+        except Exception as e:
+            logger.error(f"Failed to load command history: {e}")
+        finally:
+            self.loaded.set()
+    
+    def _run(self):
+        self._load()
+        running = True
+        while running:
+            # Block until there is work, then gather more for up to flush_interval
+            item = self._pending.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                elif 'flush' in item:
+                    waiters.append(item['flush'])
+                else:
+                    batch.append(item)
+                if not running or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            
+            try:
+                self.db_manager.record_command_history(batch)
+            except Exception as e:
+                logger.error(f"Failed to save command history: {e}")
+            for waiter in waiters:
+                waiter.set()
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""
+Tab completion backed by per-connection prefix tries
+"""
+
+import posixpath
+import shlex
+import threading
+import time
+from typing import Dict, Any, List, Optional, Iterable, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMANDS = ["ls", "cd", "pwd", "whoami", "ps", "top", "df", "du", "cat", "vim", "nano"]
+
+DEFAULT_COMPLETION_TTL = 300
+DIRECTORY_TTL = 30
+
+
+class PrefixTrie:
+    """Minimal prefix trie of strings"""
+    
+    _END = ''
+    
+    def __init__(self, words: Iterable[str] = ()):
+        self.root: Dict[str, Any] = {}
+        self.size = 0
+        for word in words:
+            self.insert(word)
+    
+    def insert(self, word: str):
+        """Add a word to the trie"""
+        if not word:
+            return
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if self._END not in node:
+            node[self._END] = True
+            self.size += 1
+    
+    def __contains__(self, word: str) -> bool:
+        node = self._find(word)
+        return node is not None and self._END in node
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def complete(self, prefix: str, limit: int = 200) -> List[str]:
+        """Get words starting with prefix in lexical order"""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        
+        results = []
+        stack = [(prefix, node)]
+        while stack and len(results) < limit:
+            word, node = stack.pop()
+            if self._END in node:
+                results.append(word)
+            # Reverse so that the smallest child is popped first
+            for char in sorted((c for c in node if c != self._END), reverse=True):
+                stack.append((word + char, node[char]))
+        return results
+    
+    def _find(self, prefix: str) -> Optional[Dict[str, Any]]:
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+
+class _TimedTrie:
+    """Trie together with the time it was filled"""
+    
+    def __init__(self, words: Iterable[str]):
+        self.trie = PrefixTrie(words)
+        self.fetched_at = time.time()
+    
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at <= ttl
+
+
+class _ConnectionCache:
+    """Remote completion data of a single connection"""
+    
+    def __init__(self, ssh_client, facts: Optional[Dict[str, Any]]):
+        self.ssh_client = ssh_client
+        self.facts = facts or {}
+        self.executables: Optional[_TimedTrie] = None
+        self.directories: Dict[str, _TimedTrie] = {}
+        # Background fetches in flight; checked and claimed under lock
+        self.lock = threading.Lock()
+        self.loading = False
+        self.loading_dirs: Set[str] = set()
+    
+    def claim_executables(self) -> bool:
+        """Mark the executables as loading; False if a load is already running"""
+        with self.lock:
+            if self.loading:
+                return False
+            self.loading = True
+            return True
+    
+    def claim_directory(self, remote_dir: str) -> bool:
+        """Mark a directory as loading; False if it is already being fetched"""
+        with self.lock:
+            if remote_dir in self.loading_dirs:
+                return False
+            self.loading_dirs.add(remote_dir)
+            return True
+
+
+class CompletionEngine:
+    """Merges remote executables, remote paths, snippets and history into one lookup"""
+    
+    def __init__(self, ttl: float = DEFAULT_COMPLETION_TTL, directory_ttl: float = DIRECTORY_TTL):
+        self.ttl = ttl
+        self.directory_ttl = directory_ttl
+        self._connections: Dict[Any, _ConnectionCache] = {}
+        self._lines = PrefixTrie()
+        self._commands = PrefixTrie(DEFAULT_COMMANDS)
+        self._lock = threading.RLock()
+    
+    def attach(self, connection_id, ssh_client, facts: Optional[Dict[str, Any]] = None, prefetch: bool = True):
+        """Register the SSH client of a connection and optionally warm its cache"""
+        with self._lock:
+            cache = self._connections.get(connection_id)
+            if cache and cache.ssh_client is ssh_client:
+                cache.facts = facts or cache.facts
+            else:
+                self._connections[connection_id] = cache = _ConnectionCache(ssh_client, facts)
+        
+        if prefetch and cache.claim_executables():
+            threading.Thread(target=self._load_executables, args=(cache,), daemon=True).start()
+    
+    def detach(self, connection_id):
+        """Drop all cached data of a connection"""
+        with self._lock:
+            self._connections.pop(connection_id, None)
+    
+    def invalidate(self, connection_id=None):
+        """Expire remote data so it is fetched again on next use"""
+        with self._lock:
+            if connection_id is None:
+                caches = list(self._connections.values())
+            else:
+                caches = [self._connections[connection_id]] if connection_id in self._connections else []
+            for cache in caches:
+                cache.executables = None
+                cache.directories.clear()
+    
+    def reset(self):
+        """Forget executed commands and snippets added so far"""
+        with self._lock:
+            self._lines = PrefixTrie()
+            self._commands = PrefixTrie(DEFAULT_COMMANDS)
+    
+    def add_history(self, command: str):
+        """Make an executed command available for completion"""
+        command = command.strip()
+        if command:
+            with self._lock:
+                self._lines.insert(command)
+                self._commands.insert(command.split()[0])
+    
+    def add_snippets(self, snippets: Iterable[Dict[str, Any]]):
+        """Make saved command snippets available for completion"""
+        for snippet in snippets:
+            self.add_history(snippet.get('command') or '')
+    
+    def complete(self, line: str, connection_id=None, cwd: Optional[str] = None) -> List[str]:
+        """Get completed lines for the text typed so far"""
+        with self._lock:
+            cache = self._connections.get(connection_id)
+        
+        words = line.split(' ')
+        if len(words) == 1 and '/' not in line:
+            candidates = set(self._command_candidates(cache, line))
+            candidates.update(self._lines.complete(line))
+            return sorted(candidates)
+        
+        # Complete the last word as a path, previous words stay untouched
+        head, word = line[:len(line) - len(words[-1])], words[-1]
+        results = [head + path for path in self._path_candidates(cache, word, cwd)]
+        results.extend(entry for entry in self._lines.complete(line) if entry not in results)
+        return results
+    
+    def _command_candidates(self, cache: Optional[_ConnectionCache], prefix: str) -> List[str]:
+        with self._lock:
+            local = self._commands.complete(prefix)
+        if not cache:
+            return local
+        executables = cache.executables
+        if executables is None or not executables.is_fresh(self.ttl):
+            if cache.claim_executables():
+                threading.Thread(target=self._load_executables, args=(cache,), daemon=True).start()
+            if executables is None:
+                return local
+        return local + executables.trie.complete(prefix)
+    
+    def _path_candidates(self, cache: Optional[_ConnectionCache], word: str, cwd: Optional[str]) -> List[str]:
+        if not cache:
+            return []
+        directory, _, partial = word.rpartition('/')
+        if word.startswith('/'):
+            remote_dir = directory or '/'
+        else:
+            base = cwd or cache.facts.get('cwd') or cache.facts.get('home') or '.'
+            if directory.startswith('~'):
+                home = cache.facts.get('home') or base
+                remote_dir = home + directory[1:]
+            else:
+                remote_dir = posixpath.join(base, directory) if directory else base
+        remote_dir = posixpath.normpath(remote_dir)
+        
+        # Never list on the Tk thread: answer from the cache (stale or empty) and refresh in the background
+        entries = cache.directories.get(remote_dir)
+        if entries is None or not entries.is_fresh(self.directory_ttl):
+            if cache.claim_directory(remote_dir):
+                threading.Thread(target=self._load_directory, args=(cache, remote_dir), daemon=True).start()
+            if entries is None:
+                return []
+        
+        prefix = f"{directory}/" if word.startswith('/') or directory else ""
+        return [prefix + name for name in entries.trie.complete(partial)]
+    
+    def _load_executables(self, cache: _ConnectionCache):
+        """Fetch executable names from every PATH directory in one round trip (claimed with claim_executables)"""
+        try:
+            if not cache.ssh_client or not cache.ssh_client.is_connected():
+                return
+            path = cache.facts.get('path')
+            dirs = ' '.join(shlex.quote(d) for d in path) if path else '$(echo "$PATH" | tr ":" " ")'
+            output = cache.ssh_client.execute_command(
+                f'for d in {dirs}; do [ -d "$d" ] && ls -1 "$d"; done 2>/dev/null', audit=False
+            )
+            cache.executables = _TimedTrie(name for name in output.splitlines() if name and ' ' not in name)
+            logger.info(f"Loaded {len(cache.executables.trie)} remote executables for completion")
+        except Exception as e:
+            logger.warning(f"Failed to load remote executables: {e}")
+        finally:
+            with cache.lock:
+                cache.loading = False
+    
+    def _load_directory(self, cache: _ConnectionCache, remote_dir: str):
+        """Fetch the entries of a remote directory (claimed with claim_directory), marking subdirectories with a slash"""
+        try:
+            if not cache.ssh_client or not cache.ssh_client.is_connected():
+                return
+            listing = cache.ssh_client.list_directory(remote_dir)
+            cache.directories[remote_dir] = _TimedTrie(
+                entry['name'] + ('/' if entry['is_directory'] else '') for entry in listing
+            )
+        except Exception as e:
+            logger.debug(f"Directory listing for completion failed: {e}")
+        finally:
+            with cache.lock:
+                cache.loading_dirs.discard(remote_dir)
@@ -0,0 +1,135 @@
+"""
+Remote host facts collected once per session and cached per connection
+"""
+
+import shlex
+import threading
+import time
+from typing import Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One round trip gathers everything; each line is "key=value"
+FACTS_PROBE = r'''
+printf 'os=%s\n' "$( (. /etc/os-release && printf '%s' "$PRETTY_NAME") 2>/dev/null || uname -s)"
+printf 'kernel=%s\n' "$(uname -r)"
+printf 'shell=%s\n' "$SHELL"
+printf 'home=%s\n' "$HOME"
+printf 'cwd=%s\n' "$(pwd)"
+printf 'cpus=%s\n' "$(getconf _NPROCESSORS_ONLN 2>/dev/null || nproc 2>/dev/null)"
+printf 'mem_kb=%s\n' "$(awk '/^MemTotal:/ {print $2}' /proc/meminfo 2>/dev/null)"
+printf 'path=%s\n' "$PATH"
+'''
+
+FACT_KEYS = ('os', 'kernel', 'shell', 'home', 'cwd', 'cpus', 'mem_kb', 'path')
+
+DEFAULT_FACTS_TTL = 3600
+
+
+def parse_facts(output: str) -> Dict[str, Any]:
+    """Parse probe output into a facts dictionary"""
+    facts: Dict[str, Any] = {key: None for key in FACT_KEYS}
+    
+    for line in output.splitlines():
+        key, sep, value = line.partition('=')
+        if not sep or key not in facts:
+            continue
+        value = value.strip()
+        if key in ('cpus', 'mem_kb'):
+            facts[key] = int(value) if value.isdigit() else None
+        elif key == 'path':
+            facts[key] = [entry for entry in value.split(':') if entry]
+        else:
+            facts[key] = value or None
+    
+    return facts
+
+
+def format_memory(mem_kb: Optional[int]) -> str:
+    """Human readable memory size"""
+    if not mem_kb:
+        return "?"
+    if mem_kb >= 1024 * 1024:
+        return f"{mem_kb / (1024 * 1024):.1f} GiB"
+    return f"{mem_kb / 1024:.0f} MiB"
+
+
+def display_cwd(facts: Dict[str, Any], cwd: Optional[str] = None) -> str:
+    """Render a working directory the way a shell prompt would (~ for home)"""
+    cwd = cwd or facts.get('cwd') or "~"
+    home = (facts.get('home') or "").rstrip('/')
+    if home and cwd.rstrip('/') == home:
+        return "~"
+    if home and cwd.startswith(home + '/'):
+        return "~" + cwd[len(home):]
+    return cwd
+
+
+class HostFactsCollector:
+    """Runs the facts probe on first connect and serves cached results afterwards"""
+    
+    def __init__(self, db_manager, ttl: float = DEFAULT_FACTS_TTL):
+        self.db_manager = db_manager
+        self.ttl = ttl
+        self._cache: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get_facts(self, connection: Dict[str, Any], ssh_client=None, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Get facts for a connection, probing the host only when the cache is stale"""
+        connection_id = connection.get('id')
+        
+        if not refresh:
+            facts = self.get_cached(connection_id)
+            if facts:
+                return facts
+        
+        if not ssh_client or not ssh_client.is_connected():
+            return None
+        
+        try:
+            facts = self.probe(ssh_client)
+        except Exception as e:
+            logger.warning(f"Failed to gather host facts for {connection.get('host')}: {e}")
+            return None
+        
+        with self._lock:
+            self._cache[connection_id] = facts
+        if connection_id is not None:
+            self.db_manager.save_host_facts(connection_id, facts)
+        return facts
+    
+    def get_cached(self, connection_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Get facts from memory or the database without touching the network"""
+        with self._lock:
+            facts = self._cache.get(connection_id)
+        if facts and time.time() - facts['collected_at'] <= self.ttl:
+            return facts
+        
+        if connection_id is None:
+            return None
+        
+        facts = self.db_manager.get_host_facts(connection_id, max_age=self.ttl)
+        if facts:
+            with self._lock:
+                self._cache[connection_id] = facts
+        return facts
+    
+    def probe(self, ssh_client) -> Dict[str, Any]:
+        """Run the batched probe on the remote host"""
+        output = ssh_client.execute_command(f"sh -c {shlex.quote(FACTS_PROBE)} 2>/dev/null", audit=False)
+        facts = parse_facts(output)
+        facts['collected_at'] = time.time()
+        logger.info(f"Collected host facts: {facts.get('os')} / {facts.get('kernel')}")
+        return facts
+    
+    def invalidate(self, connection_id: int):
+        """Forget cached facts for a connection"""
+        with self._lock:
+            self._cache.pop(connection_id, None)
+        self.db_manager.delete_host_facts(connection_id)
+    
+    def clear(self):
+        """Forget all facts held in memory; the database copy is read again on next use"""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,148 @@
+"""
+Shared SSH transports for terminal tabs connected to the same host
+"""
+
+import threading
+from typing import Callable, Dict, Any, Optional, Set, Tuple
+import logging
+
+from .ssh_client import SSHClient
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """Reference-counted SSHClient per (host, port, username).
+
+    References are counted per client object and release() takes the client
+    acquire() handed out, so a holder of a transport that died and was
+    replaced can never close the replacement. User count changes are
+    reported after the lock is released, so a slow on_sessions_changed (a
+    database write) never holds up other tabs' acquire() and release().
+    """
+    
+    def __init__(self, on_command: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_sessions_changed: Optional[Callable[[Tuple, int], None]] = None):
+        # Passed to every client, e.g. AuditLog.record
+        self.on_command = on_command
+        # Called with (key, users) whenever a transport's user count changes; 0 means closed
+        self.on_sessions_changed = on_sessions_changed
+        # Current client per key; replaced clients stay in _refs until their holders release them
+        self._clients: Dict[Tuple, SSHClient] = {}
+        self._refs: Dict[SSHClient, int] = {}
+        self._lock = threading.Lock()
+        # Keys whose user count changed since it was last reported; one thread reports at a time
+        self._changed: Set[Tuple] = set()
+        self._report_lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(connection: Dict[str, Any]) -> Tuple:
+        return (connection['host'], int(connection.get('port') or 22), connection['username'])
+    
+    def acquire(self, connection: Dict[str, Any]) -> SSHClient:
+        """Get a connected client for the connection, reusing an open transport"""
+        key = self.key_for(connection)
+        client = self._reuse(key)
+        if client:
+            return client
+        
+        # Connect without the lock so a slow host does not hold up other tabs
+        client = SSHClient(on_command=self.on_command)
+        client.connect(connection)
+        with self._lock:
+            current = self._clients.get(key)
+            added = current is None or not current.is_connected()
+            if added:
+                self._clients[key] = client
+                self._refs[client] = 1
+                self._changed.add(key)
+        if added:
+            self._report_changes()
+            return client
+        # Another tab connected to the same host meanwhile; share its transport
+        client.close()
+        return self._reuse(key) or self.acquire(connection)
+    
+    def _reuse(self, key: Tuple) -> Optional[SSHClient]:
+        # The live client for key with one more reference; a dead one is evicted and closed
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                return None
+            alive = client.is_connected()
+            if alive:
+                self._refs[client] += 1
+                logger.info(f"Reusing SSH transport to {key[0]}:{key[1]} ({self._refs[client]} users)")
+            else:
+                # Its holders keep their references and release the closed client later
+                del self._clients[key]
+            self._changed.add(key)
+        self._report_changes()
+        if alive:
+            return client
+        logger.info(f"SSH transport to {key[0]}:{key[1]} is gone; reconnecting")
+        client.close()
+        return None
+    
+    def release(self, client: SSHClient):
+        """Give back a client from acquire(); the transport closes when its last user is gone"""
+        with self._lock:
+            if client not in self._refs:
+                return
+            self._refs[client] -= 1
+            key = (client.hostname, int(client.port or 22), client.username)
+            if self._clients.get(key) is client:
+                self._changed.add(key)
+            closed = self._refs[client] == 0
+            if closed:
+                del self._refs[client]
+                if self._clients.get(key) is client:
+                    del self._clients[key]
+        self._report_changes()
+        if closed:
+            client.close()
+    
+    def _report_changes(self):
+        # Called without the lock. Every report reads the current count, so whichever
+        # thread reports last leaves on_sessions_changed with the latest state.
+        if not self.on_sessions_changed:
+            with self._lock:
+                self._changed.clear()
+            return
+        while self._changed and self._report_lock.acquire(blocking=False):
+            try:
+                while True:
+                    with self._lock:
+                        if not self._changed:
+                            break
+                        key = self._changed.pop()
+                        client = self._clients.get(key)
+                        users = self._refs.get(client, 0) if client else 0
+                    try:
+                        self.on_sessions_changed(key, users)
+                    except Exception as e:
+                        logger.warning(f"Failed to report SSH session change: {e}")
+            finally:
+                self._report_lock.release()
+    
+    def report_all(self):
+        """Report every open transport again, e.g. after the sessions table was cleared"""
+        with self._lock:
+            self._changed.update(self._clients)
+        self._report_changes()
+    
+    def active_count(self) -> int:
+        """Number of open transports"""
+        with self._lock:
+            return len(self._clients)
+    
+    def close_all(self):
+        """Close every pooled transport"""
+        with self._lock:
+            clients = list(self._refs)
+            self._changed.update(self._clients)
+            self._clients.clear()
+            self._refs.clear()
+        self._report_changes()
+        for client in clients:
+            client.close()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Interactive PTY shell session over an SSH connection
+"""
+
+import codecs
+import threading
+from typing import Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ShellSession:
+    """Streams a remote PTY shell to a callback and forwards keyboard input"""
+    
+    READ_SIZE = 32768
+    
+    def __init__(self, ssh_client, on_data: Callable[[str], None], on_close: Optional[Callable[[], None]] = None,
+                 term: str = "xterm-256color", cols: int = 80, rows: int = 24):
+        self.ssh_client = ssh_client
+        self.on_data = on_data
+        self.on_close = on_close
+        self.term = term
+        self.cols = cols
+        self.rows = rows
+        self.channel = None
+        self.reader_thread: Optional[threading.Thread] = None
+        self.closed = False
+        self._send_lock = threading.Lock()
+    
+    def start(self):
+        """Open the shell channel and start reading from it"""
+        self.channel = self.ssh_client.open_shell(self.term, self.cols, self.rows)
+        self.reader_thread = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader_thread.start()
+    
+    def _read_loop(self):
+        # Multi-byte characters may be split across reads
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            while not self.closed:
+                data = self.channel.recv(self.READ_SIZE)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    self.on_data(text)
+        except Exception as e:
+            if not self.closed:
+                logger.warning(f"Shell session read failed: {e}")
+        finally:
+            self.closed = True
+            if self.on_close:
+                self.on_close()
+    
+    def send(self, data: str):
+        """Send keyboard input to the remote shell"""
+        if self.closed or not self.channel:
+            return
+        with self._send_lock:
+            try:
+                self.channel.sendall(data.encode('utf-8'))
+            except Exception as e:
+                logger.warning(f"Shell session write failed: {e}")
+    
+    def resize(self, cols: int, rows: int):
+        """Tell the remote PTY about a new window size"""
+        if (cols, rows) == (self.cols, self.rows):
+            return
+        self.cols, self.rows = cols, rows
+        if self.channel and not self.closed:
+            try:
+                self.channel.resize_pty(width=cols, height=rows)
+            except Exception as e:
+                logger.warning(f"Shell session resize failed: {e}")
+    
+    def close(self):
+        """Close the shell channel; the reader thread exits on its own"""
+        self.closed = True
+        if self.channel:
+            self.channel.close()
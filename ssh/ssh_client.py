@@ -1,8 +1,10 @@
 import paramiko
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
 import logging
 import os
+import stat
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,13 +12,19 @@ logger = logging.getLogger(__name__)
 
 
 class SSHClient:
-    def __init__(self):
+    def __init__(self, on_command: Optional[Callable[[Dict[str, Any]], None]] = None):
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.connected = False
         self.hostname = None
         self.port = None
         self.username = None
+        self.connection_id = None
+        # SFTP session reused by list_directory (opened on first use)
+        self._sftp = None
+        self._sftp_lock = threading.Lock()
+        # Called with an audit entry after every execute_command (e.g. AuditLog.record)
+        self.on_command = on_command
         
     def connect(self, connection_data: Dict[str, Any]):
         """Connect to SSH server using connection data"""
@@ -28,6 +36,10 @@ class SSHClient:
             key_path = connection_data.get('key_path')
             
             logger.info(f"Connecting to {hostname}:{port} as {username}")
+            self.hostname = hostname
+            self.port = port
+            self.username = username
+            self.connection_id = connection_data.get('id')
             
             # Try key-based authentication first
             if key_path and os.path.exists(key_path):
@@ -62,18 +74,25 @@ class SSHClient:
             self.connected = False
             raise
             
-    def execute_command(self, command: str) -> str:
-        """Execute a command and return the output"""
+    def execute_command(self, command: str, audit: bool = True) -> str:
+        """Execute a command and return the output; audit=False for the app's own probes"""
         if not self.connected:
             raise Exception("Not connected to SSH server")
             
+        started_at = time.time()
+        started = time.monotonic()
+        exit_status = None
+        output_size = 0
         try:
             logger.info(f"Executing command: {command}")
             stdin, stdout, stderr = self.client.exec_command(command)
             
             # Get output
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
+            raw_output = stdout.read()
+            raw_error = stderr.read()
+            output_size = len(raw_output) + len(raw_error)
+            output = raw_output.decode('utf-8')
+            error = raw_error.decode('utf-8')
             exit_status = stdout.channel.recv_exit_status()
             
             logger.info(f"Command completed with exit status: {exit_status}")
@@ -88,6 +107,28 @@ class SSHClient:
         except Exception as e:
             logger.error(f"Command execution failed: {e}")
             raise
+        finally:
+            if audit:
+                self._report_command(command, exit_status, started_at, time.monotonic() - started, output_size)
+    
+    def _report_command(self, command: str, exit_code: Optional[int], started_at: float,
+                        duration: float, output_size: int):
+        """Hand an audit entry to on_command; auditing never fails a command"""
+        if not self.on_command:
+            return
+        try:
+            self.on_command({
+                'connection_id': self.connection_id,
+                'host': self.hostname,
+                'username': self.username,
+                'command': command,
+                'exit_code': exit_code,
+                'started_at': started_at,
+                'duration': duration,
+                'output_size': output_size
+            })
+        except Exception as e:
+            logger.warning(f"Failed to audit command: {e}")
             
     def execute_interactive_command(self, command: str) -> str:
         """Execute an interactive command"""
@@ -118,6 +159,18 @@ class SSHClient:
             logger.error(f"Interactive command error: {e}")
             raise Exception(f"Interactive command error: {e}")
             
+    def open_shell(self, term: str = "xterm-256color", cols: int = 80, rows: int = 24) -> paramiko.Channel:
+        """Open a PTY-backed interactive shell channel"""
+        if not self.connected:
+            raise Exception("Not connected to SSH server")
+        
+        try:
+            logger.info(f"Opening interactive shell ({term}, {cols}x{rows})")
+            return self.client.invoke_shell(term=term, width=cols, height=rows)
+        except Exception as e:
+            logger.error(f"Failed to open shell: {e}")
+            raise
+    
     def upload_file(self, local_path: str, remote_path: str) -> bool:
         """Upload a file to the remote server"""
         if not self.connected:
@@ -154,9 +207,15 @@ class SSHClient:
             raise Exception("Not connected to SSH server")
             
         try:
-            sftp = self.client.open_sftp()
-            files = sftp.listdir_attr(remote_path)
-            sftp.close()
+            with self._sftp_lock:
+                if self._sftp is None:
+                    self._sftp = self.client.open_sftp()
+                try:
+                    files = self._sftp.listdir_attr(remote_path)
+                except (EOFError, OSError, paramiko.SSHException):
+                    # The session may have died with its channel; the next call opens a new one
+                    self._close_sftp()
+                    raise
             
             result = []
             for file_attr in files:
@@ -164,7 +223,7 @@ class SSHClient:
                     'name': file_attr.filename,
                     'size': file_attr.st_size,
                     'permissions': oct(file_attr.st_mode)[-3:],
-                    'is_directory': file_attr.st_mode & 0o40000 != 0
+                    'is_directory': stat.S_ISDIR(file_attr.st_mode or 0)
                 })
                 
             return result
@@ -174,7 +233,10 @@ class SSHClient:
             
     def is_connected(self) -> bool:
         """Check if connected to SSH server"""
-        return self.connected
+        if not self.connected:
+            return False
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
         
     def get_connection_info(self) -> Dict[str, Any]:
         """Get connection information"""
@@ -188,8 +250,18 @@ class SSHClient:
             'connected': self.is_connected()
         }
         
+    def _close_sftp(self):
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+            self._sftp = None
+    
     def close(self):
         """Close the SSH connection"""
+        with self._sftp_lock:
+            self._close_sftp()
         if self.connected:
             self.client.close()
             self.connected = False
@@ -421,6 +421,7 @@ class SSHClientApp {
         this.currentUser = null;
         this.token = localStorage.getItem('token');
         this.currentConnection = null;
+        this.pageSize = 100;
         
         this.init();
     }
@@ -444,6 +445,14 @@ class SSHClientApp {
         // Group form
         document.getElementById('groupForm').addEventListener('submit', (e) => this.handleAddGroup(e));
         
+        // Search boxes: full-text search once typing pauses, the paged list when empty
+        this.bindSearch('connectionsSearch', '/api/connections/search',
+            results => { this.renderConnections(results); this.renderLoadMore('connectionsList', null); },
+            () => this.loadConnections());
+        this.bindSearch('snippetsSearch', '/api/commands/search',
+            results => { this.renderSnippets(results); this.renderLoadMore('snippetsList', null); },
+            () => this.loadSnippets());
+        
         // Tab switching
         document.querySelectorAll('.nav-tab').forEach(tab => {
             tab.addEventListener('click', (e) => {
@@ -561,40 +570,88 @@ class SSHClientApp {
         ]);
     }
     
-    async loadConnections() {
+    async fetchPage(url, cursor) {
+        // One page of a keyset-paged list endpoint
+        const params = new URLSearchParams({ limit: this.pageSize });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${url}?${params}`, {
+            headers: {
+                'Authorization': `Bearer ${this.token}`
+            }
+        });
+        return response.ok ? response.json() : null;
+    }
+    
+    async loadConnections(cursor = null) {
         try {
-            const response = await fetch('/api/connections', {
-                headers: {
-                    'Authorization': `Bearer ${this.token}`
-                }
-            });
-            
-            if (response.ok) {
-                const connections = await response.json();
-                this.renderConnections(connections);
+            const page = await this.fetchPage('/api/connections', cursor);
+            if (page) {
+                this.renderConnections(page.items, !cursor);
+                this.renderLoadMore('connectionsList', page.next_cursor, next => this.loadConnections(next));
             }
         } catch (error) {
             console.error('Failed to load connections:', error);
         }
     }
     
-    async loadSnippets() {
+    async loadSnippets(cursor = null) {
         try {
-            const response = await fetch('/api/commands', {
-                headers: {
-                    'Authorization': `Bearer ${this.token}`
-                }
-            });
-            
-            if (response.ok) {
-                const snippets = await response.json();
-                this.renderSnippets(snippets);
+            const page = await this.fetchPage('/api/commands', cursor);
+            if (page) {
+                this.renderSnippets(page.items, !cursor);
+                this.renderLoadMore('snippetsList', page.next_cursor, next => this.loadSnippets(next));
             }
         } catch (error) {
             console.error('Failed to load snippets:', error);
         }
     }
     
+    bindSearch(inputId, url, render, reload) {
+        const input = document.getElementById(inputId);
+        let timer = null;
+        let generation = 0;
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(async () => {
+                const query = input.value.trim();
+                const current = ++generation;
+                if (!query) {
+                    reload();
+                    return;
+                }
+                try {
+                    const response = await fetch(`${url}?${new URLSearchParams({ q: query })}`, {
+                        headers: {
+                            'Authorization': `Bearer ${this.token}`
+                        }
+                    });
+                    // Ignore answers to queries the user has already typed past
+                    if (response.ok && current === generation) {
+                        render(await response.json());
+                    }
+                } catch (error) {
+                    console.error('Search failed:', error);
+                }
+            }, 150);
+        });
+    }
+    
+    renderLoadMore(containerId, nextCursor, loadNext) {
+        // "Load more" button after the rows, while the server has another page
+        const container = document.getElementById(containerId);
+        container.querySelector('.load-more')?.remove();
+        if (!nextCursor) return;
+        
+        const button = document.createElement('button');
+        button.className = 'btn btn-small load-more';
+        button.textContent = 'Load more';
+        button.onclick = () => {
+            button.disabled = true;
+            loadNext(nextCursor);
+        };
+        container.appendChild(button);
+    }
+    
     async loadGroups() {
         try {
             const response = await fetch('/api/groups', {
@@ -631,9 +688,9 @@ class SSHClientApp {
         }
     }
     
-    renderConnections(connections) {
+    renderConnections(connections, replace = true) {
         const container = document.getElementById('connectionsList');
-        container.innerHTML = '';
+        if (replace) container.innerHTML = '';
         
         connections.forEach(conn => {
             const item = document.createElement('div');
@@ -661,9 +718,9 @@ class SSHClientApp {
         });
     }
     
-    renderSnippets(snippets) {
+    renderSnippets(snippets, replace = true) {
         const container = document.getElementById('snippetsList');
-        container.innerHTML = '';
+        if (replace) container.innerHTML = '';
         
         snippets.forEach(snippet => {
             const item = document.createElement('div');
@@ -723,6 +780,7 @@ class SSHClientApp {
         document.getElementById('snippetsCount').textContent = stats.commands_count;
         document.getElementById('groupsCount').textContent = stats.groups_count;
         document.getElementById('usersCount').textContent = stats.total_users;
+        document.getElementById('sessionsCount').textContent = stats.ssh_sessions.transports;
     }
     
     async handleAddConnection(e) {
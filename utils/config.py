@@ -27,12 +27,19 @@ class ConfigManager:
             },
             "database": {
                 "path": "ssh_client.db",
-                "encryption_enabled": True
+                "encryption_enabled": True,
+                "cache_enabled": True,
+                "cache_max_entries": 256,
+                "watch_external_changes": True,
+                "external_check_interval": 1.0
             },
             "ssh": {
                 "default_port": 22,
                 "timeout": 30,
-                "keepalive_interval": 60
+                "keepalive_interval": 60,
+                "facts_ttl": 3600,
+                "completion_ttl": 300,
+                "session_heartbeat": 60
             },
             "ui": {
                 "window_width": 1200,
@@ -40,6 +47,38 @@ class ConfigManager:
                 "font_size": 10,
                 "font_family": "Consolas"
             },
+            "terminal": {
+                "scrollback_lines": 10000,
+                "scrollback_trim_block": 1000,
+                "archive_scrollback": True,
+                "archive_max_age_days": 7,
+                "command_workers": 4,
+                "search_workers": 2,
+                "view": "text",
+                "store_lines": 200000
+            },
+            "history": {
+                "flush_interval": 1.0,
+                "batch_size": 200
+            },
+            "audit": {
+                "flush_interval": 1.0,
+                "batch_size": 500,
+                "retention_days": 90
+            },
+            "backup": {
+                "enabled": True,
+                "interval_hours": 24,
+                "keep": 7,
+                "compress": True,
+                "step_pages": 256,
+                "step_sleep": 0.005
+            },
+            "recording": {
+                "auto_record": False,
+                "compress": True,
+                "flush_interval": 0.5
+            },
             "security": {
                 "auto_lock_timeout": 300,  # 5 minutes
                 "require_password_on_startup": False
@@ -161,6 +200,12 @@ class AppPaths:
         self.backups_dir = self.data_dir / "backups"
         self.backups_dir.mkdir(exist_ok=True)
         
+        self.scrollback_dir = self.data_dir / "scrollback"
+        self.scrollback_dir.mkdir(exist_ok=True)
+        
+        self.recordings_dir = self.data_dir / "recordings"
+        self.recordings_dir.mkdir(exist_ok=True)
+    
     def get_database_path(self) -> Path:
         """Get database file path"""
         return self.data_dir / "ssh_client.db"
@@ -180,6 +225,14 @@ class AppPaths:
     def get_backup_path(self, filename: str) -> Path:
         """Get backup file path"""
         return self.backups_dir / filename
+    
+    def get_scrollback_path(self, filename: str) -> Path:
+        """Get terminal scrollback archive path"""
+        return self.scrollback_dir / filename
+    
+    def get_recording_path(self, filename: str) -> Path:
+        """Get session recording path"""
+        return self.recordings_dir / filename
 
 
 # Global instances
@@ -0,0 +1,107 @@
+"""
+Shared background dispatchers for blocking terminal commands and output searches
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+import logging
+
+from .config import config_manager
+
+logger = logging.getLogger(__name__)
+
+
+class CommandDispatcher:
+    """Runs blocking jobs on a shared thread pool, in FIFO order per session.
+
+    Each session key has its own queue and at most one job running at a time,
+    so commands of one terminal never overtake each other while different
+    terminals run in parallel. Idle workers block without polling. The pool
+    size comes from the "terminal.<name>_workers" setting.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, name: str = "command", default_workers: int = 4):
+        self.max_workers = max_workers
+        self.name = name
+        self.default_workers = default_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queues: Dict[Hashable, Deque[Tuple[Future, Callable, tuple, dict]]] = {}
+        self._active = set()
+        self._lock = threading.Lock()
+        self._shutdown = False
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads are only started once the first job arrives
+        if self._executor is None:
+            workers = self.max_workers or config_manager.get(f'terminal.{self.name}_workers', self.default_workers)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name)
+        return self._executor
+    
+    def submit(self, session: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a job for a session; it starts after the session's earlier jobs"""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Dispatcher is shut down")
+            self._queues.setdefault(session, deque()).append((future, fn, args, kwargs))
+            if session not in self._active:
+                self._active.add(session)
+                self._get_executor().submit(self._run_next, session)
+        return future
+    
+    def _run_next(self, session: Hashable):
+        # Run one job, then requeue the session so other sessions get a turn
+        with self._lock:
+            jobs = self._queues.get(session)
+            if not jobs:
+                self._queues.pop(session, None)
+                self._active.discard(session)
+                return
+            future, fn, args, kwargs = jobs.popleft()
+        
+        if future.set_running_or_notify_cancel():
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        
+        with self._lock:
+            if self._queues.get(session) and not self._shutdown:
+                self._executor.submit(self._run_next, session)
+            else:
+                self._queues.pop(session, None)
+                self._active.discard(session)
+    
+    def pending(self, session: Hashable) -> int:
+        """Number of jobs of a session that have not started yet"""
+        with self._lock:
+            return len(self._queues.get(session, ()))
+    
+    def cancel(self, session: Hashable) -> int:
+        """Cancel the jobs of a session that have not started yet"""
+        with self._lock:
+            jobs = self._queues.pop(session, deque())
+        for future, _, _, _ in jobs:
+            future.cancel()
+        if jobs:
+            logger.info(f"Cancelled {len(jobs)} pending {self.name} job(s)")
+        return len(jobs)
+    
+    def shutdown(self, wait: bool = False):
+        """Cancel everything pending and stop the workers"""
+        with self._lock:
+            self._shutdown = True
+            sessions = list(self._queues)
+        for session in sessions:
+            self.cancel(session)
+        if self._executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global instances; searches have their own workers so long archive scans never hold up commands
+command_dispatcher = CommandDispatcher()
+search_dispatcher = CommandDispatcher(name="search", default_workers=2)
\ No newline at end of file
@@ -4,7 +4,7 @@ Encryption utilities for secure data storage
 
 import base64
 import os
-from typing import Optional
+from typing import List, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -51,6 +51,19 @@ class EncryptionManager:
         except Exception as e:
             logger.error(f"Encryption error: {e}")
             raise
+    
+    def encrypt_many(self, values: List[Optional[str]]) -> List[Optional[str]]:
+        """Encrypt a batch of strings; empty values stay None"""
+        if not self.fernet:
+            raise Exception("Encryption not initialized")
+        
+        encrypt = self.fernet.encrypt
+        try:
+            return [base64.b64encode(encrypt(value.encode('utf-8'))).decode('utf-8') if value else None
+                    for value in values]
+        except Exception as e:
+            logger.error(f"Encryption error: {e}")
+            raise
             
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt a string"""
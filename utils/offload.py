@@ -0,0 +1,108 @@
+"""
+Blocking work (SQLite, password hashing) run off the web server's event loop
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Async mode of the web server: "threading", "eventlet" or "gevent"
+_async_mode = "threading"
+_pools: List["OffloadPool"] = []
+
+
+def configure(async_mode: str):
+    """Set the server's async mode (socketio.async_mode) before the first request"""
+    global _async_mode
+    # gevent_uwsgi runs on the gevent hub as well
+    _async_mode = "gevent" if async_mode.startswith("gevent") else async_mode
+    # Every pool can have all its slots running at once in the hub's OS threads
+    threads = sum(pool.workers for pool in _pools) + 1
+    if _async_mode == "eventlet":
+        from eventlet import tpool
+        tpool.set_num_threads(threads)
+    elif _async_mode == "gevent":
+        import gevent
+        gevent.get_hub().threadpool.maxsize = threads
+    logger.info(f"Offloading blocking work to OS threads ({async_mode}, {threads} threads)")
+
+
+def cooperative() -> bool:
+    """True when the server runs on green threads, where a blocking call stalls every request"""
+    return _async_mode in ("eventlet", "gevent")
+
+
+class OffloadPool:
+    """A bounded number of OS threads for one kind of blocking work.
+
+    run(func, *args) returns func's result. Under eventlet or gevent the call
+    runs in a real OS thread of the hub's thread pool and only the calling
+    greenlet waits, so websockets and other requests keep being served; a green
+    semaphore of `workers` slots keeps one kind of work (e.g. a burst of bcrypt
+    logins) from taking the threads the others need. In threading mode the
+    call goes to a ThreadPoolExecutor of `workers` threads.
+    """
+    
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self._slots = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        _pools.append(self)
+    
+    def _green_slots(self):
+        # Created on first use so the semaphore belongs to the configured hub
+        if self._slots is None:
+            if _async_mode == "eventlet":
+                from eventlet.semaphore import Semaphore
+            else:
+                from gevent.lock import Semaphore
+            self._slots = Semaphore(self.workers)
+        return self._slots
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            return self._executor
+    
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func in an OS thread and return its result (or raise its exception)"""
+        if _async_mode == "eventlet":
+            from eventlet import tpool
+            with self._green_slots():
+                return tpool.execute(func, *args, **kwargs)
+        if _async_mode == "gevent":
+            import gevent
+            with self._green_slots():
+                return gevent.get_hub().threadpool.apply(func, args, kwargs)
+        return self._get_executor().submit(func, *args, **kwargs).result()
+    
+    def shutdown(self):
+        """Stop the threading-mode workers"""
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+class OffloadProxy:
+    """Calls the target's methods through an OffloadPool, e.g. OffloadProxy(db_manager, db_pool).get_user(...)"""
+    
+    def __init__(self, target: Any, pool: OffloadPool):
+        self._target = target
+        self._pool = pool
+    
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+        
+        def offloaded(*args, **kwargs):
+            return self._pool.run(attribute, *args, **kwargs)
+        offloaded.__name__ = name
+        return offloaded
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Terminal session recording in asciicast v2 format
+
+Events are appended by a background writer in batches. Every batch starts at
+a known file offset (for .cast.gz files it is a separate gzip member) and the
+offset is noted in a small "<recording>.idx" file, so a reader can seek to any
+time without decompressing or parsing what comes before.
+"""
+
+import gzip
+import io
+import json
+import queue
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+import logging
+
+from .config import app_paths, config_manager
+
+logger = logging.getLogger(__name__)
+
+# Plain recordings without an index file get one entry per this many events
+INDEX_EVERY = 500
+
+
+def index_path(path: Union[str, Path]) -> Path:
+    """Path of the seek index that belongs to a recording"""
+    return Path(f"{path}.idx")
+
+
+class SessionRecorder:
+    """Buffered asciicast v2 writer; output() only queues, a thread does the I/O"""
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, width: int = 80, height: int = 24,
+                 title: str = "", compress: Optional[bool] = None, flush_interval: Optional[float] = None):
+        if compress is None:
+            compress = config_manager.get('recording.compress', True)
+        if path is None:
+            safe_title = "".join(c if c.isalnum() or c in "-_." else "_" for c in title) or "session"
+            name = f"{safe_title}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.cast"
+            path = app_paths.get_recording_path(name + (".gz" if compress else ""))
+        self.path = Path(path)
+        self.compress = compress or self.path.suffix == ".gz"
+        self.flush_interval = flush_interval or config_manager.get('recording.flush_interval', 0.5)
+        self.started = time.monotonic()
+        self.closed = False
+        
+        self.header = {
+            "version": 2,
+            "width": width,
+            "height": height,
+            "timestamp": int(time.time()),
+            "title": title,
+            "env": {"TERM": "xterm-256color"}
+        }
+        self._pending: "queue.Queue[Optional[list]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def output(self, data: str):
+        """Record terminal output"""
+        if data and not self.closed:
+            self._pending.put([round(self.elapsed(), 6), "o", data])
+    
+    def input(self, data: str):
+        """Record keyboard input"""
+        if data and not self.closed:
+            self._pending.put([round(self.elapsed(), 6), "i", data])
+    
+    def resize(self, width: int, height: int):
+        """Record a terminal size change"""
+        if not self.closed:
+            self._pending.put([round(self.elapsed(), 6), "r", f"{width}x{height}"])
+    
+    def close(self):
+        """Write what is pending and close the file"""
+        if self.closed:
+            return
+        self.closed = True
+        self._pending.put(None)
+        self._writer.join(timeout=5)
+        logger.info(f"Recording saved to {self.path}")
+    
+    def _run(self):
+        try:
+            with open(self.path, 'ab') as f, open(index_path(self.path), 'a', encoding='utf-8') as index:
+                self._write_batch(f, [json.dumps(self.header)])
+                running = True
+                while running:
+                    # Block until there is output, then gather more for up to flush_interval
+                    event = self._pending.get()
+                    events = []
+                    deadline = time.monotonic() + self.flush_interval
+                    while True:
+                        if event is None:
+                            running = False
+                            break
+                        events.append(event)
+                        try:
+                            event = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                        except queue.Empty:
+                            break
+                    if events:
+                        offset = self._write_batch(f, [json.dumps(e, ensure_ascii=False) for e in events])
+                        index.write(json.dumps([events[0][0], offset]) + "\n")
+                        index.flush()
+        except OSError as e:
+            self.closed = True
+            logger.error(f"Recording to {self.path} failed: {e}")
+    
+    def _write_batch(self, f, lines: List[str]) -> int:
+        # Returns the offset the batch starts at
+        offset = f.tell()
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        f.write(gzip.compress(data, compresslevel=6) if self.compress else data)
+        f.flush()
+        return offset
+
+
+class RecordingReader:
+    """Reads an asciicast v2 recording, seeking through its index"""
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.compressed = self.path.suffix == ".gz"
+        self.header: Dict[str, Any] = self._read_header()
+        self.index: List[Tuple[float, int]] = self._load_index()
+        self._times = [entry[0] for entry in self.index]
+        self._duration: Optional[float] = None
+    
+    def _open(self, offset: int = 0, end: Optional[int] = None):
+        raw = open(self.path, 'rb')
+        raw.seek(offset)
+        if end is not None:
+            # One batch: read just its bytes (for .cast.gz files a whole gzip member)
+            with raw:
+                raw = io.BytesIO(raw.read(end - offset))
+        if self.compressed:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=raw), encoding='utf-8', errors='replace')
+        return io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+    
+    def _read_header(self) -> Dict[str, Any]:
+        with self._open() as f:
+            header = json.loads(f.readline())
+        if not isinstance(header, dict) or header.get("version") != 2:
+            raise ValueError("Not an asciicast v2 recording")
+        return header
+    
+    def _load_index(self) -> List[Tuple[float, int]]:
+        path = index_path(self.path)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = [tuple(json.loads(line)) for line in f if line.strip()]
+            if entries:
+                return entries
+        return self._build_index()
+    
+    def _build_index(self) -> List[Tuple[float, int]]:
+        """Index a recording made elsewhere (one pass; compressed files can only start at 0)"""
+        if self.compressed:
+            return [(0.0, 0)]
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.readline()
+            count = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if count % INDEX_EVERY == 0 and line.strip():
+                    entries.append((json.loads(line)[0], offset))
+                count += 1
+        return entries or [(0.0, 0)]
+    
+    @property
+    def width(self) -> int:
+        return self.header.get("width", 80)
+    
+    @property
+    def height(self) -> int:
+        return self.header.get("height", 24)
+    
+    def duration(self) -> float:
+        """Time of the last event (reads only the last indexed batch)"""
+        if self._duration is None:
+            last = 0.0
+            for event in self.events(self.index[-1][0]):
+                last = event[0]
+            self._duration = last
+        return self._duration
+    
+    def position(self, start: float) -> int:
+        """Index position of the batch at or before start"""
+        return max(0, bisect_right(self._times, start) - 1)
+    
+    def batches(self, position: int = 0) -> Iterator[Tuple[int, List[List]]]:
+        """Yield (index position, events) for every indexed batch from position on"""
+        for current in range(position, len(self.index)):
+            end = self.index[current + 1][1] if current + 1 < len(self.index) else None
+            with self._open(self.index[current][1], end) as f:
+                events = [event for event in map(json.loads, filter(str.strip, f)) if isinstance(event, list)]
+            yield current, events
+    
+    def events(self, start: float = 0.0) -> Iterator[List]:
+        """Yield [time, code, data] events from the indexed position at or before start"""
+        offset = self.index[self.position(start)][1] if self.index else 0
+        with self._open(offset) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                # The header shares the first batch when reading from offset 0
+                if isinstance(event, list):
+                    yield event
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Compressed on-disk archive for terminal lines trimmed from the widget
+"""
+
+import gzip
+import io
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+import logging
+
+from utils.config import app_paths
+
+logger = logging.getLogger(__name__)
+
+
+class ScrollbackArchive:
+    """Append-only gzip file with the scrollback of one terminal session"""
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        if path is None:
+            name = f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(self):x}.log.gz"
+            path = app_paths.get_scrollback_path(name)
+        self.path = Path(path)
+        self.line_count = 0
+        self._lock = threading.Lock()
+    
+    def append(self, text: str):
+        """Append a block of trimmed text as a new gzip member"""
+        if not text:
+            return
+        with self._lock:
+            # Each block is a complete gzip member, so readers never see a torn stream
+            with gzip.open(self.path, 'ab', compresslevel=6) as f:
+                f.write(text.encode('utf-8'))
+            self.line_count += text.count('\n')
+    
+    def has_data(self) -> bool:
+        """Check if anything was archived yet"""
+        return self.path.exists() and self.path.stat().st_size > 0
+    
+    def iter_lines(self) -> Iterator[str]:
+        """Stream archived lines without loading the archive into memory"""
+        if not self.has_data():
+            return
+        with self._lock:
+            size = self.path.stat().st_size
+        with open(self.path, 'rb') as raw:
+            # Only read members that were complete when we started
+            with gzip.GzipFile(fileobj=_LimitedReader(raw, size)) as f:
+                for line in f:
+                    yield line.decode('utf-8', errors='replace')
+    
+    def search(self, pattern: str, regex: bool = False, ignore_case: bool = False,
+               should_stop: Optional[Callable[[], bool]] = None,
+               chunk_size: int = 1024 * 1024) -> Iterator[Tuple[int, str]]:
+        """Yield (line number, line) for archived lines matching pattern"""
+        if not self.has_data():
+            return
+        with self._lock:
+            size = self.path.stat().st_size
+        
+        with open(self.path, 'rb') as raw:
+            with io.TextIOWrapper(gzip.GzipFile(fileobj=_LimitedReader(raw, size)),
+                                  encoding='utf-8', errors='replace', newline='') as f:
+                yield from search_stream(f, compile_pattern(pattern, regex, ignore_case),
+                                         should_stop=should_stop, chunk_size=chunk_size)
+    
+    def export(self, destination, chunk_size: int = 1024 * 1024):
+        """Copy the decompressed archive into an open text file"""
+        if not self.has_data():
+            return
+        with self._lock:
+            size = self.path.stat().st_size
+        with open(self.path, 'rb') as raw:
+            with io.TextIOWrapper(gzip.GzipFile(fileobj=_LimitedReader(raw, size)),
+                                  encoding='utf-8', errors='replace', newline='') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    destination.write(chunk)
+    
+    def remove(self):
+        """Delete the archive from disk"""
+        with self._lock:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # e.g. still open by a search on Windows; prune_archives() gets it later
+                logger.warning(f"Failed to delete scrollback archive {self.path}: {e}")
+            self.line_count = 0
+
+
+def prune_archives(max_age_days: float, directory: Optional[Union[str, Path]] = None) -> int:
+    """Delete archives not written to for max_age_days (left behind by crashed sessions)"""
+    directory = Path(directory or app_paths.scrollback_dir)
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for path in directory.glob("session-*.log.gz"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError as e:
+            logger.warning(f"Failed to delete scrollback archive {path}: {e}")
+    if removed:
+        logger.info(f"Deleted {removed} old scrollback archive(s)")
+    return removed
+
+
+def compile_pattern(pattern: str, regex: bool = False, ignore_case: bool = False) -> "re.Pattern":
+    """Compile a literal or regex search pattern for search_stream"""
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(pattern if regex else re.escape(pattern), flags)
+
+
+def search_stream(f, matcher: "re.Pattern", should_stop: Optional[Callable[[], bool]] = None,
+                  first_line: int = 1, chunk_size: int = 1024 * 1024) -> Iterator[Tuple[int, str]]:
+    """Yield (line number, line) for lines of a text stream matching matcher"""
+    # Match whole chunks and count newlines only up to each hit
+    line_number = first_line
+    tail = ''
+    while True:
+        if should_stop and should_stop():
+            return
+        chunk = f.read(chunk_size)
+        buffer = tail + chunk
+        if not buffer:
+            return
+        # Keep the unfinished last line for the next chunk
+        cut = buffer.rfind('\n') + 1 if chunk else len(buffer)
+        block, tail = buffer[:cut], buffer[cut:]
+        
+        position = 0
+        last_line = 0
+        for match in matcher.finditer(block):
+            start = match.start()
+            line_number += block.count('\n', position, start)
+            position = start
+            if line_number == last_line:
+                continue
+            last_line = line_number
+            line_start = block.rfind('\n', 0, start) + 1
+            line_end = block.find('\n', start)
+            yield line_number, block[line_start:line_end if line_end >= 0 else len(block)]
+        line_number += block.count('\n', position)
+        if not chunk:
+            return
+
+
+class _LimitedReader:
+    """File wrapper that stops reading at a fixed offset"""
+    
+    def __init__(self, raw, limit: int):
+        self.raw = raw
+        self.remaining = limit
+    
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        return data